@@ -17,7 +17,6 @@ python auto_daily_trader.py [--paper-trading] [--dry-run]
 
 import asyncio
 import sys
-import os
 import signal
 from datetime import datetime, time, timedelta
 from typing import Tuple
@@ -27,13 +26,15 @@ try:  # Python 3.9+
 except Exception:  # pragma: no cover
     ZoneInfo = None  # fallback handled later
 from ib_insync import *  # noqa: F401,F403 (assumed needed by ManualTrader)
-import json
 import subprocess
 
 # Import project modules
 from config import *  # noqa: F401,F403
 from check_todays_signals import check_todays_signals, TICKERS_CONFIG
+from live_signal_engine import load_live_signals
+from event_log import log_event, last_event, read_events, import_legacy_state
 from portfolio_manager import PortfolioManager
+import trading_calendar
 from manual_trading import ManualTrader
 
 # Logging setup (ASCII only for Windows console compatibility)
@@ -82,9 +83,7 @@ class AutoDailyTrader:
         self.today_close_executed = False
         self.current_date = None
 
-        # Persistent state / idempotency tracking
-        self.state_file = 'auto_daily_state.json'
-        self.executed_orders_file = 'executed_orders.json'
+        # Persistent state / idempotency tracking (append-only event log)
         self._load_persistent_state()
 
         # OS signal handlers
@@ -140,21 +139,7 @@ class AutoDailyTrader:
         return datetime.now()
 
     def is_trading_day(self, check_date: datetime) -> bool:
-        if check_date.weekday() in [5, 6]:  # Saturday, Sunday
-            return False
-        us_holidays_2025 = [
-            datetime(2025, 1, 1).date(),
-            datetime(2025, 1, 20).date(),
-            datetime(2025, 2, 17).date(),
-            datetime(2025, 4, 18).date(),
-            datetime(2025, 5, 26).date(),
-            datetime(2025, 6, 19).date(),
-            datetime(2025, 7, 4).date(),
-            datetime(2025, 9, 1).date(),
-            datetime(2025, 11, 27).date(),
-            datetime(2025, 12, 25).date(),
-        ]
-        return check_date.date() not in us_holidays_2025
+        return trading_calendar.is_trading_day(check_date)
 
     def get_next_trading_session(self) -> Tuple[datetime, str]:
         """Return the next session (OPEN or CLOSE) purely by NY time.
@@ -180,7 +165,8 @@ class AutoDailyTrader:
 
             date = now.date()
             open_dt = datetime.combine(date, self.open_trading_time)
-            close_dt = datetime.combine(date, self.close_trading_time)
+            # Halbtage (HALF_DAY_CLOSE_TIME) schließen früher
+            close_dt = datetime.combine(date, trading_calendar.session_times(date)[1])
             if getattr(self, 'market_tz', None):
                 open_dt = open_dt.replace(tzinfo=self.market_tz)
                 close_dt = close_dt.replace(tzinfo=self.market_tz)
@@ -200,55 +186,48 @@ class AutoDailyTrader:
 
     # ------------------ PERSISTENT STATE ------------------
     def _load_persistent_state(self):
-        """Load previous day's session completion to avoid duplicate runs on restart."""
+        """Restore today's session completion from the event log to avoid duplicate runs on restart."""
         try:
-            if os.path.exists(self.state_file):
-                with open(self.state_file, 'r') as f:
-                    data = json.load(f)
-                saved_date = data.get('date')
-                today_str = self._market_now().strftime('%Y-%m-%d')
-                if saved_date == today_str:
-                    self.today_open_executed = data.get('open_executed', False)
-                    self.today_close_executed = data.get('close_executed', False)
-                    logger.info(f"Restored session state for {today_str}: OPEN={self.today_open_executed} CLOSE={self.today_close_executed}")
+            migrated = import_legacy_state('auto_daily')
+            if migrated:
+                logger.info(f"Imported {migrated} entries from the legacy state files into the event log")
         except Exception as e:  # pragma: no cover
-            logger.warning(f"Could not load state file: {e}")
-
-    def _save_persistent_state(self):
-        """Persist today's session completion flags."""
+            logger.warning(f"Could not import legacy state files: {e}")
         try:
-            data = {
-                'date': self._market_now().strftime('%Y-%m-%d'),
-                'open_executed': self.today_open_executed,
-                'close_executed': self.today_close_executed
-            }
-            with open(self.state_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            today_str = self._market_now().strftime('%Y-%m-%d')
+            state = last_event('state', since=today_str, trader='auto_daily', session_date=today_str)
+            if state:
+                self.today_open_executed = state.get('open_executed', False)
+                self.today_close_executed = state.get('close_executed', False)
+                logger.info(f"Restored session state for {today_str}: OPEN={self.today_open_executed} CLOSE={self.today_close_executed}")
         except Exception as e:  # pragma: no cover
-            logger.warning(f"Could not save state file: {e}")
+            logger.warning(f"Could not load session state: {e}")
 
-    def _load_executed_orders(self):
+    def _save_persistent_state(self):
+        """Record today's session completion flags (state transition event)."""
         try:
-            if os.path.exists(self.executed_orders_file):
-                with open(self.executed_orders_file, 'r') as f:
-                    return set(json.load(f))
+            log_event('state', ts=self._market_now().replace(tzinfo=None), trader='auto_daily',
+                      session_date=self._market_now().strftime('%Y-%m-%d'),
+                      open_executed=self.today_open_executed,
+                      close_executed=self.today_close_executed)
         except Exception as e:  # pragma: no cover
-            logger.warning(f"Could not load executed orders file: {e}")
-        return set()
+            logger.warning(f"Could not save session state: {e}")
 
-    def _save_executed_orders(self, executed_keys: set):
+    def _load_executed_orders(self, day: str) -> set:
+        """Keys of orders already executed on `day` (successful order events)."""
         try:
-            with open(self.executed_orders_file, 'w') as f:
-                json.dump(sorted(list(executed_keys)), f, indent=2)
+            return {e['key'] for e in read_events('order', since=day, trader='auto_daily', ok=True) if e.get('key')}
         except Exception as e:  # pragma: no cover
-            logger.warning(f"Could not save executed orders file: {e}")
+            logger.warning(f"Could not load executed orders: {e}")
+        return set()
 
     def run_fresh_backtest(self) -> bool:
         logger.info("Running fresh backtest to get latest signals...")
         try:
             result = subprocess.run([
                 sys.executable,
-                'complete_comprehensive_backtest.py'
+                'complete_comprehensive_backtest.py',
+                '--charts', 'background'
             ], capture_output=True, text=True, timeout=300)
             if result.returncode == 0:
                 logger.info("Backtest completed successfully")
@@ -265,12 +244,17 @@ class AutoDailyTrader:
     async def execute_trading_session(self, session_type: str) -> bool:
         logger.info(f"Starting {session_type} trading session")
         try:
-            if not self.run_fresh_backtest():
-                logger.error(f"Skipping {session_type} session due to backtest failure")
-                return False
+            # A running live_signal_engine.py makes the pre-session backtest unnecessary
+            signals = load_live_signals(session_type)
+            if signals is not None:
+                logger.info(f"Using live signal engine for {session_type} signals")
+            else:
+                if not self.run_fresh_backtest():
+                    logger.error(f"Skipping {session_type} session due to backtest failure")
+                    return False
 
-            logger.info(f"Checking for {session_type} signals...")
-            signals = check_todays_signals(session_type)
+                logger.info(f"Checking for {session_type} signals...")
+                signals = check_todays_signals(session_type)
             if not signals:
                 logger.info(f"No {session_type} signals found for today")
                 return True
@@ -287,7 +271,7 @@ class AutoDailyTrader:
                     return True
                 # Idempotent order execution (per date+session+ticker+action)
                 today_str = self._market_now().strftime('%Y-%m-%d')
-                executed_keys = self._load_executed_orders()
+                executed_keys = self._load_executed_orders(today_str)
                 session_prefix = f"{today_str}|{session_type}"
                 filtered_orders = []
                 skipped = 0
@@ -302,31 +286,21 @@ class AutoDailyTrader:
                 successful_orders = 0
                 for i, (order, key) in enumerate(filtered_orders, 1):
                     logger.info(f"Processing order {i}/{len(filtered_orders)}: {order['ticker']} {order['action']}")
-                    if await self.manual_trader.place_order(order, not self.dry_run):
+                    ok = await self.manual_trader.place_order(order, not self.dry_run)
+                    if ok:
                         successful_orders += 1
                         executed_keys.add(key)
-                        self._save_executed_orders(executed_keys)
+                    log_event('order', ts=self._market_now().replace(tzinfo=None), trader='auto_daily', key=key, session_type=session_type,
+                              ticker=order['ticker'], action=order['action'], shares=order.get('shares'),
+                              ok=bool(ok), dry_run=self.dry_run)
                     if i < len(filtered_orders):
                         await asyncio.sleep(2)
                 logger.info(f"{session_type} session completed: {successful_orders}/{len(filtered_orders)} orders successful (duplicates skipped: {skipped})")
                 logger.info(f"{session_type} session completed: {successful_orders}/{len(orders)} orders successful")
-                session_summary = {
-                    'timestamp': self._market_now().isoformat(),
-                    'session_type': session_type,
-                    'signals_found': len(signals),
-                    'orders_executed': len(orders),
-                    'successful_orders': successful_orders,
-                    'dry_run': self.dry_run
-                }
-                log_file = f'trading_sessions_{self._market_now().strftime("%Y%m%d")}.json'
-                if os.path.exists(log_file):
-                    with open(log_file, 'r') as f:
-                        sessions = json.load(f)
-                else:
-                    sessions = []
-                sessions.append(session_summary)
-                with open(log_file, 'w') as f:
-                    json.dump(sessions, f, indent=2)
+                log_event('session', ts=self._market_now().replace(tzinfo=None), trader='auto_daily',
+                          session_type=session_type, signals_found=len(signals),
+                          orders_executed=len(orders), successful_orders=successful_orders,
+                          dry_run=self.dry_run)
                 return True
             finally:
                 if self.manual_trader.ib:
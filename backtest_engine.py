@@ -0,0 +1,322 @@
+"""Staged backtest engine shared by all backtest entry points.
+
+Every driver used to repeat load -> optimize -> signals -> simulate -> equity
+-> stats with small variations. The stages live here once:
+
+    read_stage      CSV (or given frame) with OHLC columns renamed
+    validate_stage  data_validation report; run_ticker skips tickers with errors
+    load_stage      clean OHLC frame (deduplicated, sorted), optional trade_years cut
+    optimize_stage  best (p, tw) per side (berechne_best_p_tw_long/short);
+                    optimize_pair_stage does both sides with one S/R pass per cell
+    signal_stage    support/resistance -> extended signals with Level Close;
+                    signal_pair_stage derives both sides from one event table
+    simulate_stage  compounding simulation of the extended signals
+    equity_stage    equity curve along df.index
+    stats_stage     stats_tools.stats summary
+
+run_ticker() chains them and returns one BacktestResult; run_backtest() does
+that for a ticker mapping. backtesting_core.run_full_backtest (runner
+fullbacktest), complete_comprehensive_backtest, summary_only_backtest,
+run_all_tickers_backtest and data_sync.run_full_backtest all call these, so
+caching, vectorization or parallelism added to a stage reaches every entry
+point. BacktestResult.to_dict() keeps the per-ticker dict layout the exports,
+performance_table and monte_carlo already consume.
+"""
+import contextlib
+import io
+import os
+
+import pandas as pd
+
+from config import DEFAULT_COMMISSION_RATE, MIN_COMMISSION, DATA_VALIDATION
+from data_validation import validate
+from signal_utils import (
+    calculate_support_resistance,
+    assign_long_signals_extended,
+    assign_short_signals_extended,
+    assign_signals_extended_both,
+    update_level_close_long,
+    update_level_close_short,
+)
+from simulation_utils import simulate_trades_compound_extended, compute_equity_curve
+from stats_tools import stats
+
+SIDES = ("long", "short")
+
+
+def price_column(cfg):
+    """Execution price column of a ticker ("Open" for trade_on=open)."""
+    return "Open" if cfg.get("trade_on", "Close").lower() == "open" else "Close"
+
+
+def read_stage(ticker, df=None, data_file=None):
+    """Raw frame of a ticker (data file unless given) with lower-case OHLC columns renamed; None without file."""
+    if df is None:
+        fn = data_file or f"{ticker}_data.csv"
+        if not os.path.exists(fn):
+            print(f"[FAIL] Data file not found: {fn}")
+            return None
+        df = pd.read_csv(fn, index_col=0, parse_dates=True)
+    df = df.rename(columns={"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"})
+    df.index = pd.to_datetime(df.index)
+    return df
+
+
+def validate_stage(ticker, df, cfg=None, verbose=True):
+    """data_validation report of a raw frame (cached per data fingerprint); prints errors."""
+    report = validate(df, ticker, price_column(cfg or {}))
+    if verbose and not report.ok:
+        print(f"[FAIL] {ticker}: data validation failed - {report.summary()}")
+    return report
+
+
+def window_stage(df, years=None):
+    """Rows of a raw frame inside the last `years` years (the window load_stage keeps), unsorted.
+
+    Validation runs on this window, so gaps or bad bars that load_stage trims
+    away do not skip a ticker; duplicates and order issues stay visible.
+    """
+    if not years or years <= 0 or df is None or df.empty:
+        return df
+    cutoff = df.index.max() - pd.Timedelta(days=int(years * 365))
+    return df[df.index >= cutoff]
+
+
+def load_stage(ticker, df=None, data_file=None, years=None):
+    """Clean daily frame for a ticker: lower-case columns renamed, deduplicated, sorted.
+
+    years: keep only the last `years` years (trade_years), None/0 keeps all.
+    """
+    df = read_stage(ticker, df, data_file)
+    if df is None:
+        return None
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    if years and years > 0 and not df.empty:
+        df = window_stage(df, years).copy()
+    return df
+
+
+def optimize_stage(df, cfg, direction, ticker="", verbose=False):
+    """Best (p, tw) for one side."""
+    from backtesting_core import berechne_best_p_tw_long, berechne_best_p_tw_short
+    optimize = berechne_best_p_tw_long if direction == "long" else berechne_best_p_tw_short
+    return optimize(df, cfg, verbose=verbose, ticker=ticker)
+
+
+def optimize_pair_stage(df, cfg, ticker="", verbose=False):
+    """Best (p, tw) for both sides from one S/R computation per grid cell."""
+    from backtesting_core import berechne_best_p_tw_both
+    return berechne_best_p_tw_both(df, cfg, verbose=verbose, ticker=ticker)
+
+
+def signal_pair_stage(df, cfg, p, tw, interval="1d"):
+    """Support/resistance and extended signals for both sides. Returns (support, resistance, ext_long, ext_short)."""
+    support, resistance = calculate_support_resistance(df, p, tw, price_col=price_column(cfg))
+    ext_long, ext_short = assign_signals_extended_both(support, resistance, df, tw, interval)
+    return support, resistance, ext_long, ext_short
+
+
+def signal_stage(df, cfg, p, tw, direction, interval="1d"):
+    """Support/resistance and extended signals for one side. Returns (support, resistance, ext)."""
+    support, resistance = calculate_support_resistance(df, p, tw, price_col=price_column(cfg))
+    if direction == "long":
+        ext = assign_long_signals_extended(support, resistance, df, tw, interval)
+        ext = update_level_close_long(ext, df)
+    else:
+        ext = assign_short_signals_extended(support, resistance, df, tw, interval)
+        ext = update_level_close_short(ext, df)
+    return support, resistance, ext
+
+
+def simulate_stage(ext, df, cfg, direction, last_price, last_date,
+                   commission_rate=DEFAULT_COMMISSION_RATE, min_commission=MIN_COMMISSION):
+    """Compounding trade simulation. Returns (final capital, TradeTable of matched trades)."""
+    return simulate_trades_compound_extended(
+        ext, df, cfg,
+        commission_rate, min_commission,
+        cfg.get("order_round_factor", 1),
+        artificial_close_price=last_price,
+        artificial_close_date=last_date,
+        direction=direction,
+        as_table=True,
+    )
+
+
+def equity_stage(df, trades, initial_capital, direction):
+    return compute_equity_curve(df, trades, initial_capital, long=(direction == "long"))
+
+
+def stats_stage(trades, label, initial_capital, final_capital, equity_curve, verbose=True):
+    """stats_tools.stats summary (printing suppressed unless verbose)."""
+    if verbose:
+        return stats(trades, label, initial_capital=initial_capital, final_capital=final_capital,
+                     equity_curve=equity_curve)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return stats(trades, label, initial_capital=initial_capital, final_capital=final_capital,
+                     equity_curve=equity_curve)
+
+
+class SideResult:
+    """Output of all stages for one side of one ticker."""
+
+    def __init__(self, direction, p, tw, support, resistance, extended, final_capital, trades,
+                 initial_capital, equity_curve, stats=None):
+        self.direction = direction
+        self.p = p
+        self.tw = tw
+        self.support = support
+        self.resistance = resistance
+        self.extended = extended
+        self.final_capital = final_capital
+        self.trades = trades
+        self.initial_capital = initial_capital
+        self.equity_curve = equity_curve
+        self.stats = stats or {}
+
+    @property
+    def return_pct(self):
+        if not self.initial_capital:
+            return 0.0
+        return (self.final_capital - self.initial_capital) / self.initial_capital * 100
+
+    def to_dict(self):
+        return {
+            "parameters": {"p": self.p, "tw": self.tw},
+            "extended_signals": len(self.extended),
+            "matched_trades": len(self.trades),
+            "final_capital": self.final_capital,
+            "initial_capital": self.initial_capital,
+            "equity_curve": self.equity_curve,
+            "trades": self.trades,
+            "stats": self.stats,
+            "support_series": self.support,
+            "resistance_series": self.resistance,
+            "extended_signals_data": self.extended.to_dict("records") if not self.extended.empty else [],
+        }
+
+
+class BacktestResult:
+    """Everything one ticker's backtest produced; sides holds SideResult per enabled side."""
+
+    def __init__(self, ticker, config, df, last_price, last_date):
+        self.ticker = ticker
+        self.config = config
+        self.df = df
+        self.last_price = last_price
+        self.last_date = last_date
+        self.validation = None
+        self.sides = {}
+
+    @property
+    def long(self):
+        return self.sides.get("long")
+
+    @property
+    def short(self):
+        return self.sides.get("short")
+
+    @property
+    def data_info(self):
+        return {
+            "rows": len(self.df),
+            "start_date": str(self.df.index[0].date()),
+            "end_date": str(self.df.index[-1].date()),
+            "last_price": self.last_price,
+        }
+
+    def buyhold(self):
+        """Buy & hold curve with the long (else short) starting capital."""
+        init = self.config.get("initialCapitalLong") or self.config.get("initialCapitalShort") or 1000
+        close = self.df["Close"]
+        return init * close / close.iloc[0]
+
+    def to_dict(self):
+        out = {"ticker": self.ticker, "config": self.config, "data_info": self.data_info}
+        for side, res in self.sides.items():
+            out[side] = res.to_dict()
+        return out
+
+
+def run_side(df, cfg, direction, last_price, last_date, ticker="", params=None,
+             optimize_verbose=False, verbose=True, signals=None):
+    """optimize -> signals -> simulate -> equity -> stats for one side.
+
+    signals: precomputed (support, resistance, ext) for params (see run_ticker).
+    """
+    if params:
+        p, tw = params
+    else:
+        p, tw = optimize_stage(df, cfg, direction, ticker, optimize_verbose)
+    if signals is None:
+        signals = signal_stage(df, cfg, p, tw, direction)
+    support, resistance, ext = signals
+    cap, trades = simulate_stage(ext, df, cfg, direction, last_price, last_date)
+    init = cfg.get("initialCapitalLong" if direction == "long" else "initialCapitalShort", 1000)
+    equity = equity_stage(df, trades, init, direction)
+    label = f"{ticker} {direction.capitalize()}"
+    summary = stats_stage(trades, label, init, cap, equity, verbose)
+    return SideResult(direction, p, tw, support, resistance, ext, cap, trades, init, equity, summary)
+
+
+def run_ticker(ticker, cfg, df=None, params=None, sides=SIDES, years=None, last_price_col=None,
+               optimize_verbose=False, verbose=True, validate=DATA_VALIDATION):
+    """Full backtest of one ticker. Returns a BacktestResult or None without (valid) data.
+
+    params: {"long": (p, tw), ...} skips optimization for the given sides.
+    last_price_col: column of the artificial close (default: the execution price column).
+    validate: run data_validation first and skip the ticker on errors.
+    """
+    df = read_stage(ticker, df)
+    if df is None or df.empty:
+        return None
+    report = validate_stage(ticker, window_stage(df, years), cfg) if validate else None
+    if report is not None and not report.ok:
+        return None
+    df = load_stage(ticker, df, years=years)
+    if df is None or df.empty:
+        return None
+    col = last_price_col or price_column(cfg)
+    try:
+        last_price = float(df[col].iloc[-1])
+    except (KeyError, TypeError, ValueError):
+        print(f"WARN Invalid last price for {ticker} in column {col}")
+        return None
+    result = BacktestResult(ticker, cfg, df, last_price, df.index[-1])
+    result.validation = report
+    active = [side for side in sides if cfg.get(side, False)]
+    chosen = {side: tuple(params[side]) for side in active if (params or {}).get(side)}
+    todo = [side for side in active if side not in chosen]
+    if len(todo) == 2:
+        chosen.update(optimize_pair_stage(df, cfg, ticker, optimize_verbose))
+    for side in todo:
+        if side not in chosen:
+            chosen[side] = optimize_stage(df, cfg, side, ticker, optimize_verbose)
+
+    # Gleiche (p, tw) auf beiden Seiten -> eine S/R- und Ereignistabelle
+    shared = {}
+    for side in active:
+        key = chosen[side]
+        if key not in shared:
+            shared[key] = signal_pair_stage(df, cfg, *key)
+        sup, res, ext_long, ext_short = shared[key]
+        result.sides[side] = run_side(
+            df, cfg, side, last_price, result.last_date, ticker, params=key,
+            verbose=verbose, signals=(sup, res, ext_long if side == "long" else ext_short),
+        )
+    return result
+
+
+def run_backtest(tickers=None, **kwargs):
+    """run_ticker for every ticker of a mapping (default: the universe). Returns {ticker: BacktestResult}."""
+    if tickers is None:
+        from tickers_config import tickers
+    out = {}
+    for ticker, cfg in tickers.items():
+        try:
+            res = run_ticker(ticker, cfg, **kwargs)
+        except Exception as e:
+            print(f"[FAIL] {ticker}: {e}")
+            continue
+        if res is not None:
+            out[ticker] = res
+    return out
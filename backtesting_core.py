@@ -1,10 +1,10 @@
 from datetime import datetime, date
 import os
 import pandas as pd
-import numpy as np
 from ib_insync import Stock
 
-from plot_utils import plot_combined_chart_and_equity
+from chart_stage import make_chart_job, render_charts
+from backtest_engine import load_stage, run_ticker
 from tickers_config import tickers
 from signal_utils import (
     calculate_support_resistance,
@@ -14,14 +14,20 @@ from signal_utils import (
     update_level_close_short,
     assign_long_signals,
     assign_short_signals,
-    compute_trend
+    assign_signals_extended_both
 )
 from simulation_utils import debug_equity_alignment
 from simulation_utils import simulate_trades_compound_extended, compute_equity_curve
-from stats_tools import stats
+from trade_table import as_frame
 from config import ORDER_ROUND_FACTOR, DEFAULT_COMMISSION_RATE, MIN_COMMISSION, ORDER_SIZE, backtesting_begin, backtesting_end, trade_years
+from config import MAX_WORKERS, OPT_PARALLEL
+from grid_search import configured_axes, full_grid, grid_axes, search
+from param_selection import select_params
 COMMISSION_RATE = DEFAULT_COMMISSION_RATE  # Use the config value
 from pandas.errors import EmptyDataError
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+from shared_data import publish_frame, attach_frame, release
 from ib_insync import util
 # backtesting_utils.py
 
@@ -407,70 +413,134 @@ def get_trade_day_offset(base_date, trade_window, df):
         return pd.NaT
     return future_dates[trade_window - 1]
 
-def berechne_best_p_tw_long(df, config, begin=0, end=20, verbose=True, ticker=""):
-    df_opt = get_backtesting_slice(df, begin, end)
-    results = []
+# (p, tw)-Raster der Optimierung je Seite (P_RANGE x TW_RANGE, FORCE_TW)
+OPT_GRIDS = {
+    "long": full_grid(*configured_axes()),
+    "short": full_grid(*configured_axes()),
+}
 
-    for p in range(3, 10):
-        for tw in range(1, 6):
-            price_col = "Open" if config.get("trade_on", "Close").lower() == "open" else "Close"
-            sup, res = calculate_support_resistance(df_opt, p, tw, price_col=price_col)
-            ext_df = assign_long_signals_extended(sup, res, df_opt, tw, "1d")
-            ext_df = update_level_close_long(ext_df, df_opt)
 
-            cap, _ = simulate_trades_compound_extended(
-                ext_df, df_opt, config,
-                commission_rate=COMMISSION_RATE,
-                min_commission=MIN_COMMISSION,
-                round_factor=config.get("order_round_factor", ORDER_ROUND_FACTOR),
-                artificial_close_price=None,
-                artificial_close_date=None,
-                direction="long"
-            )
-            results.append({"past_window": p, "trade_window": tw, "final_cap": cap})
+def _evaluate_cell(df_opt, config, p, tw, direction):
+    """One grid cell: S/R -> extended signals -> simulation. Returns the result row.
 
-    df_result = pd.DataFrame(results).sort_values("final_cap", ascending=False)
+    direction "both": one S/R and event table for the sides whose grid contains
+    (p, tw); the row then carries final_cap_long / final_cap_short.
+    """
+    price_col = "Open" if config.get("trade_on", "Close").lower() == "open" else "Close"
+    sup, res = calculate_support_resistance(df_opt, p, tw, price_col=price_col)
+    if direction == "both":
+        ext = dict(zip(("long", "short"), assign_signals_extended_both(sup, res, df_opt, tw, "1d")))
+        row = {"past_window": p, "trade_window": tw}
+        for side, grid in OPT_GRIDS.items():
+            if (p, tw) in grid:
+                row[f"final_cap_{side}"], trades = simulate_trades_compound_extended(
+                    ext[side], df_opt, config,
+                    commission_rate=COMMISSION_RATE,
+                    min_commission=MIN_COMMISSION,
+                    round_factor=config.get("order_round_factor", ORDER_ROUND_FACTOR),
+                    direction=side,
+                    as_table=True
+                )
+                row[f"trades_{side}"] = len(trades)
+        return row
+    if direction == "long":
+        ext_df = assign_long_signals_extended(sup, res, df_opt, tw, "1d")
+        ext_df = update_level_close_long(ext_df, df_opt)
+    else:
+        ext_df = assign_short_signals_extended(sup, res, df_opt, tw, "1d")
+        ext_df = update_level_close_short(ext_df, df_opt)
+
+    cap, trades = simulate_trades_compound_extended(
+        ext_df, df_opt, config,
+        commission_rate=COMMISSION_RATE,
+        min_commission=MIN_COMMISSION,
+        round_factor=config.get("order_round_factor", ORDER_ROUND_FACTOR),
+        artificial_close_price=None,
+        artificial_close_date=None,
+        direction=direction,
+        as_table=True
+    )
+    return {"past_window": p, "trade_window": tw, "final_cap": cap, "trades": len(trades)}
+
+
+def _evaluate_shared_cell(task):
+    """Worker: attach the shared price frame (zero-copy) and evaluate one cell."""
+    desc, config, p, tw, direction = task
+    return _evaluate_cell(attach_frame(desc), config, p, tw, direction)
+
+
+_opt_pool = None
+
+
+def _get_opt_pool():
+    global _opt_pool
+    if _opt_pool is None:
+        _opt_pool = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+        atexit.register(_opt_pool.shutdown, cancel_futures=True)
+    return _opt_pool
+
+
+def evaluate_grid(df_opt, config, grid, direction):
+    """Evaluate (p, tw) cells in grid order; in the worker pool when OPT_PARALLEL is set.
+
+    The price frame is published once to shared memory; tasks only carry the
+    small descriptor, so no DataFrame is pickled per cell.
+    """
+    if not OPT_PARALLEL or MAX_WORKERS <= 1 or len(grid) < 2:
+        return [_evaluate_cell(df_opt, config, p, tw, direction) for p, tw in grid]
+    desc = publish_frame(df_opt)
+    try:
+        tasks = [(desc, config, p, tw, direction) for p, tw in grid]
+        return list(_get_opt_pool().map(_evaluate_shared_cell, tasks, chunksize=max(1, len(tasks) // (4 * MAX_WORKERS))))
+    except Exception as e:
+        print(f"WARN parallel optimization failed ({e}), falling back to serial")
+        return [_evaluate_cell(df_opt, config, p, tw, direction) for p, tw in grid]
+    finally:
+        release(desc)
+
+def _pick_best(results, direction, verbose, ticker):
+    """Stable (p, tw) from the grid results (param_selection: smoothing, OPT_* filters)."""
+    # volle Rasterachsen: Nachbarn der Glättung sind echte Gitternachbarn, auch bei coarse-to-fine
+    p_axis, tw_axis = grid_axes(OPT_GRIDS[direction])
+    (p, tw), df_result = select_params(results, p_axis=p_axis, tw_axis=tw_axis)
     if verbose:
-        print(f"\n--- Long-Optimierung für {ticker} ---")
+        print(f"\n--- {direction.capitalize()}-Optimierung für {ticker} ---")
         print(df_result.head(5).to_string(index=False))
         print(f"🔍 Beste Kombination: {df_result.iloc[0].to_dict()}")
 
-    df_result.to_csv(f"opt_long_{ticker}.csv", index=False)
-    best = df_result.iloc[0]
-    return int(best["past_window"]), int(best["trade_window"])
+    df_result.to_csv(f"opt_{direction}_{ticker}.csv", index=False)
+    return p, tw
 
 
-def berechne_best_p_tw_short(df, config, begin=0, end=20, verbose=True, ticker=""):
+def berechne_best_p_tw_long(df, config, begin=0, end=20, verbose=True, ticker=""):
     df_opt = get_backtesting_slice(df, begin, end)
-    results = []
+    results = search(lambda cells: evaluate_grid(df_opt, config, cells, "long"), OPT_GRIDS["long"])
+    return _pick_best(results, "long", verbose, ticker)
 
-    for p in range(3, 10):
-        for tw in range(1, 4):
-            price_col = "Open" if config.get("trade_on", "Close").lower() == "open" else "Close"
-            sup, res = calculate_support_resistance(df_opt, p, tw, price_col=price_col)
-            ext_df = assign_short_signals_extended(sup, res, df_opt, tw, "1d")
-            ext_df = update_level_close_short(ext_df, df_opt)
 
-            cap, _ = simulate_trades_compound_extended(
-                ext_df, df_opt, config,
-                commission_rate=COMMISSION_RATE,
-                min_commission=MIN_COMMISSION,
-                round_factor=config.get("order_round_factor", ORDER_ROUND_FACTOR),
-                artificial_close_price=None,
-                artificial_close_date=None,
-                direction="short"
-            )
-            results.append({"past_window": p, "trade_window": tw, "final_cap": cap})
+def berechne_best_p_tw_short(df, config, begin=0, end=20, verbose=True, ticker=""):
+    df_opt = get_backtesting_slice(df, begin, end)
+    results = search(lambda cells: evaluate_grid(df_opt, config, cells, "short"), OPT_GRIDS["short"])
+    return _pick_best(results, "short", verbose, ticker)
 
-    df_result = pd.DataFrame(results).sort_values("final_cap", ascending=False)
-    if verbose:
-        print(f"\n--- Short-Optimierung für {ticker} ---")
-        print(df_result.head(5).to_string(index=False))
-        print(f"🔍 Beste Kombination: {df_result.iloc[0].to_dict()}")
 
-    df_result.to_csv(f"opt_short_{ticker}.csv", index=False)
-    best = df_result.iloc[0]
-    return int(best["past_window"]), int(best["trade_window"])
+def berechne_best_p_tw_both(df, config, begin=0, end=20, verbose=True, ticker=""):
+    """Long and short optimization over the union grid with one S/R computation per (p, tw).
+
+    Returns {"long": (p, tw), "short": (p, tw)}, identical to the two single-side calls.
+    """
+    df_opt = get_backtesting_slice(df, begin, end)
+    grid = sorted(set(OPT_GRIDS["long"]) | set(OPT_GRIDS["short"]))
+    rows = search(lambda cells: evaluate_grid(df_opt, config, cells, "both"), grid,
+                  keys=("final_cap_long", "final_cap_short"))
+    best = {}
+    for side in ("long", "short"):
+        key = f"final_cap_{side}"
+        results = [{"past_window": r["past_window"], "trade_window": r["trade_window"], "final_cap": r[key],
+                    "trades": r[f"trades_{side}"]}
+                   for r in rows if key in r]
+        best[side] = _pick_best(results, side, verbose, ticker)
+    return best
 
 def get_last_price(df: pd.DataFrame, cfg: dict, ticker: str) -> float | None:
     price_col = "Open" if cfg.get("trade_on", "close").lower() == "open" else "Close"
@@ -486,181 +556,97 @@ def get_last_price(df: pd.DataFrame, cfg: dict, ticker: str) -> float | None:
 
 
 def run_full_backtest(ib):
+    """Update data for every ticker and backtest it with backtest_engine. Returns {ticker: result dict}."""
     show_chart = True
+    chart_jobs = []
+    results = {}
 
     for ticker, cfg in tickers.items():
         print(f"\n=== Backtest für {ticker} ===")
 
-        # 1) Daten laden
+        # 1) Tagesdaten updaten und einlesen
         fn = f"{ticker}_data.csv"
         contract = Stock(cfg["symbol"], "SMART", "USD")
-        # 1) Tagesdaten updaten und einlesen
         df = update_historical_data_csv(ib, contract, fn)
-        df.index = pd.to_datetime(df.index)                # einheitliche Zeitstempel
-        df = df[~df.index.duplicated(keep="last")]         # doppelte entfernen
-
-        df.rename(columns={"open":"Open","high":"High","low":"Low","close":"Close"}, inplace=True)
-        df.sort_index(inplace=True)
         # Apply trade_years restriction ONLY (percentage slice reserved for optimization routines)
-        if trade_years and trade_years > 0 and not df.empty:
-            cutoff = df.index.max() - pd.Timedelta(days=int(trade_years * 365))
-            df_recent = df[df.index >= cutoff].copy()
-            df_bt = df_recent  # explicit alias for simulation backtest dataset
-            print(f"{ticker}: df_bt simulation slice created (trade_years={trade_years}) -> {df_bt.index[0].date()} to {df_bt.index[-1].date()} ({len(df_bt)} rows)")
+        df = load_stage(ticker, df, years=trade_years)
+        if df is None or df.empty:
+            print(f"{ticker}: keine Daten - skipping backtest.")
+            continue
+        if trade_years and trade_years > 0:
+            print(f"{ticker}: df_bt simulation slice created (trade_years={trade_years}) -> {df.index[0].date()} to {df.index[-1].date()} ({len(df)} rows)")
             print(f"{ticker}: NOTE optimization routines will internally apply percentage window {backtesting_begin}% - {backtesting_end}% on this df_bt")
-            df = df_bt
-    # Price fetch & validation
+
+        # Price fetch & validation
         last_price = get_last_price(df, cfg, ticker)
         if last_price is None:
             print(f"{ticker}: last price not available - skipping backtest.")
             continue
-
-        # Datum der letzten Zeile (brauchst du später)
-        last_date = df.index[-1]
-        price_col = "Open" if cfg.get("trade_on", "close").lower() == "open" else "Close"
-
-        # Hole den letzten Wert aus der Spalte
-        val = df[price_col].iloc[-1]
-
-    # Try converting to float if valid
-        try:
-            last_price = float(val)
-        except (TypeError, ValueError):
-            print(f"WARN Invalid value for {ticker} in column {price_col}: '{val}'")
-            continue  # Ticker überspringen
-
-        # ENDLESS LOOP PROTECTION: check for too many consecutive missing price days
-        max_missing_days = 10
-        missing_days = 0
-        for idx, date in enumerate(df.index):
-            price = df.at[date, price_col] if date in df.index else None
-            if price is None or np.isnan(price):
-                print(f"{ticker}: Keine Preisdaten für {date.strftime('%Y-%m-%d')}")
-                missing_days += 1
-                if missing_days >= max_missing_days:
-                    print(f"\nAborting backtest for {ticker}: {missing_days} consecutive days without price data.")
-                    break
-                continue
-            else:
-                missing_days = 0
-            # You can place any per-day logic here if needed (e.g. signal generation)
-
-        # 2) Initialisieren (verhindert UnboundLocalError)
-        ext_long, ext_short = pd.DataFrame(), pd.DataFrame()
-        trades_long, trades_short = [], []
-        sup_long = res_long = pd.Series(dtype=float)
-        sup_short = res_short = pd.Series(dtype=float)
-
-        # 3) Long-Optimierung & Simulation
-        if cfg.get("long", False):
-            p_long, tw_long = berechne_best_p_tw_long(df, cfg, verbose=True, ticker=ticker)
-            price_col = "Open" if cfg.get("trade_on", "Close").lower() == "open" else "Close"
-            sup_long, res_long = calculate_support_resistance(df, p_long, tw_long, price_col=price_col)
-
-            ext_long = assign_long_signals_extended(sup_long, res_long, df, tw_long, "1d")
-            ext_long = update_level_close_long(ext_long, df)
-
-            # ─── DEBUG EXTENDED LONG SIGNALS
+        # 2) Datenprüfung (NaN-Läufe, Lücken, ...), Optimierung, Signale, Simulation, Equity & Stats (backtest_engine)
+        bt = run_ticker(ticker, cfg, df=df, optimize_verbose=True)
+        if bt is None:
+            print(f"{ticker}: skipping backtest (no valid data).")
+            continue
+        results[ticker] = bt.to_dict()
+        long_res, short_res = bt.long, bt.short
+        ext_long = long_res.extended if long_res else pd.DataFrame()
+        ext_short = short_res.extended if short_res else pd.DataFrame()
+        trades_long = long_res.trades if long_res else []
+        trades_short = short_res.trades if short_res else []
+        cap_long = long_res.final_capital if long_res else 0
+        cap_short = short_res.final_capital if short_res else 0
+
+        # ─── DEBUG EXTENDED SIGNALS / MATCHED TRADES
+        if long_res:
             print(f"\n🔍 EXT_LONG for {ticker} ({len(ext_long)} Rows):")
             print(ext_long)
-
-            cap_long, trades_long = simulate_trades_compound_extended(
-                ext_long, df, cfg,
-                COMMISSION_RATE, MIN_COMMISSION,
-                cfg.get("order_round_factor",1),
-                artificial_close_price=last_price,
-                artificial_close_date=last_date,
-                direction="long"
-            )
-
-            # ─── DEBUG MATCHED LONG TRADES ─────────────────────────────────────────
             if trades_long:
-                df_trades_long = pd.DataFrame(trades_long)
-                print(f"\n🗒️ MATCHED TRADES_LONG ({len(df_trades_long)})")
-                print(df_trades_long.to_string(index=False))
+                print(f"\n🗒️ MATCHED TRADES_LONG ({len(trades_long)})")
+                print(as_frame(trades_long).to_string(index=False))
             else:
                 print("\n🗒️ MATCHED TRADES_LONG: Keine Trades")
-
-        else:
-            cap_long, trades_long = 0, []
-
-        # 4) Short-Optimierung & Simulation
-        if cfg.get("short", False):
-            p_short, tw_short = berechne_best_p_tw_short(df, cfg, verbose=True, ticker=ticker)
-            price_col = "Open" if cfg.get("trade_on", "Close").lower() == "open" else "Close"
-            sup_short, res_short = calculate_support_resistance(df, p_short, tw_short, price_col=price_col)
-
-            ext_short = assign_short_signals_extended(sup_short, res_short, df, tw_short, "1d")
-            ext_short = update_level_close_short(ext_short, df)
-
+        if short_res:
             print(f"\n🔍 EXT_SHORT for {ticker}, cols={ext_short.columns.tolist()}")
             if {"Short Date detected","Short Action"}.issubset(ext_short.columns):
                 print(ext_short[["Short Date detected","Short Action"]].dropna().head(5))
             else:
                 print("EXT_SHORT missing columns: Short Date detected/Short Action")
-
-            cap_short, trades_short = simulate_trades_compound_extended(
-                ext_short, df, cfg,
-                COMMISSION_RATE, MIN_COMMISSION,
-                cfg.get("order_round_factor",1),
-                artificial_close_price=last_price,
-                artificial_close_date=last_date,
-                direction="short"
-            )
             if trades_short:
-                df_trades_short = pd.DataFrame(trades_short)
-                print(f"\n🗒️ MATCHED TRADES_SHORT ({len(df_trades_short)})")
-                print(df_trades_short.to_string(index=False))
+                print(f"\n🗒️ MATCHED TRADES_SHORT ({len(trades_short)})")
+                print(as_frame(trades_short).to_string(index=False))
             else:
                 print("\n🗒️ MATCHED TRADES_SHORT: Keine Trades")
 
-        else:
-            cap_short, trades_short = 0, []
-
-        # 5) Stats ausgeben
         print(f"{ticker} Final Capital: Long={cap_long:.2f}  Short={cap_short:.2f}")
-        # Build equity curves first so we can supply to stats
-        eq_long  = compute_equity_curve(df, trades_long,  cfg["initialCapitalLong"],  long=True)
-        eq_short = compute_equity_curve(df, trades_short, cfg["initialCapitalShort"], long=False)
-        stats(
-            trades_long,
-            f"{ticker} Long",
-            initial_capital=cfg.get("initialCapitalLong"),
-            final_capital=cap_long,
-            equity_curve=eq_long
-        )
-        stats(
-            trades_short,
-            f"{ticker} Short",
-            initial_capital=cfg.get("initialCapitalShort"),
-            final_capital=cap_short,
-            equity_curve=eq_short
-        )
-        # 6) Equity-Kurven bauen & debug-print (already built above)
+
+        # 3) Equity-Kurven (Seiten ohne Strategie bleiben flach auf dem Startkapital)
+        eq_long = long_res.equity_curve if long_res else compute_equity_curve(df, [], cfg["initialCapitalLong"], long=True)
+        eq_short = short_res.equity_curve if short_res else compute_equity_curve(df, [], cfg["initialCapitalShort"], long=False)
         eq_combined = [l+s for l,s in zip(eq_long, eq_short)]
         buyhold     = [cfg["initialCapitalLong"] * (p/df["Close"].iloc[0]) for p in df["Close"]]
 
-        # 7) Plot
+        # 4) Chart-Job sammeln (gerendert wird nach dem Backtest, siehe chart_stage)
         if show_chart:
-            try:
-                trend = compute_trend(df, 20)
-                plot_combined_chart_and_equity(
-                    df, ext_long, ext_short,
-                    sup_long, res_long, trend,
-                    eq_long, eq_short, eq_combined, buyhold,
-                    ticker
-                )
-            except Exception:
-                import traceback
-                print(f"WARN Plot for {ticker} failed:")
-                traceback.print_exc()
-
-        # 8) CSV speichern
+            sup_long = long_res.support if long_res else pd.Series(dtype=float)
+            res_long = long_res.resistance if long_res else pd.Series(dtype=float)
+            chart_jobs.append(make_chart_job(
+                ticker, df, ext_long, ext_short,
+                sup_long, res_long,
+                eq_long, eq_short, eq_combined, buyhold,
+                trades_long=trades_long, trades_short=trades_short,
+            ))
+
+        # 5) CSV speichern
         pd.DataFrame(trades_long).to_csv(f"trades_long_{ticker}.csv", index=False)
         pd.DataFrame(trades_short).to_csv(f"trades_short_{ticker}.csv", index=False)
         ext_long.to_csv(f"extended_long_{ticker}.csv", index=False)
         ext_short.to_csv(f"extended_short_{ticker}.csv", index=False)
 
+    # 6) Charts für alle Ticker im Worker-Pool, unveränderte werden übersprungen
+    if show_chart and chart_jobs:
+        render_charts(chart_jobs)
+    return results
+
 def test_trading_for_date(ib, date_str, report_dir="reports"):
     import pandas as pd
     from pandas.errors import EmptyDataError
@@ -0,0 +1,215 @@
+"""Chart stage: render ticker charts after the backtest, in a worker pool.
+
+The backtest drivers no longer plot inline. They collect one chart job per
+ticker (see make_chart_job) and hand the list to render_charts() once all
+results are computed and saved. Each job carries a fingerprint of its inputs
+(price data, trades, parameters, chart settings); tickers whose fingerprint
+matches the last rendered chart in CHART_MANIFEST_FILE are skipped.
+
+For the traders the stage can be detached (launch_detached): the jobs are
+pickled to a temp file next to CHART_JOBS_FILE (one per launch, removed by the
+child) and rendered by a separate ``python chart_stage.py`` process, so the
+backtest subprocess returns right after writing its results. Charts are always
+written without opening a browser.
+"""
+import hashlib
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from trade_table import as_records
+from config import (
+    CHART_MANIFEST_FILE, CHART_JOBS_FILE, CHART_WORKERS,
+    CHART_RENDER_MODE, CHART_MAX_POINTS, CHART_DOWNSAMPLE,
+)
+
+
+def _digest(obj) -> str:
+    """Stable digest of a DataFrame/Series (or anything JSON-serializable)."""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        if obj.empty:
+            return ""
+        try:
+            return hashlib.sha1(pd.util.hash_pandas_object(obj, index=True).values.tobytes()).hexdigest()
+        except TypeError:
+            # unhashable cells (e.g. dicts in object columns)
+            return hashlib.sha1(obj.to_json(date_format="iso", default_handler=str).encode()).hexdigest()
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def fingerprint(df, trades_long=None, trades_short=None, params=None, *frames) -> str:
+    """Hash of everything a chart depends on (prices, trades, parameters, chart settings)."""
+    settings = [CHART_RENDER_MODE, CHART_MAX_POINTS, CHART_DOWNSAMPLE]
+    parts = [_digest(df), _digest([as_records(trades_long), as_records(trades_short), params or {}, settings])]
+    parts += [_digest(f) for f in frames]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def make_chart_job(ticker, df, ext_long, ext_short, support, resistance,
+                   eq_long, eq_short, eq_combined, buyhold,
+                   trades_long=None, trades_short=None, params=None):
+    """Bundle the plot inputs of one ticker (picklable, no plotting done here)."""
+    df = df[["Open", "High", "Low", "Close"]]
+    return {
+        "ticker": ticker,
+        "fingerprint": fingerprint(df, trades_long, trades_short, params,
+                                   ext_long, ext_short, support, resistance),
+        "df": df,
+        "ext_long": ext_long, "ext_short": ext_short,
+        "support": support, "resistance": resistance,
+        "eq_long": eq_long, "eq_short": eq_short,
+        "eq_combined": eq_combined, "buyhold": buyhold,
+    }
+
+
+def _chart_file(ticker):
+    return f"{ticker}_chart.html"
+
+
+def _render_job(job):
+    """Worker: render one chart. Returns (ticker, filename)."""
+    from plot_utils import plot_combined_chart_and_equity
+    from signal_utils import compute_trend
+
+    df = job["df"]
+    trend = compute_trend(df, 20) if not df.empty else pd.Series(dtype=float)
+    fn = plot_combined_chart_and_equity(
+        df, job["ext_long"], job["ext_short"],
+        job["support"], job["resistance"], trend,
+        job["eq_long"], job["eq_short"], job["eq_combined"], job["buyhold"],
+        job["ticker"], filename=_chart_file(job["ticker"]), auto_open=False,
+    )
+    return job["ticker"], fn
+
+
+# ── manifest ─────────────────────────────────────────────────────────────────
+def load_manifest(path=CHART_MANIFEST_FILE):
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception as e:
+        print(f"WARN chart manifest {path} unreadable, re-rendering all charts: {e}")
+        return {}
+
+
+def save_manifest(manifest, path=CHART_MANIFEST_FILE):
+    if not path:
+        return
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"WARN could not persist chart manifest: {e}")
+
+
+def pending_jobs(jobs, manifest):
+    """Jobs whose chart is missing or whose inputs changed since the last render."""
+    out = []
+    for job in jobs:
+        entry = manifest.get(job["ticker"]) or {}
+        if entry.get("fingerprint") == job["fingerprint"] and os.path.exists(entry.get("file", "")):
+            continue
+        out.append(job)
+    return out
+
+
+# ── stage ────────────────────────────────────────────────────────────────────
+def render_charts(jobs, max_workers=CHART_WORKERS, force=False, manifest_file=CHART_MANIFEST_FILE):
+    """Render all changed charts in a process pool. Returns {ticker: filename}."""
+    manifest = load_manifest(manifest_file)
+    todo = list(jobs) if force else pending_jobs(jobs, manifest)
+    skipped = len(jobs) - len(todo)
+    print(f"📈 Chart stage: {len(todo)} to render, {skipped} unchanged")
+    if not todo:
+        return {}
+
+    fingerprints = {job["ticker"]: job["fingerprint"] for job in todo}
+    rendered = {}
+
+    def done(ticker, fn):
+        rendered[ticker] = fn
+        manifest[ticker] = {"fingerprint": fingerprints[ticker], "file": fn, "rendered_at": time.time()}
+        save_manifest(manifest, manifest_file)
+
+    t0 = time.time()
+    if max_workers is None or max_workers <= 1 or len(todo) == 1:
+        for job in todo:
+            try:
+                done(*_render_job(job))
+            except Exception:
+                print(f"WARN Plot for {job['ticker']} failed:")
+                traceback.print_exc()
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(todo))) as pool:
+            futures = {pool.submit(_render_job, job): job["ticker"] for job in todo}
+            for fut in as_completed(futures):
+                try:
+                    done(*fut.result())
+                except Exception:
+                    print(f"WARN Plot for {futures[fut]} failed:")
+                    traceback.print_exc()
+    print(f"📈 Chart stage finished: {len(rendered)}/{len(todo)} charts in {time.time() - t0:.1f}s")
+    return rendered
+
+
+def launch_detached(jobs, jobs_file=CHART_JOBS_FILE, manifest_file=CHART_MANIFEST_FILE):
+    """Render in a separate process and return immediately.
+
+    Only changed jobs are written, to a unique file derived from jobs_file so
+    that overlapping launches do not overwrite each other's jobs; returns the
+    Popen handle or None when there is nothing to render.
+    """
+    todo = pending_jobs(jobs, load_manifest(manifest_file))
+    if not todo:
+        print(f"📈 Chart stage: all {len(jobs)} charts unchanged")
+        return None
+    stem, ext = os.path.splitext(os.path.basename(jobs_file))
+    fd, jobs_file = tempfile.mkstemp(prefix=f"{stem}_", suffix=ext or ".pkl",
+                                     dir=os.path.dirname(os.path.abspath(jobs_file)))
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(todo, f, protocol=pickle.HIGHEST_PROTOCOL)
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    script = os.path.abspath(__file__)
+    proc = subprocess.Popen(
+        [sys.executable, script, "--jobs", jobs_file, "--manifest", manifest_file],
+        cwd=os.getcwd(), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        **kwargs,
+    )
+    print(f"📈 Chart stage detached (pid {proc.pid}): {len(todo)} charts")
+    return proc
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render pending ticker charts")
+    parser.add_argument("--jobs", default=CHART_JOBS_FILE, help="Pickled chart jobs")
+    parser.add_argument("--manifest", default=CHART_MANIFEST_FILE)
+    parser.add_argument("--workers", type=int, default=CHART_WORKERS)
+    parser.add_argument("--force", action="store_true", help="Render even if unchanged")
+    args = parser.parse_args()
+
+    with open(args.jobs, "rb") as f:
+        chart_jobs = pickle.load(f)
+    render_charts(chart_jobs, max_workers=args.workers, force=args.force, manifest_file=args.manifest)
+    try:
+        os.remove(args.jobs)
+    except OSError:
+        pass
@@ -15,6 +15,8 @@ import argparse
 from functools import lru_cache
 from tickers_config import tickers
 from config import *
+from results_store import load_results, store_of
+from results_export import load_results_file
 
 def convert_ticker_config():
     """Convert the existing ticker config to our expected format"""
@@ -41,15 +43,11 @@ TICKERS_CONFIG = convert_ticker_config()
 
 def load_backtest_results():
     """Load the comprehensive backtest results"""
-    results_file = 'complete_comprehensive_backtest_results.json'
-    
-    if not os.path.exists(results_file):
+    results = load_results()
+    if results is None:
         print("[FAIL] No backtest results found!")
         print("   Run: python complete_comprehensive_backtest.py")
-        return None
-    
-    with open(results_file, 'r') as f:
-        return json.load(f)
+    return results
 
 def load_runner_trades_today(trade_on_filter=None):
     """Load today's trades from trades_by_day.json (runner.py output) and convert to signal format."""
@@ -124,14 +122,12 @@ def load_runner_parameters():
     """Load per-symbol strategy parameters (p, tw) from runner_fullbacktest_results.json.
     Returns mapping like { 'AAPL': { 'LONG': {'p':3,'tw':2}, 'SHORT': {'p':4,'tw':1} } }
     """
-    path = 'runner_fullbacktest_results.json'
-    if not os.path.exists(path):
-        return {}
     try:
-        with open(path, 'r') as f:
-            data = json.load(f)
+        data = load_results_file('runner_fullbacktest_results.json')  # .json or .ndjson export
     except Exception:
         return {}
+    if data is None:
+        return {}
     out = {}
     for symbol, sym_data in data.items():
         sym_map = {}
@@ -159,6 +155,7 @@ def check_todays_signals(trade_on_filter=None):
     
     # If we have comprehensive backtest results, prefer them
     if backtest_data:
+        store = store_of(backtest_data)
         for ticker, ticker_data in backtest_data.items():
             if ticker not in TICKERS_CONFIG:
                 continue
@@ -185,8 +182,10 @@ def check_todays_signals(trade_on_filter=None):
                     
                 extended_signals = ticker_data[strategy_key].get('extended_signals', [])
                 
-                # Look for today's signals
-                for signal in extended_signals:
+                # Look for today's signals (date index of the results store)
+                todays = store.signals_for(ticker, strategy.lower(), today_str, today_str)
+                for n in todays['n']:
+                    signal = extended_signals[n]
                     if signal.get('date') == today_str:
                         ticker_signals.append({
                             'ticker': ticker,
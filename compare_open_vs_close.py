@@ -1,38 +1,50 @@
 #!/usr/bin/env python3
-"""Compare final capital when executing long strategy on Open vs Close for each ticker.
+"""Compare final capital of one strategy under different execution prices.
 
 For every ticker in tickers_config:
  1. Load existing <TICKER>_data.csv (no IB connection required).
- 2. For trade_on in ["Open", "Close"]:
-    - Copy ticker config overriding trade_on.
-    - Optimize (p, tw) with berechne_best_p_tw_long for that mode.
-    - Recompute extended long signals using those parameters.
-    - Simulate trades to obtain final capital.
- 3. Store results in a summary DataFrame and write compare_open_vs_close.csv.
+ 2. For every (p, tw) of the optimization grid compute S/R levels and extended
+    signals ONCE per level basis. By default the Open variant uses levels on
+    Open (like the former trade_on='Open' run) and all other variants levels
+    on Close; --basis Open|Close forces one basis for every variant.
+ 3. Simulate those signals for all execution-price variants of a basis at once:
+      Open     - open of the signal day
+      Close    - close of the signal day
+      VWAP     - typical price (High+Low+Close)/3 as a VWAP proxy
+      NextOpen - open of the following day (last bar: its close)
+ 4. Pick (p, tw) per variant on the backtesting slice like the optimizer does
+    (grid_search.search, param_selection.select_params), then simulate the
+    chosen parameters on the full data and write compare_open_vs_close.csv.
 
 Outputs:
-  compare_open_vs_close.csv with columns:
-    ticker, initial_capital, final_cap_open, p_open, tw_open, trades_open,
-    final_cap_close, p_close, tw_close, trades_close, diff_open_minus_close, pct_diff
+  compare_open_vs_close.csv with columns per variant v:
+    final_cap_<v>, p_<v>, tw_<v>, trades_<v>, basis_<v>
+  plus ticker, initial_capital and, when Open and Close are compared,
+  diff_open_minus_close, pct_diff.
 
 Notes:
- - Focuses on LONG side only ("buy" request context).
- - Each mode re-optimizes its own parameters so comparison reflects achievable performance
-   under that execution assumption. If you want a fair execution-only delta, fix p/tw to one mode.
+ - Focuses on LONG side by default (--side short for the short strategy).
+ - Signals do not depend on the execution variant, so the whole comparison
+   costs about one optimization per level basis. Each variant still picks
+   its own (p, tw).
+
+    python compare_open_vs_close.py --variants Open Close VWAP NextOpen
 """
 import os
+import numpy as np
 import pandas as pd
-from copy import deepcopy
 
 from tickers_config import tickers
 from signal_utils import (
     calculate_support_resistance,
     assign_long_signals_extended,
-    update_level_close_long,
+    assign_short_signals_extended,
 )
-from backtesting_core import berechne_best_p_tw_long
-from simulation_utils import simulate_trades_compound_extended
+from backtesting_core import get_backtesting_slice, OPT_GRIDS
+from grid_search import grid_axes, search
+from param_selection import select_params
 from config import DEFAULT_COMMISSION_RATE, MIN_COMMISSION, ORDER_ROUND_FACTOR, backtesting_begin, backtesting_end
+from price_lookup import positions_at_or_after
 
 RESULT_CSV = "compare_open_vs_close.csv"
 
@@ -64,67 +76,154 @@ def load_price_df(ticker: str) -> pd.DataFrame | None:
         print(f"ERROR reading {fn}: {e}")
         return None
 
-def run_mode(df: pd.DataFrame, base_cfg: dict, trade_on: str, ticker: str):
-    cfg = deepcopy(base_cfg)
-    cfg['trade_on'] = trade_on
-    # Optimize p, tw for this mode
-    p_opt, tw_opt = berechne_best_p_tw_long(df, cfg, backtesting_begin, backtesting_end, verbose=False, ticker=ticker)
-    price_col = 'Open' if trade_on.lower() == 'open' else 'Close'
-    support, resistance = calculate_support_resistance(df, p_opt, tw_opt, price_col=price_col)
-    ext = assign_long_signals_extended(support, resistance, df, tw_opt, '1d', price_col=price_col)
-    ext = update_level_close_long(ext, df)
-    final_cap, trades = simulate_trades_compound_extended(
-        ext, df, cfg,
-        commission_rate=DEFAULT_COMMISSION_RATE,
-        min_commission=MIN_COMMISSION,
-        round_factor=cfg.get('order_round_factor', ORDER_ROUND_FACTOR),
-        artificial_close_price=None,
-        artificial_close_date=None,
-        direction='long'
-    )
-    return {
-        'p': p_opt,
-        'tw': tw_opt,
-        'final_cap': final_cap,
-        'trades': len(trades)
-    }
-
-def main():
+VARIANTS = ("Open", "Close", "VWAP", "NextOpen")
+
+
+def execution_prices(df: pd.DataFrame, variants=("Open", "Close")) -> np.ndarray:
+    """Price matrix (variants x bars) of the execution variants."""
+    rows = []
+    for v in variants:
+        if v == "Open":
+            rows.append(df["Open"].to_numpy(float))
+        elif v == "Close":
+            rows.append(df["Close"].to_numpy(float))
+        elif v == "VWAP":
+            rows.append(((df["High"] + df["Low"] + df["Close"]) / 3).to_numpy(float))
+        elif v == "NextOpen":
+            nxt = df["Open"].shift(-1)
+            rows.append(nxt.fillna(df["Close"]).to_numpy(float))
+        else:
+            raise ValueError(f"Unknown execution variant {v!r}, expected one of {VARIANTS}")
+    return np.vstack(rows)
+
+
+def level_basis(variant: str, basis=None) -> str:
+    """Price column of the S/R levels for an execution variant (Open -> Open, sonst Close)."""
+    if basis is not None:
+        return basis
+    return "Open" if variant == "Open" else "Close"
+
+
+def signal_events(df: pd.DataFrame, p: int, tw: int, direction="long", basis="Close"):
+    """Entry/exit events of the extended signals as (bar positions, is_entry), sorted by date."""
+    support, resistance = calculate_support_resistance(df, p, tw, price_col=basis)
+    if direction == "long":
+        ext = assign_long_signals_extended(support, resistance, df, tw, '1d')
+        date_col, action_col, entry, exit_ = "Long Date detected", "Long Action", "buy", "sell"
+    else:
+        ext = assign_short_signals_extended(support, resistance, df, tw, '1d')
+        date_col, action_col, entry, exit_ = "Short Date detected", "Short Action", "short", "cover"
+    if ext.empty or date_col not in ext.columns:
+        return np.array([], dtype=np.int64), np.array([], dtype=bool)
+    ext = ext.sort_values(by=date_col)  # same order as simulate_trades_compound_extended
+    ext = ext[ext[date_col].notna() & ext[action_col].isin([entry, exit_])]
+    # Ausführung am Signaltag bzw. am nächsten Handelstag (wie get_trade_price)
+    pos, keep = positions_at_or_after(df.index, ext[date_col])
+    return pos[keep], (ext[action_col].to_numpy() == entry)[keep]
+
+
+def simulate_variants(events, prices: np.ndarray, cfg: dict, direction="long",
+                      commission_rate=DEFAULT_COMMISSION_RATE, min_commission=MIN_COMMISSION):
+    """simulate_trades_compound_extended for all price rows at once. Returns (final caps, trades)."""
+    positions, is_entry = events
+    rf = cfg.get('order_round_factor', ORDER_ROUND_FACTOR)
+    cap = np.full(prices.shape[0], float(cfg['initialCapitalLong' if direction == 'long' else 'initialCapitalShort']))
+    sign = 1.0 if direction == "long" else -1.0
+    active, trades = False, 0
+    entry_price = shares = None
+    for i, entry in zip(positions, is_entry):
+        price = prices[:, i]
+        if entry and not active:
+            shares = np.maximum((np.floor(cap / price) // rf) * rf, rf)
+            entry_price, active = price, True
+        elif not entry and active:
+            profit = sign * (price - entry_price) * shares
+            fee = np.maximum(min_commission, shares * (entry_price + price) * commission_rate)
+            cap = cap + profit - fee
+            active, trades = False, trades + 1
+    return cap, trades
+
+
+def compare_variants(df: pd.DataFrame, cfg: dict, variants=("Open", "Close"), direction="long",
+                     basis=None, begin=backtesting_begin, end=backtesting_end):
+    """Best (p, tw) and final capital per execution variant from one signal pass per (p, tw) and level basis.
+
+    basis=None: Open variant on Open levels, all others on Close levels (see level_basis).
+    """
+    groups = {}
+    for v in variants:
+        groups.setdefault(level_basis(v, basis), []).append(v)
+    p_axis, tw_axis = grid_axes(OPT_GRIDS[direction])
+    df_opt = get_backtesting_slice(df, begin, end)
+    out = {}
+    for b, group in groups.items():
+        prices_opt = execution_prices(df_opt, group)
+
+        def evaluate(cells):
+            rows = []
+            for p, tw in cells:
+                caps, n_trades = simulate_variants(signal_events(df_opt, p, tw, direction, b), prices_opt, cfg, direction)
+                row = {"past_window": p, "trade_window": tw, "trades": n_trades}
+                row.update({f"final_cap_{v}": float(c) for v, c in zip(group, caps)})
+                rows.append(row)
+            return rows
+
+        # wie die Optimierung: coarse-to-fine über das Raster, Auswahl mit param_selection
+        rows = search(evaluate, OPT_GRIDS[direction], keys=tuple(f"final_cap_{v}" for v in group))
+        prices = execution_prices(df, group)
+        done = {}
+        for j, v in enumerate(group):
+            (p, tw), _ = select_params([{"past_window": r["past_window"], "trade_window": r["trade_window"],
+                                         "final_cap": r[f"final_cap_{v}"], "trades": r["trades"]} for r in rows],
+                                       p_axis=p_axis, tw_axis=tw_axis)
+            if p is None:  # leeres Raster
+                init = cfg.get('initialCapitalLong' if direction == 'long' else 'initialCapitalShort', 1000)
+                out[v] = {'p': None, 'tw': None, 'final_cap': float(init), 'trades': 0, 'basis': b}
+                continue
+            if (p, tw) not in done:
+                done[(p, tw)] = simulate_variants(signal_events(df, p, tw, direction, b), prices, cfg, direction)
+            final_caps, n_trades = done[(p, tw)]
+            out[v] = {'p': p, 'tw': tw, 'final_cap': float(final_caps[j]), 'trades': n_trades, 'basis': b}
+    return {v: out[v] for v in variants}
+
+
+def main(variants=("Open", "Close"), direction="long", basis=None):
     rows = []
     for ticker, cfg in tickers.items():
-        if not cfg.get('long', True):
-            continue  # skip if long disabled
+        if not cfg.get(direction, direction == 'long'):
+            continue  # skip if side disabled
         df = load_price_df(ticker)
         if df is None or df.empty:
             continue
-        init_cap = cfg.get('initialCapitalLong', 1000)
+        init_cap = cfg.get('initialCapitalLong' if direction == 'long' else 'initialCapitalShort', 1000)
         print(f"Processing {ticker} (initial {init_cap}) ...")
-        res_open = run_mode(df, cfg, 'Open', ticker)
-        res_close = run_mode(df, cfg, 'Close', ticker)
-        diff = res_open['final_cap'] - res_close['final_cap']
-        pct = (diff / res_close['final_cap'] * 100.0) if res_close['final_cap'] else None
-        rows.append({
-            'ticker': ticker,
-            'initial_capital': init_cap,
-            'final_cap_open': res_open['final_cap'],
-            'p_open': res_open['p'],
-            'tw_open': res_open['tw'],
-            'trades_open': res_open['trades'],
-            'final_cap_close': res_close['final_cap'],
-            'p_close': res_close['p'],
-            'tw_close': res_close['tw'],
-            'trades_close': res_close['trades'],
-            'diff_open_minus_close': diff,
-            'pct_diff': pct
-        })
+        res = compare_variants(df, cfg, variants, direction, basis)
+        row = {'ticker': ticker, 'initial_capital': init_cap}
+        for v, r in res.items():
+            key = v.lower()
+            row.update({f'final_cap_{key}': r['final_cap'], f'p_{key}': r['p'],
+                        f'tw_{key}': r['tw'], f'trades_{key}': r['trades'], f'basis_{key}': r['basis']})
+        if 'Open' in res and 'Close' in res:
+            diff = res['Open']['final_cap'] - res['Close']['final_cap']
+            row['diff_open_minus_close'] = diff
+            row['pct_diff'] = (diff / res['Close']['final_cap'] * 100.0) if res['Close']['final_cap'] else None
+        rows.append(row)
     if not rows:
         print("No results produced.")
         return
     df_out = pd.DataFrame(rows)
-    df_out.sort_values('pct_diff', ascending=False, inplace=True)
+    if 'pct_diff' in df_out.columns:
+        df_out.sort_values('pct_diff', ascending=False, inplace=True)
     df_out.to_csv(RESULT_CSV, index=False)
     print(f"\nSaved comparison to {RESULT_CSV}")
     print(df_out.to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description='Compare execution-price variants per ticker')
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=['Open', 'Close'])
+    parser.add_argument('--side', choices=['long', 'short'], default='long')
+    parser.add_argument('--basis', choices=['Open', 'Close'], default=None,
+                        help='Price column of the S/R levels for all variants (default: Open for Open, else Close)')
+    args = parser.parse_args()
+    main(args.variants, args.side, args.basis)
@@ -15,21 +15,15 @@ import json
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from tickers_config import tickers
-from backtesting_core import berechne_best_p_tw_long, berechne_best_p_tw_short
-from simulation_utils import simulate_trades_compound_extended, compute_equity_curve
-from config import DEFAULT_COMMISSION_RATE, MIN_COMMISSION, trade_years
-COMMISSION_RATE = DEFAULT_COMMISSION_RATE  # Use the config value
-from signal_utils import (
-    calculate_support_resistance,
-    assign_long_signals_extended,
-    assign_short_signals_extended,
-    update_level_close_long,
-    update_level_close_short
-)
+from backtest_engine import run_ticker
+from pipeline import run_ticker_cached
+from config import CACHE_RESULTS, RESULTS_FILE, RESULTS_FORMAT
+from results_export import ResultsWriter
 from stats_tools import stats
-from plot_utils import plot_combined_chart_and_equity
+from performance_analytics import performance_table, print_performance_table
+from chart_stage import make_chart_job, render_charts, launch_detached
 
-def process_ticker_backtest(ib, ticker_name, ticker_config):
+def process_ticker_backtest(ib, ticker_name, ticker_config, chart_jobs=None, use_cache=CACHE_RESULTS, explain=False):
     """
     Process a complete backtest for one ticker including:
     - Parameter optimization
@@ -38,149 +32,32 @@ def process_ticker_backtest(ib, ticker_name, ticker_config):
     - Capital curve calculation
     """
     print(f"\n{'='*20} Processing {ticker_name} {'='*20}")
-    
-    # Load data from CSV (already downloaded by run_full_backtest)
-    filename = f"{ticker_name}_data.csv"
-    if not os.path.exists(filename):
-        print(f"[FAIL] Data file not found: {filename}")
-        return None
 
     try:
-        df = pd.read_csv(filename, index_col=0, parse_dates=True)
-        df.rename(columns={"open": "Open", "high": "High", "low": "Low", "close": "Close"}, inplace=True)
-        df.sort_index(inplace=True)
-
+        # load -> optimize -> signals -> simulate -> equity -> stats (backtest_engine),
+        # memoized per stage unless the cache is disabled
+        if use_cache:
+            bt = run_ticker_cached(ticker_name, ticker_config, last_price_col="Close", explain=explain)
+        else:
+            bt = run_ticker(ticker_name, ticker_config, last_price_col="Close")
+        if bt is None:
+            return None
+        df = bt.df
         print(f"[DATA] Loaded {len(df)} rows of data for {ticker_name}")
         print(f"   Date range: {df.index[0].date()} to {df.index[-1].date()}")
-        
-        # Get last price and date for artificial close
-        last_price = df["Close"].iloc[-1]
-        last_date = df.index[-1]
-        
-        results = {
-            "ticker": ticker_name,
-            "config": ticker_config,
-            "data_info": {
-                "rows": len(df),
-                "start_date": str(df.index[0].date()),
-                "end_date": str(df.index[-1].date()),
-                "last_price": last_price
-            }
-        }
-        
-        # Process Long strategy if enabled
-        if ticker_config.get("long", False):
-            print(f"\n[LONG] Processing Long Strategy for {ticker_name}")
-            
-            # Optimize parameters
-            print("   Optimizing parameters...")
-            p_long, tw_long = berechne_best_p_tw_long(df, ticker_config, verbose=False, ticker=ticker_name)
-            print(f"   OK Best Long Parameters: p={p_long}, tw={tw_long}")
-            
-            # Calculate support/resistance
-            price_col = "Open" if ticker_config.get("trade_on", "Close").lower() == "open" else "Close"
-            sup_long, res_long = calculate_support_resistance(df, p_long, tw_long, price_col=price_col)
-            
-            # Generate extended signals
-            ext_long = assign_long_signals_extended(sup_long, res_long, df, tw_long, "1d")
-            ext_long = update_level_close_long(ext_long, df)
-            
-            print(f"   Generated {len(ext_long)} extended long signals")
-            
-            # Simulate matched trades
-            cap_long, trades_long = simulate_trades_compound_extended(
-                ext_long, df, ticker_config,
-                COMMISSION_RATE, MIN_COMMISSION,
-                ticker_config.get("order_round_factor", 1),
-                artificial_close_price=last_price,
-                artificial_close_date=last_date,
-                direction="long"
-            )
-            
-            # Calculate equity curve
-            initial_capital = ticker_config.get("initialCapitalLong", 1000)
-            equity_curve_long = compute_equity_curve(df, trades_long, initial_capital, long=True)
-            
-            # Verify capital curve final value matches final capital
-            if equity_curve_long:
-                curve_final = equity_curve_long[-1]
-                print(f"   Final Capital from simulation: {cap_long:.2f}")
-                print(f"   Final value from equity curve: {curve_final:.2f}")
-                print(f"   Match: {'YES' if abs(cap_long - curve_final) < 0.01 else 'NO'}")
-            
-            results["long"] = {
-                "parameters": {"p": p_long, "tw": tw_long},
-                "extended_signals": len(ext_long),
-                "matched_trades": len(trades_long),
-                "final_capital": cap_long,
-                "initial_capital": initial_capital,
-                "equity_curve": equity_curve_long,
-                "trades": trades_long,
-                "support_series": sup_long,
-                "resistance_series": res_long,
-                "extended_signals_data": ext_long.to_dict('records') if not ext_long.empty else []
-            }
 
-            # Print trade statistics with capital & equity curve for accurate drawdown
-            stats(trades_long, f"{ticker_name} Long", initial_capital=initial_capital, final_capital=cap_long, equity_curve=equity_curve_long)
-        
-        # Process Short strategy if enabled
-        if ticker_config.get("short", False):
-            print(f"\n[SHORT] Processing Short Strategy for {ticker_name}")
-            
-            # Optimize parameters
-            print("   Optimizing parameters...")
-            p_short, tw_short = berechne_best_p_tw_short(df, ticker_config, verbose=False, ticker=ticker_name)
-            print(f"   OK Best Short Parameters: p={p_short}, tw={tw_short}")
-            
-            # Calculate support/resistance
-            price_col = "Open" if ticker_config.get("trade_on", "Close").lower() == "open" else "Close"
-            sup_short, res_short = calculate_support_resistance(df, p_short, tw_short, price_col=price_col)
-            
-            # Generate extended signals
-            ext_short = assign_short_signals_extended(sup_short, res_short, df, tw_short, "1d")
-            ext_short = update_level_close_short(ext_short, df)
-            
-            print(f"   Generated {len(ext_short)} extended short signals")
-            
-            # Simulate matched trades
-            cap_short, trades_short = simulate_trades_compound_extended(
-                ext_short, df, ticker_config,
-                COMMISSION_RATE, MIN_COMMISSION,
-                ticker_config.get("order_round_factor", 1),
-                artificial_close_price=last_price,
-                artificial_close_date=last_date,
-                direction="short"
-            )
-            
-            # Calculate equity curve
-            initial_capital = ticker_config.get("initialCapitalShort", 1000)
-            equity_curve_short = compute_equity_curve(df, trades_short, initial_capital, long=False)
-            
-            # Verify capital curve final value matches final capital
-            if equity_curve_short:
-                curve_final = equity_curve_short[-1]
-                print(f"   Final Capital from simulation: {cap_short:.2f}")
+        for side, res in bt.sides.items():
+            print(f"\n[{side.upper()}] {ticker_name}: Best Parameters p={res.p}, tw={res.tw}")
+            print(f"   Generated {len(res.extended)} extended {side} signals, {len(res.trades)} matched trades")
+            if res.equity_curve:
+                curve_final = res.equity_curve[-1]
+                print(f"   Final Capital from simulation: {res.final_capital:.2f}")
                 print(f"   Final value from equity curve: {curve_final:.2f}")
-                print(f"   Match: {'YES' if abs(cap_short - curve_final) < 0.01 else 'NO'}")
-            
-            results["short"] = {
-                "parameters": {"p": p_short, "tw": tw_short},
-                "extended_signals": len(ext_short),
-                "matched_trades": len(trades_short),
-                "final_capital": cap_short,
-                "initial_capital": initial_capital,
-                "equity_curve": equity_curve_short,
-                "trades": trades_short,
-                "support_series": sup_short,
-                "resistance_series": res_short,
-                "extended_signals_data": ext_short.to_dict('records') if not ext_short.empty else []
-            }
+                print(f"   Match: {'YES' if abs(res.final_capital - curve_final) < 0.01 else 'NO'}")
 
-            # Print trade statistics with capital & equity curve
-            stats(trades_short, f"{ticker_name} Short", initial_capital=initial_capital, final_capital=cap_short, equity_curve=equity_curve_short)
-        
-        # Generate combined chart (align to current plot_utils signature)
+        results = bt.to_dict()
+
+        # Collect chart inputs; charts are rendered by the chart stage after all tickers
         try:
             # Prepare inputs for plotting function
             ext_long_df  = pd.DataFrame(results.get("long", {}).get("extended_signals_data", [])) if results.get("long") else pd.DataFrame()
@@ -198,9 +75,6 @@ def process_ticker_backtest(ib, ticker_name, ticker_config):
             else:
                 support_series = pd.Series(dtype=float)
                 resistance_series = pd.Series(dtype=float)
-            # Trend line
-            from signal_utils import compute_trend
-            trend_series = compute_trend(df, 20) if not df.empty else pd.Series(dtype=float)
             # Equity curves (lists) -> convert to pandas Series indexed to df for plotting
             equity_long_list  = results.get("long", {}).get("equity_curve", []) or []
             equity_short_list = results.get("short", {}).get("equity_curve", []) or []
@@ -221,20 +95,25 @@ def process_ticker_backtest(ib, ticker_name, ticker_config):
                 buyhold_series = pd.Series([init_cap_plot * (c/first_close) for c in df["Close"]], index=df.index)
             else:
                 buyhold_series = pd.Series(dtype=float)
-            plot_combined_chart_and_equity(
+            job = make_chart_job(
+                ticker_name,
                 df,
                 ext_long_df,
                 ext_short_df,
                 support_series,
                 resistance_series,
-                trend_series,
                 equity_long_series,
                 equity_short_series,
                 equity_combined_series,
                 buyhold_series,
-                ticker_name
+                trades_long=results.get("long", {}).get("trades"),
+                trades_short=results.get("short", {}).get("trades"),
+                params={side: results[side].get("parameters") for side in ("long", "short") if side in results},
             )
-            print(f"   Chart saved to {ticker_name}_chart.html")
+            if chart_jobs is not None:
+                chart_jobs.append(job)
+            else:
+                render_charts([job])
         except Exception as e:
             print(f"   WARN Chart generation failed: {e}")
 
@@ -257,18 +136,81 @@ def process_ticker_backtest(ib, ticker_name, ticker_config):
         traceback.print_exc()
     return None
 
+def export_entry(data):
+    """Results of one ticker -> entry of the results export (structure consumable by check_todays_signals.py)"""
+    entry = {
+        "data_info": data.get("data_info", {}),
+    }
+    # Map long strategy if present
+    if "long" in data:
+        long_info = data["long"]
+        p_param = long_info.get("parameters", {}).get("p")
+        tw_param = long_info.get("parameters", {}).get("tw")
+        ext_rows = long_info.get("extended_signals_data", [])
+        long_ext = []
+        for row in ext_rows:
+            action = row.get("Long Action")
+            date_str = str(row.get("Long Date detected"))[:10]
+            if action in ("buy", "sell") and date_str and date_str != "nan":
+                price = row.get("Level trade") or row.get("Level Close")
+                try:
+                    price_val = float(price) if price is not None and price == price else None
+                except Exception:
+                    price_val = None
+                long_ext.append({
+                    "date": date_str,
+                    "action": action.upper(),
+                    "price": price_val,
+                    "signal_type": row.get("Supp/Resist"),
+                    "p_param": p_param,
+                    "tw_param": tw_param,
+                })
+        entry["long_strategy"] = {
+            "parameters": long_info.get("parameters", {}),
+            "extended_signals": long_ext,
+        }
+    # Map short strategy if present
+    if "short" in data:
+        short_info = data["short"]
+        p_param = short_info.get("parameters", {}).get("p")
+        tw_param = short_info.get("parameters", {}).get("tw")
+        ext_rows = short_info.get("extended_signals_data", [])
+        short_ext = []
+        for row in ext_rows:
+            action = row.get("Short Action")
+            date_str = str(row.get("Short Date detected"))[:10]
+            if action in ("short", "cover") and date_str and date_str != "nan":
+                price = row.get("Level trade") or row.get("Level Close")
+                try:
+                    price_val = float(price) if price is not None and price == price else None
+                except Exception:
+                    price_val = None
+                short_ext.append({
+                    "date": date_str,
+                    "action": ("SHORT" if action == "short" else "COVER"),
+                    "price": price_val,
+                    "signal_type": row.get("Supp/Resist"),
+                    "p_param": p_param,
+                    "tw_param": tw_param,
+                })
+        entry["short_strategy"] = {
+            "parameters": short_info.get("parameters", {}),
+            "extended_signals": short_ext,
+        }
+
+    return entry
+
 def update_yesterday_ohlc_in_results():
     """Update yesterday's artificial prices in the backtest results file with true OHLC from CSV."""
-    import json
     from datetime import datetime, timedelta
-    results_file = 'complete_comprehensive_backtest_results.json'
-    if not os.path.exists(results_file):
-        return
+    from results_store import load_results, save_results
+    results_file = RESULTS_FILE
     try:
-        with open(results_file, 'r') as f:
-            results = json.load(f)
+        results = load_results(results_file)
     except Exception:
         return
+    if results is None:
+        return
     yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
     changed = False
     for ticker, ticker_data in results.items():
@@ -304,8 +246,7 @@ def update_yesterday_ohlc_in_results():
                             sig['close'] = ohlc['close']
                             changed = True
     if changed:
-        with open(results_file, 'w') as f:
-            json.dump(results, f, indent=2)
+        save_results(results, results_file)
         print(f"[INFO] Updated OHLC prices for {yesterday} in {results_file}")
 
 if __name__ == "__main__":
@@ -333,11 +274,19 @@ if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description='Run the complete comprehensive backtest for all tickers')
     parser.add_argument('--tickers', nargs='*', help='List of tickers to process (default: all)')
+    parser.add_argument('--charts', choices=['sync', 'background', 'skip'], default='sync',
+                        help='Chart stage after the backtest: render now, in a detached process, or not at all')
+    parser.add_argument('--no-cache', action='store_true', help='Recompute every stage (ignore the pipeline cache)')
+    parser.add_argument('--explain', action='store_true', help='Print which pipeline stages were recomputed and why')
     args = parser.parse_args()
 
     # Run for all tickers or a subset
     tickers_to_run = args.tickers if args.tickers else list(tickers.keys())
     all_results = {}
+    export_data = {}  # structure consumable by check_todays_signals.py
+    chart_jobs = []
+    # NDJSON export: one line per ticker as soon as it is finished (results_export.py)
+    writer = ResultsWriter(RESULTS_FILE) if RESULTS_FORMAT in ("ndjson", "both") else None
 
     for ticker in tickers_to_run:
         ticker_config = tickers[ticker]
@@ -346,80 +295,38 @@ if __name__ == "__main__":
             print(f"Skipping {ticker}: No strategies enabled")
             continue
 
-        result = process_ticker_backtest(ib, ticker, ticker_config)
+        result = process_ticker_backtest(ib, ticker, ticker_config, chart_jobs=chart_jobs,
+                                         use_cache=CACHE_RESULTS and not args.no_cache, explain=args.explain)
         if result:
             all_results[ticker] = result
+            export_data[ticker] = export_entry(result)
+            if writer is not None:
+                writer.write(ticker, export_data[ticker])
 
-    # Export results in structure consumable by check_todays_signals.py
-    export_data = {}
-    for ticker_name, data in all_results.items():
-        export_entry = {
-            "data_info": data.get("data_info", {}),
-        }
-        # Map long strategy if present
-        if "long" in data:
-            long_info = data["long"]
-            p_param = long_info.get("parameters", {}).get("p")
-            tw_param = long_info.get("parameters", {}).get("tw")
-            ext_rows = long_info.get("extended_signals_data", [])
-            long_ext = []
-            for row in ext_rows:
-                action = row.get("Long Action")
-                date_str = str(row.get("Long Date detected"))[:10]
-                if action in ("buy", "sell") and date_str and date_str != "nan":
-                    price = row.get("Level trade") or row.get("Level Close")
-                    try:
-                        price_val = float(price) if price is not None and price == price else None
-                    except Exception:
-                        price_val = None
-                    long_ext.append({
-                        "date": date_str,
-                        "action": action.upper(),
-                        "price": price_val,
-                        "signal_type": row.get("Supp/Resist"),
-                        "p_param": p_param,
-                        "tw_param": tw_param,
-                    })
-            export_entry["long_strategy"] = {
-                "parameters": long_info.get("parameters", {}),
-                "extended_signals": long_ext,
-            }
-        # Map short strategy if present
-        if "short" in data:
-            short_info = data["short"]
-            p_param = short_info.get("parameters", {}).get("p")
-            tw_param = short_info.get("parameters", {}).get("tw")
-            ext_rows = short_info.get("extended_signals_data", [])
-            short_ext = []
-            for row in ext_rows:
-                action = row.get("Short Action")
-                date_str = str(row.get("Short Date detected"))[:10]
-                if action in ("short", "cover") and date_str and date_str != "nan":
-                    price = row.get("Level trade") or row.get("Level Close")
-                    try:
-                        price_val = float(price) if price is not None and price == price else None
-                    except Exception:
-                        price_val = None
-                    short_ext.append({
-                        "date": date_str,
-                        "action": ("SHORT" if action == "short" else "COVER"),
-                        "price": price_val,
-                        "signal_type": row.get("Supp/Resist"),
-                        "p_param": p_param,
-                        "tw_param": tw_param,
-                    })
-            export_entry["short_strategy"] = {
-                "parameters": short_info.get("parameters", {}),
-                "extended_signals": short_ext,
-            }
+    # Legacy JSON is written in one piece at the end
+    if writer is not None:
+        writer.close()
+        print(f"[DONE] Results streamed to {writer.path}")
+    if RESULTS_FORMAT in ("json", "both"):
+        with open(RESULTS_FILE, "w") as f:
+            json.dump(export_data, f, indent=2, default=str)
+        print(f"[DONE] All results saved to {RESULTS_FILE}")
 
-        export_data[ticker_name] = export_entry
-
-    with open("complete_comprehensive_backtest_results.json", "w") as f:
-        json.dump(export_data, f, indent=2, default=str)
+    # Risk/return metrics for all tickers and sides in one batched pass
+    try:
+        perf = performance_table(all_results)
+        perf.to_csv("performance_summary.csv", index=False)
+        print_performance_table(perf, "PERFORMANCE SUMMARY")
+        print("[DONE] Performance metrics saved to performance_summary.csv")
+    except Exception as e:
+        print(f"[WARN] Could not compute performance metrics: {e}")
 
-    print("[DONE] All results saved to complete_comprehensive_backtest_results.json")
-    print("[OK] Individual charts saved as: [TICKER]_chart.html")
+    # Chart stage runs only after the results are on disk
+    if args.charts == 'sync':
+        render_charts(chart_jobs)
+        print("[OK] Individual charts saved as: [TICKER]_chart.html")
+    elif args.charts == 'background':
+        launch_detached(chart_jobs)
     print("[OK] Complete comprehensive backtest finished!")
 
     # Clean up IB connection if open
@@ -9,7 +9,7 @@ from datetime import datetime, timedelta
 from ib_insync import IB, Stock, util
 
 from tickers_config import tickers
-from config import DEFAULT_COMMISSION_RATE, MIN_COMMISSION, backtesting_begin, backtesting_end, trade_years
+from config import DEFAULT_COMMISSION_RATE, backtesting_begin, backtesting_end, trade_years
 COMMISSION_RATE = DEFAULT_COMMISSION_RATE  # Use the config value
 from signal_utils import (
     calculate_support_resistance,
@@ -23,9 +23,10 @@ from signal_utils import (
 )
 from backtest_range import restrict_df_for_backtest
 
-from simulation_utils import simulate_trades_compound_extended, compute_equity_curve
+from backtest_engine import run_ticker, simulate_stage, equity_stage
+from grid_search import configured_axes, full_grid, search
+from param_selection import select_params
 from plot_utils import plot_combined_chart_and_equity
-from stats_tools import stats
 
 class DataLoader:
     """Loads historical data from Interactive Brokers/Lynx"""
@@ -119,7 +120,7 @@ class BacktestOptimizer:
         print(f"   df_bt period: {df_bt.index[0].date()} to {df_bt.index[-1].date()}")
         return df_bt
         
-    def optimize_parameters(self, df_bt, symbol, ticker_config, p_range=range(5, 51, 5), tw_range=range(5, 31, 5)):
+    def optimize_parameters(self, df_bt, symbol, ticker_config, p_range=None, tw_range=None):
         """
         Find optimal p (past_window) and tw (trade_window) parameters
         
@@ -127,122 +128,142 @@ class BacktestOptimizer:
             df_bt: Backtest DataFrame subset
             symbol: Stock symbol
             ticker_config: Configuration for this ticker
-            p_range: Range of past_window values to test
-            tw_range: Range of trade_window values to test
+            p_range: Range of past_window values to test (default P_RANGE)
+            tw_range: Range of trade_window values to test (default TW_RANGE / FORCE_TW)
+
+        Large grids are searched coarse-to-fine (grid_search.search); the
+        cell is chosen by param_selection (smoothed combined return, OPT_* rules).
         """
+        p_axis, tw_axis = configured_axes(p_range, tw_range)
         print(f"\n🔍 Optimizing parameters for {symbol}...")
-        print(f"   Testing p={list(p_range)}, tw={list(tw_range)}")
-        
-        best_params = {"p": None, "tw": None, "return": -np.inf}
-        optimization_results = []
-        
-        for p in p_range:
-            for tw in tw_range:
+        print(f"   Testing p={p_axis}, tw={tw_axis}")
+
+        def evaluate(cells):
+            rows = []
+            for p, tw in cells:
+                row = None
                 try:
-                    # Calculate support/resistance
-                    price_col = "Open" if ticker_config.get("trade_on", "Close").lower() == "open" else "Close"
-                    support, resistance = calculate_support_resistance(df_bt, p, tw, price_col=price_col)
-                    
-                    # Debug: Check what types we get from calculate_support_resistance
-                    if not isinstance(support, pd.Series) or not isinstance(resistance, pd.Series):
-                        print(f"      Warning: Support/resistance wrong type: {type(support)}, {type(resistance)}")
-                        continue
-                    
-                    # Generate signals based on trade direction
-                    if ticker_config.get("long", False):
-                        signals_long = assign_long_signals_extended(support, resistance, df_bt, tw, interval="1D")
-                        
-                        # Debug: Check the exact type returned
-                        print(f"      Debug: signals_long type = {type(signals_long)}")
-                        if hasattr(signals_long, 'columns'):
-                            print(f"      Debug: signals_long columns = {list(signals_long.columns)}")
-                        if hasattr(signals_long, '__len__'):
-                            print(f"      Debug: signals_long length = {len(signals_long)}")
-                        
-                        # Ensure signals_long is a DataFrame
-                        if not isinstance(signals_long, pd.DataFrame):
-                            print(f"      Warning: Long signals is not DataFrame, got {type(signals_long)}")
-                            long_return = 1.0
-                        elif signals_long.empty:
-                            long_return = 1.0
-                        else:
-                            signals_long = update_level_close_long(signals_long, df_bt)
-                            
-                            # Calculate trades and returns
-                            trades_long, equity_long = self._backtest_signals(
-                                signals_long, df_bt, symbol, ticker_config, "long"
-                            )
-                            
-                            # Calculate return from equity curve
-                            if not equity_long.empty and len(equity_long) > 0:
-                                # Look for common equity column names
-                                equity_cols = [col for col in equity_long.columns if 'equity' in col.lower() or 'capital' in col.lower()]
-                                if equity_cols:
-                                    final_value = equity_long[equity_cols[0]].iloc[-1]
-                                    initial_value = ticker_config.get("initialCapitalLong", 1000)
-                                    long_return = final_value / initial_value
-                                else:
-                                    long_return = 1.0
-                            else:
-                                long_return = 1.0
-                    else:
-                        long_return = 1.0
-                        
-                    if ticker_config.get("short", False):
-                        signals_short = assign_short_signals_extended(support, resistance, df_bt, tw, interval="1D")
-                        
-                        # Ensure signals_short is a DataFrame
-                        if not isinstance(signals_short, pd.DataFrame):
-                            print(f"      Warning: Short signals is not DataFrame, got {type(signals_short)}")
-                            short_return = 1.0
-                        elif signals_short.empty:
-                            short_return = 1.0
-                        else:
-                            signals_short = update_level_close_short(signals_short, df_bt)
-                            
-                            # Calculate trades and returns
-                            trades_short, equity_short = self._backtest_signals(
-                                signals_short, df_bt, symbol, ticker_config, "short"
-                            )
-                            
-                            # Calculate return from equity curve
-                            if not equity_short.empty and len(equity_short) > 0:
-                                # Look for common equity column names
-                                equity_cols = [col for col in equity_short.columns if 'equity' in col.lower() or 'capital' in col.lower()]
-                                if equity_cols:
-                                    final_value = equity_short[equity_cols[0]].iloc[-1]
-                                    initial_value = ticker_config.get("initialCapitalShort", 1000)
-                                    short_return = final_value / initial_value
-                                else:
-                                    short_return = 1.0
-                            else:
-                                short_return = 1.0
-                    else:
-                        short_return = 1.0
-                        
-                    # Combined return (geometric mean)
-                    combined_return = (long_return * short_return) ** 0.5
-                    
-                    optimization_results.append({
-                        "p": p,
-                        "tw": tw,
-                        "long_return": long_return,
-                        "short_return": short_return,
-                        "combined_return": combined_return
-                    })
-                    
-                    if combined_return > best_params["return"]:
-                        best_params = {"p": p, "tw": tw, "return": combined_return}
-                        
-                    print(f"   p={p:2d}, tw={tw:2d}: Long={long_return:.4f}, Short={short_return:.4f}, Combined={combined_return:.4f}")
-                    
+                    row = self._score_cell(df_bt, symbol, ticker_config, p, tw)
                 except Exception as e:
                     print(f"   p={p:2d}, tw={tw:2d}: Error - {e}")
-                    continue
-                    
+                rows.append(dict(row or {"p": p, "tw": tw, "combined_return": None}, past_window=p, trade_window=tw))
+            return rows
+
+        results = search(evaluate, full_grid(p_axis, tw_axis), keys=("combined_return",))
+        optimization_results = [{k: v for k, v in r.items() if k not in ("past_window", "trade_window")}
+                                for r in results if r.get("combined_return") is not None]
+
+        best_params = {"p": None, "tw": None, "return": -np.inf}
+        if optimization_results:
+            (p, tw), ranked = select_params(
+                [dict(r, past_window=r["p"], trade_window=r["tw"]) for r in optimization_results],
+                score_key="combined_return", p_axis=p_axis, tw_axis=tw_axis,
+            )
+            if p is not None:
+                best_params = {"p": p, "tw": tw, "return": float(ranked.iloc[0]["combined_return"])}
+
         print(f"🎯 Best parameters for {symbol}: p={best_params['p']}, tw={best_params['tw']}, return={best_params['return']:.4f}")
         
         return best_params, optimization_results
+
+    def _score_cell(self, df_bt, symbol, ticker_config, p, tw):
+        """Long/short/combined return of one (p, tw) cell (None if S/R failed)."""
+        n_trades = 0
+        # Calculate support/resistance
+        price_col = "Open" if ticker_config.get("trade_on", "Close").lower() == "open" else "Close"
+        support, resistance = calculate_support_resistance(df_bt, p, tw, price_col=price_col)
+
+        # Debug: Check what types we get from calculate_support_resistance
+        if not isinstance(support, pd.Series) or not isinstance(resistance, pd.Series):
+            print(f"      Warning: Support/resistance wrong type: {type(support)}, {type(resistance)}")
+            return None
+
+        # Generate signals based on trade direction
+        if ticker_config.get("long", False):
+            signals_long = assign_long_signals_extended(support, resistance, df_bt, tw, interval="1D")
+
+            # Debug: Check the exact type returned
+            print(f"      Debug: signals_long type = {type(signals_long)}")
+            if hasattr(signals_long, 'columns'):
+                print(f"      Debug: signals_long columns = {list(signals_long.columns)}")
+            if hasattr(signals_long, '__len__'):
+                print(f"      Debug: signals_long length = {len(signals_long)}")
+
+            # Ensure signals_long is a DataFrame
+            if not isinstance(signals_long, pd.DataFrame):
+                print(f"      Warning: Long signals is not DataFrame, got {type(signals_long)}")
+                long_return = 1.0
+            elif signals_long.empty:
+                long_return = 1.0
+            else:
+                signals_long = update_level_close_long(signals_long, df_bt)
+
+                # Calculate trades and returns
+                trades_long, equity_long = self._backtest_signals(
+                    signals_long, df_bt, symbol, ticker_config, "long"
+                )
+                n_trades += len(trades_long)
+
+                # Calculate return from equity curve
+                if not equity_long.empty and len(equity_long) > 0:
+                    # Look for common equity column names
+                    equity_cols = [col for col in equity_long.columns if 'equity' in col.lower() or 'capital' in col.lower()]
+                    if equity_cols:
+                        final_value = equity_long[equity_cols[0]].iloc[-1]
+                        initial_value = ticker_config.get("initialCapitalLong", 1000)
+                        long_return = final_value / initial_value
+                    else:
+                        long_return = 1.0
+                else:
+                    long_return = 1.0
+        else:
+            long_return = 1.0
+
+        if ticker_config.get("short", False):
+            signals_short = assign_short_signals_extended(support, resistance, df_bt, tw, interval="1D")
+
+            # Ensure signals_short is a DataFrame
+            if not isinstance(signals_short, pd.DataFrame):
+                print(f"      Warning: Short signals is not DataFrame, got {type(signals_short)}")
+                short_return = 1.0
+            elif signals_short.empty:
+                short_return = 1.0
+            else:
+                signals_short = update_level_close_short(signals_short, df_bt)
+
+                # Calculate trades and returns
+                trades_short, equity_short = self._backtest_signals(
+                    signals_short, df_bt, symbol, ticker_config, "short"
+                )
+                n_trades += len(trades_short)
+
+                # Calculate return from equity curve
+                if not equity_short.empty and len(equity_short) > 0:
+                    # Look for common equity column names
+                    equity_cols = [col for col in equity_short.columns if 'equity' in col.lower() or 'capital' in col.lower()]
+                    if equity_cols:
+                        final_value = equity_short[equity_cols[0]].iloc[-1]
+                        initial_value = ticker_config.get("initialCapitalShort", 1000)
+                        short_return = final_value / initial_value
+                    else:
+                        short_return = 1.0
+                else:
+                    short_return = 1.0
+        else:
+            short_return = 1.0
+
+        # Combined return (geometric mean)
+        combined_return = (long_return * short_return) ** 0.5
+
+        print(f"   p={p:2d}, tw={tw:2d}: Long={long_return:.4f}, Short={short_return:.4f}, Combined={combined_return:.4f}")
+        return {
+            "p": p,
+            "tw": tw,
+            "long_return": long_return,
+            "short_return": short_return,
+            "combined_return": combined_return,
+            "trades": n_trades
+        }
         
     def _backtest_signals(self, signals, df_bt, symbol, ticker_config, direction):
         """Helper method to backtest signals and calculate equity curve"""
@@ -271,18 +292,13 @@ class BacktestOptimizer:
                 print(f"      Missing columns in {direction} signals: {missing_cols}")
                 return pd.DataFrame(), pd.DataFrame()
             
-            # Simulate trades using the existing function
-            final_capital, trades = simulate_trades_compound_extended(
-                signals, df_bt, ticker_config,
-                COMMISSION_RATE, MIN_COMMISSION, 
-                ticker_config.get("order_round_factor", 1),
-                direction=direction
-            )
+            # Simulate trades and equity with the shared engine stages
+            final_capital, trades = simulate_stage(signals, df_bt, ticker_config, direction, None, None)
             
             # Compute equity curve
             if trades and len(trades) > 0:
                 start_capital = ticker_config["initialCapitalLong"] if direction == "long" else ticker_config["initialCapitalShort"]
-                equity = compute_equity_curve(df_bt, trades, start_capital, long=(direction == "long"))
+                equity = equity_stage(df_bt, trades, start_capital, direction)
                 equity_df = pd.DataFrame({'Equity': equity}, index=df_bt.index)
             else:
                 equity_df = pd.DataFrame()
@@ -297,45 +313,26 @@ class BacktestOptimizer:
         """Run full backtest with optimal parameters and generate outputs."""
         print(f"\n🚀 Running full backtest for {symbol} with p={optimal_p}, tw={optimal_tw}")
 
-        # Support / Resistance using correct price column
-        price_col = "Open" if ticker_config.get("trade_on", "Close").lower() == "open" else "Close"
-        support, resistance = calculate_support_resistance(df_bt, optimal_p, optimal_tw, price_col=price_col)
+        # Signals, simulation, equity and stats with one (p, tw) for both sides (backtest_engine)
+        bt = run_ticker(symbol, ticker_config, df=df_bt,
+                        params={"long": (optimal_p, optimal_tw), "short": (optimal_p, optimal_tw)}, verbose=False)
+        # Equity/chart follow the frame the engine actually ran on (validated/trimmed by load_stage)
+        df_run = bt.df if bt else df_bt
+        support = resistance = pd.Series(dtype=float)
 
         results = {}
-
-        # LONG
-        if ticker_config.get("long", False):
-            print("   📈 Processing LONG signals...")
-            signals_long = assign_long_signals_extended(support, resistance, df_bt, optimal_tw, interval="1D")
-            signals_long = update_level_close_long(signals_long, df_bt)
-            trades_long, equity_long = self._backtest_signals(signals_long, df_bt, symbol, ticker_config, "long")
-            trades_long.to_csv(f"extended_long_{symbol}.csv", index=False)
-            matched_trades_long = self._create_matched_trades(trades_long, "long")
-            matched_trades_long.to_csv(f"trades_long_{symbol}.csv", index=False)
-            equity_list = equity_long['Equity'].tolist() if not equity_long.empty and 'Equity' in equity_long else []
-            trades_list = trades_long.to_dict('records') if not trades_long.empty else []
-            final_cap_long = equity_list[-1] if equity_list else ticker_config.get('initialCapitalLong')
-            long_stats = stats(trades_list, f"{symbol} Long", initial_capital=ticker_config.get('initialCapitalLong'), final_capital=final_cap_long, equity_curve=equity_list) if trades_list else {}
-            if long_stats:
-                print(f"   🔢 LONG Metrics: Init={long_stats.get('initial_capital'):.2f} Final={long_stats.get('final_capital'):.2f} MaxDD={long_stats.get('max_drawdown_pct'):.2f}%")
-            results["long"] = {"signals": signals_long, "trades": trades_long, "matched_trades": matched_trades_long, "equity": equity_long, "stats": long_stats}
-
-        # SHORT
-        if ticker_config.get("short", False):
-            print("   📉 Processing SHORT signals...")
-            signals_short = assign_short_signals_extended(support, resistance, df_bt, optimal_tw, interval="1D")
-            signals_short = update_level_close_short(signals_short, df_bt)
-            trades_short, equity_short = self._backtest_signals(signals_short, df_bt, symbol, ticker_config, "short")
-            trades_short.to_csv(f"extended_short_{symbol}.csv", index=False)
-            matched_trades_short = self._create_matched_trades(trades_short, "short")
-            matched_trades_short.to_csv(f"trades_short_{symbol}.csv", index=False)
-            equity_list_s = equity_short['Equity'].tolist() if not equity_short.empty and 'Equity' in equity_short else []
-            trades_list_s = trades_short.to_dict('records') if not trades_short.empty else []
-            final_cap_short = equity_list_s[-1] if equity_list_s else ticker_config.get('initialCapitalShort')
-            short_stats = stats(trades_list_s, f"{symbol} Short", initial_capital=ticker_config.get('initialCapitalShort'), final_capital=final_cap_short, equity_curve=equity_list_s) if trades_list_s else {}
-            if short_stats:
-                print(f"   🔢 SHORT Metrics: Init={short_stats.get('initial_capital'):.2f} Final={short_stats.get('final_capital'):.2f} MaxDD={short_stats.get('max_drawdown_pct'):.2f}%")
-            results["short"] = {"signals": signals_short, "trades": trades_short, "matched_trades": matched_trades_short, "equity": equity_short, "stats": short_stats}
+        for side, res in (bt.sides.items() if bt else ()):
+            print(f"   {'📈' if side == 'long' else '📉'} Processing {side.upper()} signals...")
+            # Same p, tw and price column on both sides -> identical levels
+            support, resistance = res.support, res.resistance
+            res.extended.to_csv(f"extended_{side}_{symbol}.csv", index=False)
+            trades_df = res.trades.to_frame()
+            trades_df.to_csv(f"trades_{side}_{symbol}.csv", index=False)
+            equity_df = pd.DataFrame({'Equity': res.equity_curve}, index=df_run.index)
+            side_stats = res.stats if res.trades else {}
+            if side_stats:
+                print(f"   🔢 {side.upper()} Metrics: Init={side_stats.get('initial_capital'):.2f} Final={side_stats.get('final_capital'):.2f} MaxDD={side_stats.get('max_drawdown_pct'):.2f}%")
+            results[side] = {"signals": res.extended, "trades": trades_df, "matched_trades": trades_df, "equity": equity_df, "stats": side_stats}
 
         # Chart (align with current plot_utils signature)
         try:
@@ -353,15 +350,15 @@ class BacktestOptimizer:
             else:
                 equity_combined = equity_long_series or equity_short_series
             # Buy & Hold baseline on Close
-            if not df_bt.empty:
+            if not df_run.empty:
                 initial_cap = ticker_config.get("initialCapitalLong", 1000)
-                first_close = df_bt["Close"].iloc[0]
-                buyhold = [initial_cap * (c / first_close) for c in df_bt["Close"]]
+                first_close = df_run["Close"].iloc[0]
+                buyhold = [initial_cap * (c / first_close) for c in df_run["Close"]]
             else:
                 buyhold = []
-            trend_series = compute_trend(df_bt, 20)
+            trend_series = compute_trend(df_run, 20)
             plot_combined_chart_and_equity(
-                df_bt,
+                df_run,
                 ext_long_df,
                 ext_short_df,
                 support,
@@ -378,54 +375,6 @@ class BacktestOptimizer:
             print(f"   ⚠️ Chart generation error: {e}")
 
         return results
-        
-    def _create_matched_trades(self, extended_trades, direction):
-        """Convert extended trades to matched trades format"""
-        matched_trades = []
-        
-        if direction == "long":
-            # Group buy/sell pairs
-            buys = extended_trades[extended_trades["Long"] == "buy"].copy()
-            sells = extended_trades[extended_trades["Long"] == "sell"].copy()
-            
-            for _, buy in buys.iterrows():
-                # Find corresponding sell
-                matching_sells = sells[sells["Long Date"] > buy["Long Date"]]
-                if not matching_sells.empty:
-                    sell = matching_sells.iloc[0]
-                    
-                    matched_trades.append({
-                        "buy_date": buy["Long Date"],
-                        "sell_date": sell["Long Date"],
-                        "shares": buy.get("qty", 1),
-                        "buy_price": buy.get("Level Close", buy.get("Close", 0)),
-                        "sell_price": sell.get("Level Close", sell.get("Close", 0)),
-                        "fee": buy.get("fee", 0) + sell.get("fee", 0),
-                        "pnl": buy.get("pnl", 0)
-                    })
-                    
-        else:  # short
-            # Group short/cover pairs  
-            shorts = extended_trades[extended_trades["Short"] == "short"].copy()
-            covers = extended_trades[extended_trades["Short"] == "cover"].copy()
-            
-            for _, short in shorts.iterrows():
-                # Find corresponding cover
-                matching_covers = covers[covers["Short Date"] > short["Short Date"]]
-                if not matching_covers.empty:
-                    cover = matching_covers.iloc[0]
-                    
-                    matched_trades.append({
-                        "short_date": short["Short Date"],
-                        "cover_date": cover["Short Date"],
-                        "shares": short.get("qty", 1),
-                        "short_price": short.get("Level Close", short.get("Close", 0)),
-                        "cover_price": cover.get("Level Close", cover.get("Close", 0)),
-                        "fee": short.get("fee", 0) + cover.get("fee", 0),
-                        "pnl": short.get("pnl", 0)
-                    })
-                    
-        return pd.DataFrame(matched_trades)
 
 def run_comprehensive_backtest():
     """Main function to run the complete backtesting workflow"""
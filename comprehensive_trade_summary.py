@@ -4,19 +4,16 @@ Comprehensive Trade Summary for All Tickers
 Shows detailed trade information for both long and short positions
 """
 
-import json
 import pandas as pd
-from datetime import datetime
 from tickers_config import tickers
+from results_store import load_results, trade_frame
 
 def load_trade_data():
-    """Load trade data from the comprehensive backtest results"""
-    try:
-        with open('complete_comprehensive_backtest_results.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
+    """Load trade data from the comprehensive backtest results (cached per file change, see results_store)"""
+    data = load_results()
+    if data is None:
         print("❌ Results file not found. Please run the comprehensive backtest first.")
-        return None
+    return data
 
 def format_currency(value):
     """Format currency values"""
@@ -44,20 +41,9 @@ def analyze_trades(trades, strategy_type, ticker):
     winning_trades = [t for t in trades if t['pnl'] > 0]
     losing_trades = [t for t in trades if t['pnl'] < 0]
     
-    # Calculate holding periods
-    hold_days = []
-    for trade in trades:
-        # Handle different trade formats (long vs short)
-        if 'buy_date' in trade:
-            # Long trades
-            buy_date = datetime.strptime(trade['buy_date'], '%Y-%m-%d %H:%M:%S')
-            sell_date = datetime.strptime(trade['sell_date'], '%Y-%m-%d %H:%M:%S')
-        else:
-            # Short trades
-            buy_date = datetime.strptime(trade['short_date'], '%Y-%m-%d %H:%M:%S')
-            sell_date = datetime.strptime(trade['cover_date'], '%Y-%m-%d %H:%M:%S')
-        days = (sell_date - buy_date).days
-        hold_days.append(days)
+    # Calculate holding periods (long and short layouts, dates parsed in one pass)
+    frame = trade_frame(trades)
+    hold_days = (frame['exit_date'] - frame['entry_date']).dt.days.dropna().tolist()
     
     return {
         'total_trades': len(trades),
@@ -103,23 +89,15 @@ def print_ticker_trades(ticker, data, date_filter=None, min_pnl=None, strategy_f
             print(f"\n🔴 No {strategy.upper()} trades found")
             continue
         
-        # Filter trades if needed
-        filtered_trades = []
-        for trade in trades:
-            # Date filter - handle different trade formats
-            if date_filter:
-                if 'buy_date' in trade:
-                    trade_date = datetime.strptime(trade['buy_date'], '%Y-%m-%d %H:%M:%S')
-                else:
-                    trade_date = datetime.strptime(trade['short_date'], '%Y-%m-%d %H:%M:%S')
-                if not (date_filter['start'] <= trade_date <= date_filter['end']):
-                    continue
-            
-            # PnL filter
-            if min_pnl is not None and trade['pnl'] < min_pnl:
-                continue
-                
-            filtered_trades.append(trade)
+        # Filter trades if needed (entry date and PnL on the parsed trade table)
+        frame = trade_frame(trades, ticker)
+        keep = pd.Series(True, index=frame.index)
+        if date_filter:
+            keep &= frame['entry_date'].between(date_filter['start'], date_filter['end'])
+        if min_pnl is not None:
+            keep &= frame['pnl'] >= min_pnl
+        filtered_trades = [trade for trade, k in zip(trades, keep) if k]
+        frame = frame[keep]
         
         if not filtered_trades:
             print(f"\n🔴 No {strategy.upper()} trades match the filters")
@@ -156,19 +134,10 @@ def print_ticker_trades(ticker, data, date_filter=None, min_pnl=None, strategy_f
             print(f"{'#':<3} {'Short Date':<12} {'Cover Date':<12} {'Short $':<8} {'Cover $':<8} {'Shares':<6} {'Fee $':<7} {'PnL $':<10} {'Days':<4}")
         print("-" * 85)
         
-        for i, trade in enumerate(filtered_trades, 1):
-            if 'buy_date' in trade:
-                # Long trades
-                entry_date = datetime.strptime(trade['buy_date'], '%Y-%m-%d %H:%M:%S')
-                exit_date = datetime.strptime(trade['sell_date'], '%Y-%m-%d %H:%M:%S')
-                entry_price = trade['buy_price']
-                exit_price = trade['sell_price']
-            else:
-                # Short trades
-                entry_date = datetime.strptime(trade['short_date'], '%Y-%m-%d %H:%M:%S')
-                exit_date = datetime.strptime(trade['cover_date'], '%Y-%m-%d %H:%M:%S')
-                entry_price = trade['short_price']
-                exit_price = trade['cover_price']
+        for i, (trade, row) in enumerate(zip(filtered_trades, frame.itertuples(index=False)), 1):
+            # Long and short layouts mapped to entry/exit by trade_frame
+            entry_date, exit_date = row.entry_date, row.exit_date
+            entry_price, exit_price = row.entry_price, row.exit_price
             
             hold_days = (exit_date - entry_date).days
             pnl_color = "🟢" if trade['pnl'] > 0 else "🔴"
@@ -182,6 +151,18 @@ def print_ticker_trades(ticker, data, date_filter=None, min_pnl=None, strategy_f
     if total_trades_shown == 0:
         print(f"\n🔴 No trades found for {ticker} matching the specified filters")
 
+def print_risk_metrics(path='performance_summary.csv'):
+    """Print drawdown/ratio metrics written by the comprehensive backtest"""
+    try:
+        perf = pd.read_csv(path)
+    except FileNotFoundError:
+        return
+    if perf.empty:
+        return
+    print(f"\n📉 RISK METRICS (from {path}):")
+    cols = ['ticker', 'side', 'max_drawdown_pct', 'max_dd_duration', 'sharpe', 'sortino', 'calmar', 'profit_factor', 'exposure_pct']
+    print(perf[[c for c in cols if c in perf.columns]].to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
 def print_portfolio_summary(data):
     """Print overall portfolio summary"""
     print(f"\n{'='*80}")
@@ -260,6 +241,7 @@ def main():
     
     # Print portfolio summary first
     print_portfolio_summary(data)
+    print_risk_metrics()
     
     # Print detailed trades for each ticker
     for ticker in sorted(data.keys()):
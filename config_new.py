@@ -36,6 +36,10 @@ EXTENDED_VERBOSE = True
 P_RANGE = [3, 4, 5, 6, 7, 8, 9, 10, 11, 12]        # Support/resistance period parameters
 TW_RANGE = [1, 2, 3, 4, 5, 6]       # Time window parameters
 FORCE_TW = None  # Set to an integer (e.g., 1) to force trade window; None disables forcing
+# Grids with more cells than this use the coarse-to-fine search (grid_search.py), e.g. P_RANGE = range(3, 101)
+OPT_EXHAUSTIVE_MAX_CELLS = 200
+OPT_COARSE_POINTS = 8      # Values per axis in the coarse round
+OPT_REFINE_TOP = 4         # Best cells whose neighbourhood is refined per round
 
 # 🧪 OPTIMIZATION STABILITY / PARSIMONY
 # Minimum number of trades required for a (p, tw) candidate to be considered stable
@@ -48,6 +52,8 @@ OPT_PARSIMONY_TW = True
 OPT_PREFER_MORE_TRADES = True
 # Set >0 to penalize high trade_window (regularization): effective_score = final_cap - OPT_TW_PENALTY * tw
 OPT_TW_PENALTY = 0.0
+# Neighbourhood radius for score smoothing before selection (1 = 3x3 mean over p/tw, 0 = raw scores)
+OPT_SMOOTH_RADIUS = 1
 
 # 🎯 TRADING EXECUTION SETTINGS
 LIMIT_ORDER_OFFSET = 0.01  # Price offset for limit orders (1 cent)
@@ -61,6 +67,8 @@ MARKET_OPEN_TIME = "09:30"
 MARKET_CLOSE_TIME = "16:00"
 OPEN_TRADE_DELAY = 5       # Minutes after market open to trade (was 10)
 CLOSE_TRADE_ADVANCE = 30   # Minutes before market close to trade (was 15)
+HALF_DAY_CLOSE_TIME = "13:00"   # Early close (July 3, day after Thanksgiving, Dec 24)
+TRADING_CALENDAR_YEARS = (2000, 2035)  # Sessions precomputed by trading_calendar.py (extends on demand)
 
 # 📊 IB CONNECTION SETTINGS
 IB_PAPER_PORT = 7497       # Paper trading port
@@ -73,12 +81,49 @@ IB_MAX_CONNECT_RETRIES = 3
 IB_RETRY_BACKOFF_SEC = 3
 IB_HEARTBEAT_SEC = 30
 IB_RECONNECT_ON_TIMEOUT = True
+CONTRACT_CACHE_FILE = 'contract_cache.json'  # Qualified IB contracts keyed by conID
+CONTRACT_CACHE_TTL_HOURS = 24 * 7            # Re-qualify cached contracts after this age
 
 # 🔧 PERFORMANCE SETTINGS
 MAX_WORKERS = 4            # Number of parallel workers for optimization
+OPT_PARALLEL = True        # Evaluate p/tw grid cells in a process pool (shared-memory prices)
 CACHE_RESULTS = True       # Cache backtest results
+PIPELINE_CACHE_DIR = '.pipeline_cache'  # Memoized backtest stages per ticker (pipeline.py)
+DATA_VALIDATION = True     # Check price data before backtesting (data_validation.py); failing tickers are skipped
+DATA_MAX_NAN_RUN = 10      # Consecutive NaN prices that fail a ticker
+DATA_MAX_GAP_DAYS = 10     # Consecutive missing trading sessions that fail a ticker
+DATA_JUMP_PCT = 0.5        # Close-to-close moves above this are reported (splits, bad ticks)
+DATA_VALIDATION_CACHE = '.validation_cache.json'  # Reports keyed by ticker and data fingerprint
+RESULTS_FILE = 'complete_comprehensive_backtest_results.json'  # Backtest export read by the CLI tools (results_store.py)
+RESULTS_FORMAT = "json"     # Backtest exports: "json" (indent=2), "ndjson" (compact, streamed per ticker, see results_export.py) or "both"
+MINUTE_DATA_FILE = '{ticker}_minute.csv'  # Minute bar store (data_sync.update_historical_data_minute)
+INTRADAY_CHUNK_ROWS = 200_000  # Rows per chunk for intraday resampling / extrema search
+LIVE_SIGNALS_FILE = 'live_signals.json'  # Published by live_signal_engine.py
+LIVE_SIGNALS_MAX_AGE_MIN = 10  # Traders ignore live signals older than this (falls back to the backtest)
+LIVE_POLL_SECONDS = 15    # Minute store poll interval of the live signal engine
+
+EVENT_LOG_DIR = 'logs'    # Append-only trader event log (event_log.py, events_YYYYMM.ndjson)
+
+# 🗂️ TICKER UNIVERSE
+UNIVERSE_FILE = 'universe.csv'  # CSV or .db/.sqlite registry (universe.py); built-in list if missing
+UNIVERSE_SHARD = ''            # "i/n" runs only shard i of n (env UNIVERSE_SHARD overrides)
 VERBOSE_LOGGING = False    # Detailed logging output
 
+# 🎲 MONTE CARLO (trade resampling)
+MC_SIMULATIONS = 5000      # Resampled paths per ticker/side and method
+MC_BLOCK_SIZE = 5          # Trades per block in the block bootstrap
+MC_BATCH_SIZE = 1000       # Paths simulated per NumPy batch (bounds memory)
+MC_SEED = 42               # Base seed; streams are derived per ticker/side/method
+
+# 📈 CHART RENDERING
+CHART_RENDER_MODE = "auto"  # "full" (all bars, SVG), "fast" (downsampled WebGL + zoom LOD), "auto" (fast above CHART_MAX_POINTS)
+CHART_MAX_POINTS = 2000     # Point budget per trace and level of detail in fast mode
+CHART_DOWNSAMPLE = "lttb"   # Line downsampling in fast mode: "lttb" or "minmax"
+CHART_AUTO_OPEN = True      # Open full-mode charts in the browser (fast mode always writes headlessly)
+CHART_WORKERS = 2           # Processes for the post-backtest chart stage
+CHART_MANIFEST_FILE = 'chart_manifest.json'  # Input fingerprints of the last rendered charts
+CHART_JOBS_FILE = 'chart_jobs.pkl'           # Hand-off file for the detached chart stage
+
 # 📝 FILE PATHS
 RESULTS_DIR = 'results'
 CHARTS_DIR = 'charts'  
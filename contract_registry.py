@@ -0,0 +1,164 @@
+"""Contract registry: qualify every instrument once and hand out ready contracts.
+
+All order and price paths used to build ``Stock(symbol, "SMART", "USD")`` and
+call ``ib.qualifyContracts`` before each request. The registry resolves a
+symbol via its ``conID`` from ``tickers_config``, qualifies it once, keeps the
+result in memory and persists the qualified details to CONTRACT_CACHE_FILE
+(keyed by conID). Entries older than CONTRACT_CACHE_TTL_HOURS are re-qualified
+on next use, so the OPEN/CLOSE windows normally run without any qualification
+round-trip.
+"""
+import json
+import os
+import time
+
+from ib_insync import Contract, Stock
+
+from tickers_config import tickers
+from config import CONTRACT_CACHE_FILE, CONTRACT_CACHE_TTL_HOURS
+
+# Contract fields that are persisted and used to rebuild a qualified contract
+_PERSISTED_FIELDS = (
+    "secType", "conId", "symbol", "exchange", "primaryExchange",
+    "currency", "localSymbol", "tradingClass",
+)
+
+
+class ContractRegistry:
+    def __init__(self, cache_file=CONTRACT_CACHE_FILE, ttl_hours=CONTRACT_CACHE_TTL_HOURS, ticker_config=None):
+        self.cache_file = cache_file
+        self.ttl_sec = float(ttl_hours) * 3600
+        self.ticker_config = ticker_config if ticker_config is not None else tickers
+        self._entries = {}    # cache key -> {"contract": {...}, "qualified_at": epoch seconds}
+        self._contracts = {}  # symbol -> Contract (in-process, already built)
+        self._load()
+
+    # ── persistence ──────────────────────────────────────────────────────────
+    def _load(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._entries = data
+        except Exception as e:
+            print(f"WARN contract cache {self.cache_file} unreadable, starting empty: {e}")
+            self._entries = {}
+
+    def _save(self):
+        if not self.cache_file:
+            return
+        tmp = f"{self.cache_file}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(tmp, self.cache_file)
+        except Exception as e:
+            print(f"WARN could not persist contract cache: {e}")
+
+    # ── helpers ──────────────────────────────────────────────────────────────
+    def _key(self, symbol):
+        cfg = self.ticker_config.get(symbol) or {}
+        con_id = cfg.get("conID")
+        return str(con_id) if con_id else f"SYM:{symbol}"
+
+    def _is_fresh(self, entry):
+        return (time.time() - entry.get("qualified_at", 0)) < self.ttl_sec
+
+    def _unqualified(self, symbol):
+        cfg = self.ticker_config.get(symbol) or {}
+        con_id = cfg.get("conID")
+        if con_id:
+            return Contract(conId=int(con_id), exchange="SMART", currency="USD")
+        return Stock(cfg.get("symbol", symbol), "SMART", "USD")
+
+    def _remember(self, symbol, contract):
+        details = {f: getattr(contract, f, "") for f in _PERSISTED_FIELDS}
+        # Route via SMART regardless of the listing exchange returned by IB
+        details["exchange"] = "SMART"
+        self._entries[self._key(symbol)] = {"contract": details, "qualified_at": time.time()}
+        built = Contract.create(**details)
+        self._contracts[symbol] = built
+        return built
+
+    # ── public API ───────────────────────────────────────────────────────────
+    def is_cached(self, symbol) -> bool:
+        entry = self._entries.get(self._key(symbol))
+        return bool(entry) and self._is_fresh(entry)
+
+    def get(self, ib, symbol):
+        """Return a qualified contract for symbol, qualifying via ib only when needed.
+
+        ib may be None (offline); the cached (even stale) contract or an
+        unqualified conID contract is returned in that case.
+        """
+        entry = self._entries.get(self._key(symbol))
+        if entry and self._is_fresh(entry):
+            contract = self._contracts.get(symbol)
+            if contract is None:
+                contract = Contract.create(**entry["contract"])
+                self._contracts[symbol] = contract
+            return contract
+
+        qualified = self._qualify(ib, [symbol])
+        if symbol in qualified:
+            self._save()
+            return qualified[symbol]
+        if entry:
+            # Stale but usable: better than no contract while IB is unavailable
+            return Contract.create(**entry["contract"])
+        return self._unqualified(symbol)
+
+    def prefetch(self, ib, symbols=None) -> int:
+        """Qualify all missing/stale symbols in one batch call. Returns count refreshed."""
+        symbols = list(symbols) if symbols is not None else list(self.ticker_config.keys())
+        stale = [s for s in symbols if not self.is_cached(s)]
+        if not stale:
+            return 0
+        qualified = self._qualify(ib, stale)
+        if qualified:
+            self._save()
+        return len(qualified)
+
+    def invalidate(self, symbol=None):
+        if symbol is None:
+            self._entries.clear()
+            self._contracts.clear()
+        else:
+            self._entries.pop(self._key(symbol), None)
+            self._contracts.pop(symbol, None)
+        self._save()
+
+    def _qualify(self, ib, symbols):
+        if ib is None or not symbols:
+            return {}
+        raw = [self._unqualified(s) for s in symbols]
+        try:
+            ib.qualifyContracts(*raw)
+        except Exception as e:
+            print(f"WARN qualifyContracts failed for {symbols}: {e}")
+            return {}
+        result = {}
+        for symbol, contract in zip(symbols, raw):
+            # qualifyContracts fills the passed objects in place; conId stays 0 on failure
+            if getattr(contract, "conId", 0) and getattr(contract, "symbol", ""):
+                result[symbol] = self._remember(symbol, contract)
+            else:
+                print(f"WARN could not qualify contract for {symbol}")
+        return result
+
+
+_registry = None
+
+
+def get_registry() -> ContractRegistry:
+    global _registry
+    if _registry is None:
+        _registry = ContractRegistry()
+    return _registry
+
+
+def get_contract(ib, symbol):
+    """Shortcut for get_registry().get(ib, symbol)."""
+    return get_registry().get(ib, symbol)
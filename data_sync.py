@@ -6,16 +6,11 @@ from ib_insync import Stock
 
 from tickers_config      import tickers
 from trade_execution     import get_realtime_price, get_yf_price, calculate_shares
-from signal_utils        import (
-    calculate_support_resistance,
-    assign_long_signals_extended, assign_short_signals_extended,
-    update_level_close_long,  update_level_close_short
-)
-from simulation_utils    import simulate_trades_compound_extended
 from matching_utils      import match_trades
 from print_utils         import print_matched_long_trades, print_matched_short_trades
-from backtesting_core    import berechne_best_p_tw_long, berechne_best_p_tw_short
 from backtesting_core import update_historical_data_csv
+from backtest_engine     import load_stage, run_ticker
+from trade_table         import as_frame
  
 COMMISSION_RATE    = 0.0018
 MIN_COMMISSION     = 1.0
@@ -132,63 +127,24 @@ def run_full_backtest(ib, report_dir):
         # Daten laden/aktualisieren
         fn = f"{ticker}_data.csv"
         c  = Stock(cfg["symbol"], "SMART", "USD")
-        if os.path.exists(fn):
-            df = pd.read_csv(fn, parse_dates=["date"], index_col="date")
-        else:
-            df = update_historical_data_csv(ib, c, fn)
-        df.sort_index(inplace=True)
-        df.rename(columns={"open":"Open","high":"High","low":"Low","close":"Close"}, inplace=True)
-
-        artificial_close_price = df["Close"].iloc[-1]
-        artificial_close_date  = df.index[-1]
-
-        # Long optimieren + simulieren
-    p_long, tw_long = berechne_best_p_tw_long(df, cfg, backtesting_begin, backtesting_end)
-    price_col = "Open" if cfg.get("trade_on", "Close").lower() == "open" else "Close"
-    sup_long, res_long = calculate_support_resistance(df, p_long, tw_long, price_col=price_col)
-    ext_long = assign_long_signals_extended(sup_long, res_long, df, tw_long, "1d")
-    ext_long = update_level_close_long(ext_long, df)
-    # Re-opt with full range
-    p_long, tw_long = berechne_best_p_tw_long(df, cfg)
-    price_col = "Open" if cfg.get("trade_on", "Close").lower() == "open" else "Close"
-    sup_long, res_long = calculate_support_resistance(df, p_long, tw_long, price_col=price_col)
-    ext_long = assign_long_signals_extended(sup_long, res_long, df, tw_long, "1d")
-    ext_long = update_level_close_long(ext_long, df)
-    cap_long, trades_long = simulate_trades_compound_extended(
-        ext_long, df, cfg,
-        commission_rate=COMMISSION_RATE,
-        min_commission=MIN_COMMISSION,
-        round_factor=cfg.get("order_round_factor", ORDER_ROUND_FACTOR),
-        artificial_close_price=artificial_close_price,
-        artificial_close_date=artificial_close_date,
-        direction="long"
-    )
+        df = load_stage(ticker) if os.path.exists(fn) else load_stage(ticker, update_historical_data_csv(ib, c, fn))
 
-        # Short optimieren + simulieren
-    p_short, tw_short = berechne_best_p_tw_short(df, cfg, backtesting_begin, backtesting_end)
-    price_col = "Open" if cfg.get("trade_on", "Close").lower() == "open" else "Close"
-    sup_short, res_short = calculate_support_resistance(df, p_short, tw_short, price_col=price_col)
-    ext_short = assign_short_signals_extended(sup_short, res_short, df, tw_short, "1d")
-    ext_short = update_level_close_short(ext_short, df)
-    cap_short, trades_short = simulate_trades_compound_extended(
-        ext_short, df, cfg,
-        commission_rate=COMMISSION_RATE,
-        min_commission=MIN_COMMISSION,
-        round_factor=cfg.get("order_round_factor", ORDER_ROUND_FACTOR),
-        artificial_close_price=artificial_close_price,
-        artificial_close_date=artificial_close_date,
-        direction="short"
-    )
+        # Optimieren + simulieren (Long/Short, backtest_engine); artificial close = letzter Close
+        bt = run_ticker(ticker, cfg, df=df, last_price_col="Close", verbose=False)
+        if bt is None:
+            continue
+        trades_long  = bt.long.trades if bt.long else []
+        trades_short = bt.short.trades if bt.short else []
 
         # CSV export
-    pd.DataFrame(trades_long ).to_csv(f"{report_dir}/trades_long_{ticker}.csv",  index=False)
-    pd.DataFrame(trades_short).to_csv(f"{report_dir}/trades_short_{ticker}.csv", index=False)
-    print(f"{ticker}: Trades gespeichert.")
+        as_frame(trades_long ).to_csv(f"{report_dir}/trades_long_{ticker}.csv",  index=False)
+        as_frame(trades_short).to_csv(f"{report_dir}/trades_short_{ticker}.csv", index=False)
+        print(f"{ticker}: Trades gespeichert.")
 
         # Ausgabe
-    matched_long  = match_trades(trades_long,  side="long")
-    matched_short = match_trades(trades_short, side="short")
-    print_matched_long_trades(matched_long,  ticker)
-    print_matched_short_trades(matched_short, ticker)
+        matched_long  = match_trades(trades_long,  side="long")
+        matched_short = match_trades(trades_short, side="short")
+        print_matched_long_trades(matched_long,  ticker)
+        print_matched_short_trades(matched_short, ticker)
 
     print("\nBacktest abgeschlossen.")
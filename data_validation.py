@@ -0,0 +1,254 @@
+"""Data-quality checks for price frames before a backtest.
+
+Every check is a vectorized pass over the frame (no per-date loop):
+
+    columns       required OHLC columns missing                        error
+    empty         no rows                                              error
+    unsorted      index not ascending                                  warning
+    duplicates    repeated timestamps (load_stage keeps the last)      warning
+    nan_run       NaN prices; a run of DATA_MAX_NAN_RUN bars           warning / error
+    non_positive  prices <= 0                                          error
+    ohlc          High < Low, or Open/Close outside [Low, High]        warning
+    jumps         |close-to-close move| > DATA_JUMP_PCT                warning
+    gaps          NYSE sessions missing (trading_calendar); a run longer
+                  than DATA_MAX_GAP_DAYS sessions                      warning / error
+
+validate() returns a DataReport; report.ok is False when any check is an
+error and backtest_engine.run_ticker skips the ticker before optimizing.
+Reports are cached per data fingerprint (content hash + settings) in memory
+and in DATA_VALIDATION_CACHE, so unchanged files are not re-checked.
+
+    python data_validation.py            # report for every ticker
+    python data_validation.py AAPL MSFT --all-issues
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from chart_stage import _digest
+from trading_calendar import sessions_between
+from config import DATA_MAX_NAN_RUN, DATA_MAX_GAP_DAYS, DATA_JUMP_PCT, DATA_VALIDATION_CACHE
+
+PRICE_COLUMNS = ("Open", "High", "Low", "Close")
+_EXAMPLES = 5
+
+_memo = {}
+_disk = {}
+
+
+class DataReport:
+    """Result of validate(): issues maps check name -> {severity, count, detail, dates}."""
+
+    def __init__(self, ticker, fingerprint, rows, start=None, end=None, issues=None):
+        self.ticker = ticker
+        self.fingerprint = fingerprint
+        self.rows = rows
+        self.start = start
+        self.end = end
+        self.issues = issues or {}
+
+    @property
+    def errors(self):
+        return [name for name, i in self.issues.items() if i["severity"] == "error"]
+
+    @property
+    def warnings(self):
+        return [name for name, i in self.issues.items() if i["severity"] == "warning"]
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def summary(self):
+        if not self.issues:
+            return "ok"
+        return "; ".join(f"{name}: {i['detail']}" for name, i in self.issues.items())
+
+    def to_dict(self):
+        return {"ticker": self.ticker, "fingerprint": self.fingerprint, "rows": self.rows,
+                "start": self.start, "end": self.end, "issues": self.issues}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["ticker"], d["fingerprint"], d["rows"], d.get("start"), d.get("end"), d.get("issues"))
+
+    def __repr__(self):
+        state = "ok" if self.ok else "FAILED"
+        return f"DataReport({self.ticker}, {self.rows} rows, {state}, {len(self.issues)} issues)"
+
+
+def expected_sessions(start, end):
+    """NYSE sessions between start and end (trading_calendar)."""
+    return sessions_between(start, end)
+
+
+def _runs(mask):
+    """Start positions and lengths of the True runs of a boolean array."""
+    edges = np.diff(np.concatenate(([0], np.asarray(mask, dtype=np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    return starts, np.flatnonzero(edges == -1) - starts
+
+
+def _dates(index, mask):
+    return [str(pd.Timestamp(d).date()) for d in index[np.asarray(mask)][:_EXAMPLES]]
+
+
+def _issue(issues, name, severity, count, detail, dates=()):
+    issues[name] = {"severity": severity, "count": int(count), "detail": detail, "dates": list(dates)}
+
+
+def check_frame(df, price_col="Close"):
+    """All checks on one frame (OHLC columns already capitalized). Returns the issues dict."""
+    issues = {}
+    missing = [c for c in ("Open", "Close") if c not in df.columns]
+    if price_col not in df.columns and price_col not in missing:
+        missing.append(price_col)
+    if missing:
+        _issue(issues, "columns", "error", len(missing), f"missing {missing}")
+        return issues
+    if df.empty:
+        _issue(issues, "empty", "error", 0, "no rows")
+        return issues
+
+    idx = pd.DatetimeIndex(df.index)
+    if not idx.is_monotonic_increasing:
+        _issue(issues, "unsorted", "warning", 1, "index not ascending")
+        order = np.argsort(idx.values, kind="stable")
+        df, idx = df.iloc[order], idx[order]
+    dup = idx.duplicated(keep="last")
+    if dup.any():
+        _issue(issues, "duplicates", "warning", dup.sum(), f"{dup.sum()} repeated timestamps", _dates(idx, dup))
+        df, idx = df[~dup], idx[~dup]
+
+    cols = [c for c in PRICE_COLUMNS if c in df.columns]
+    prices = df[cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    main = prices[:, cols.index(price_col)]
+
+    nan = np.isnan(main)
+    if nan.any():
+        starts, lengths = _runs(nan)
+        longest = int(lengths.max())
+        severity = "error" if longest >= DATA_MAX_NAN_RUN else "warning"
+        first = idx[starts[lengths.argmax()]].date()
+        _issue(issues, "nan_run", severity, nan.sum(),
+               f"{nan.sum()} NaN {price_col} prices, longest run {longest} bars from {first}", _dates(idx, nan))
+
+    non_pos = (prices <= 0).any(axis=1)
+    if non_pos.any():
+        _issue(issues, "non_positive", "error", non_pos.sum(), f"{non_pos.sum()} bars with prices <= 0",
+               _dates(idx, non_pos))
+
+    if {"High", "Low"} <= set(cols):
+        o, h, l, c = (prices[:, cols.index(k)] for k in PRICE_COLUMNS)
+        with np.errstate(invalid="ignore"):
+            bad = (h < l) | (np.fmax(o, c) > h) | (np.fmin(o, c) < l)
+        if bad.any():
+            _issue(issues, "ohlc", "warning", bad.sum(), f"{bad.sum()} bars with Open/Close outside High/Low",
+                   _dates(idx, bad))
+
+    close = prices[:, cols.index("Close")]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        move = np.abs(close[1:] / close[:-1] - 1)
+    jump = np.concatenate(([False], move > DATA_JUMP_PCT))
+    if jump.any():
+        _issue(issues, "jumps", "warning", jump.sum(),
+               f"{jump.sum()} close-to-close moves above {DATA_JUMP_PCT:.0%}", _dates(idx, jump))
+
+    days = idx.normalize()
+    if days.tz is not None:
+        days = days.tz_localize(None)
+    sessions = expected_sessions(days[0], days[-1])
+    absent = ~sessions.isin(days)
+    if absent.any():
+        starts, lengths = _runs(absent)
+        longest = int(lengths.max())
+        severity = "error" if longest > DATA_MAX_GAP_DAYS else "warning"
+        first = sessions[starts[lengths.argmax()]].date()
+        _issue(issues, "gaps", severity, absent.sum(),
+               f"{absent.sum()} missing sessions, longest gap {longest} from {first}", _dates(sessions, absent))
+    return issues
+
+
+def fingerprint(df, price_col="Close"):
+    """Content hash of the frame plus the check settings."""
+    settings = [price_col, DATA_MAX_NAN_RUN, DATA_MAX_GAP_DAYS, DATA_JUMP_PCT, len(df), "nyse"]
+    return hashlib.sha1((_digest(df) + json.dumps(settings)).encode()).hexdigest()
+
+
+def _load_disk(path):
+    if path not in _disk:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                _disk[path] = json.load(f)
+        except (OSError, ValueError):
+            _disk[path] = {}
+    return _disk[path]
+
+
+def _save_disk(path):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_disk[path], f)
+    os.replace(tmp, path)
+
+
+def validate(df, ticker="", price_col="Close", use_cache=True, cache_file=DATA_VALIDATION_CACHE):
+    """DataReport for a price frame; cached per fingerprint."""
+    fp = fingerprint(df, price_col)
+    if use_cache:
+        hit = _memo.get(fp)
+        if hit is None:
+            stored = _load_disk(cache_file).get(ticker)
+            if stored and stored.get("fingerprint") == fp:
+                hit = _memo[fp] = DataReport.from_dict(stored)
+        if hit is not None:
+            return DataReport.from_dict(dict(hit.to_dict(), ticker=ticker))
+
+    issues = check_frame(df, price_col)
+    start = str(pd.Timestamp(df.index.min()).date()) if len(df) else None
+    end = str(pd.Timestamp(df.index.max()).date()) if len(df) else None
+    report = DataReport(ticker, fp, len(df), start, end, issues)
+    if use_cache:
+        _memo[fp] = report
+        if ticker:
+            _load_disk(cache_file)[ticker] = report.to_dict()
+            try:
+                _save_disk(cache_file)
+            except OSError as e:
+                print(f"WARN validation cache not written: {e}")
+    return report
+
+
+def validate_all(tickers=None, use_cache=True):
+    """validate() for every ticker's data file. Returns {ticker: DataReport} (None without file)."""
+    from backtest_engine import price_column, read_stage
+    if tickers is None:
+        from tickers_config import tickers
+    out = {}
+    for ticker, cfg in tickers.items():
+        df = read_stage(ticker)
+        out[ticker] = None if df is None else validate(df, ticker, price_column(cfg), use_cache)
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+    from tickers_config import tickers as universe
+
+    parser = argparse.ArgumentParser(description="Validate the daily price files")
+    parser.add_argument("tickers", nargs="*", help="Tickers (default: all)")
+    parser.add_argument("--all-issues", action="store_true", help="Also list warnings of valid tickers")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    selected = {t: universe[t] for t in args.tickers} if args.tickers else universe
+    for ticker, report in validate_all(selected, use_cache=not args.no_cache).items():
+        if report is None:
+            print(f"{ticker:>8}: no data file")
+        elif not report.ok or args.all_issues:
+            print(f"{ticker:>8}: {'ok' if report.ok else 'FAILED'} ({report.rows} rows) {report.summary()}")
+        else:
+            print(f"{ticker:>8}: ok ({report.rows} rows, {len(report.warnings)} warnings)")
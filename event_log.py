@@ -0,0 +1,175 @@
+"""Append-only event log for the traders (NDJSON, one file per month).
+
+Session results, order events and state transitions used to be written by
+loading a JSON list, appending one entry and rewriting the whole file. Here
+every event is a single appended line, so logging cost does not grow with
+history:
+
+    log_event("session", session_type="OPEN", signals_found=3, orders_created=2, orders_successful=2)
+    log_event("order", session_type="OPEN", ticker="AAPL", action="BUY", shares=5, ok=True)
+    log_event("state", trader="auto_daily", open_executed=True, close_executed=False)
+
+Files are EVENT_LOG_DIR/events_YYYYMM.ndjson; queries with since/until only
+open the months they need, and last_event() scans the newest file backwards.
+
+Cut-over: import_legacy_state() copies the old auto_daily_state.json and
+executed_orders.json into the log once (files are renamed to *.migrated), so
+a restart on the switch-over day neither repeats a session nor re-sends an
+order. The old per-day session lists (trading_sessions_*.json,
+logs/sessions_*.json) are history only and stay where they are.
+
+    python event_log.py --kind session --by date session_type --since 2024-01-01
+"""
+import glob
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from config import EVENT_LOG_DIR
+
+_BLOCK = 64 * 1024
+
+
+def _month_file(month, log_dir=EVENT_LOG_DIR):
+    return os.path.join(log_dir, f"events_{month}.ndjson")
+
+
+def log_event(kind, ts=None, log_dir=EVENT_LOG_DIR, **fields):
+    """Append one event; returns the record written."""
+    ts = ts or datetime.now()
+    record = {"ts": ts.isoformat(timespec="seconds"), "date": ts.strftime("%Y-%m-%d"), "kind": kind}
+    record.update(fields)
+    os.makedirs(log_dir, exist_ok=True)
+    line = json.dumps(record, default=str, separators=(",", ":")) + "\n"
+    with open(_month_file(ts.strftime("%Y%m"), log_dir), "a", encoding="utf-8") as f:
+        f.write(line)
+    return record
+
+
+def _files(since=None, until=None, log_dir=EVENT_LOG_DIR):
+    lo = since.replace("-", "")[:6] if since else None
+    hi = until.replace("-", "")[:6] if until else None
+    out = []
+    for fn in sorted(glob.glob(os.path.join(log_dir, "events_*.ndjson"))):
+        month = os.path.basename(fn)[7:13]
+        if (lo and month < lo) or (hi and month > hi):
+            continue
+        out.append(fn)
+    return out
+
+
+def _matches(rec, kind, since, until, filters):
+    if kind and rec.get("kind") != kind:
+        return False
+    if since and rec.get("date", "") < since:
+        return False
+    if until and rec.get("date", "") > until:
+        return False
+    return all(rec.get(k) == v for k, v in filters.items())
+
+
+def read_events(kind=None, since=None, until=None, log_dir=EVENT_LOG_DIR, **filters):
+    """Iterate events (oldest first); since/until are inclusive YYYY-MM-DD dates."""
+    for fn in _files(since, until, log_dir):
+        with open(fn, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn last line after a crash
+                if _matches(rec, kind, since, until, filters):
+                    yield rec
+
+
+def _reversed_lines(fn):
+    with open(fn, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos, rest = f.tell(), b""
+        while pos > 0:
+            step = min(_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + rest).split(b"\n")
+            rest = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line
+        if rest:
+            yield rest
+
+
+def last_event(kind=None, since=None, log_dir=EVENT_LOG_DIR, **filters):
+    """Most recent matching event (reads files backwards), or None."""
+    for fn in reversed(_files(since, None, log_dir)):
+        for line in _reversed_lines(fn):
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if _matches(rec, kind, since, None, filters):
+                return rec
+    return None
+
+
+def import_legacy_state(trader, state_file="auto_daily_state.json",
+                        executed_orders_file="executed_orders.json", log_dir=EVENT_LOG_DIR):
+    """One-time import of the former JSON state files as state/order events; returns the events written."""
+    written = 0
+    if os.path.exists(state_file):
+        with open(state_file, "r") as f:
+            data = json.load(f)
+        if data.get("date"):
+            log_event("state", ts=datetime.strptime(data["date"], "%Y-%m-%d"), log_dir=log_dir,
+                      trader=trader, session_date=data["date"], migrated=True,
+                      open_executed=bool(data.get("open_executed", False)),
+                      close_executed=bool(data.get("close_executed", False)))
+            written += 1
+        os.replace(state_file, state_file + ".migrated")
+    if os.path.exists(executed_orders_file):
+        with open(executed_orders_file, "r") as f:
+            keys = json.load(f)
+        for key in sorted(keys):
+            # Schlüssel: date|session|ticker|action
+            parts = key.split("|")
+            if len(parts) != 4:
+                continue
+            day, session_type, ticker, action = parts
+            log_event("order", ts=datetime.strptime(day, "%Y-%m-%d"), log_dir=log_dir, trader=trader,
+                      key=key, session_type=session_type, ticker=ticker, action=action, ok=True, migrated=True)
+            written += 1
+        os.replace(executed_orders_file, executed_orders_file + ".migrated")
+    return written
+
+
+def rollup(kind="session", by=("date",), since=None, until=None, log_dir=EVENT_LOG_DIR, **filters):
+    """Event count and sums of numeric/bool fields grouped by `by` columns."""
+    df = pd.DataFrame(list(read_events(kind, since, until, log_dir, **filters)))
+    by = [c for c in by if c in df.columns]
+    if df.empty or not by:
+        return pd.DataFrame()
+    numeric = [c for c in df.columns if c not in by and c not in ("ts", "date", "kind")
+               and (pd.api.types.is_numeric_dtype(df[c]) or pd.api.types.is_bool_dtype(df[c]))]
+    out = df.groupby(by, sort=True)[numeric].sum()
+    out.insert(0, "events", df.groupby(by, sort=True).size())
+    return out.reset_index()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the trader event log")
+    parser.add_argument("--kind", default="session", help="session, order, state, ...")
+    parser.add_argument("--by", nargs="+", default=["date"], help="Group columns")
+    parser.add_argument("--since")
+    parser.add_argument("--until")
+    parser.add_argument("--raw", action="store_true", help="Print matching events instead of a rollup")
+    args = parser.parse_args()
+
+    if args.raw:
+        for rec in read_events(args.kind, args.since, args.until):
+            print(json.dumps(rec, default=str))
+    else:
+        table = rollup(args.kind, args.by, args.since, args.until)
+        print(table.to_string(index=False) if not table.empty else "No events")
@@ -0,0 +1,103 @@
+"""Causal support/resistance detection, one bar at a time.
+
+calculate_support_resistance marks bar i as support when its price is strictly
+below every other price in [i-order, i+order] (argrelextrema, order = p+tw).
+That needs `order` future bars, so a level only becomes *knowable* at bar
+i+order. StreamingExtremaDetector applies the same strict test but emits each
+level at exactly that bar, together with its confirmation timestamp:
+
+    det = StreamingExtremaDetector(order=p + tw)
+    for ts, price in prices.items():
+        for ev in det.update(ts, price):
+            ...  # {"type": "support", "date": level bar, "level": price, "confirmed_at": ts, ...}
+
+Two monotonic deques (min and max) over the last 2*order+1 bars make every
+update O(1) amortized. No global min/max is injected, so a backtest over
+history and the live bar-by-bar pass produce the same levels. Interior levels
+are identical to argrelextrema; levels in the last `order` bars are simply
+not confirmed yet.
+"""
+from collections import deque
+
+import pandas as pd
+
+
+class _MonotonicWindow:
+    """Sliding window extreme over the last `size` bars with strictness bookkeeping."""
+
+    def __init__(self, order, is_min):
+        self.order = order
+        self.better = (lambda a, b: a < b) if is_min else (lambda a, b: a > b)
+        self.dq = deque()   # (bar number, price); strictly monotonic, latest of equal prices kept
+        self.ties = {}      # bar number -> an equal price precedes it within `order` bars
+
+    def push(self, n, price):
+        tie = False
+        while self.dq and not self.better(self.dq[-1][1], price):
+            j, v = self.dq.pop()
+            if v == price and j >= n - self.order:
+                tie = True
+            self.ties.pop(j, None)
+        self.dq.append((n, price))
+        self.ties[n] = tie
+
+    def evict_before(self, first):
+        while self.dq and self.dq[0][0] < first:
+            j, _ = self.dq.popleft()
+            self.ties.pop(j, None)
+
+    def is_strict_extreme(self, n):
+        return bool(self.dq) and self.dq[0][0] == n and not self.ties.get(n, False)
+
+
+class StreamingExtremaDetector:
+    """Confirms support (strict local min) and resistance (strict local max) levels causally."""
+
+    def __init__(self, order):
+        self.order = max(int(order), 1)
+        self.n = -1                      # number of the last bar seen
+        self.bars = deque(maxlen=self.order + 1)  # (bar number, timestamp, price) of pending centres
+        self._min = _MonotonicWindow(self.order, is_min=True)
+        self._max = _MonotonicWindow(self.order, is_min=False)
+
+    def update(self, ts, price):
+        """Feed one bar; returns the levels confirmed by it (usually none)."""
+        if price is None or price != price:  # NaN bars neither confirm nor break levels
+            return []
+        self.n += 1
+        n = self.n
+        self.bars.append((n, ts, float(price)))
+        self._min.push(n, float(price))
+        self._max.push(n, float(price))
+
+        centre = n - self.order
+        if centre < 1:  # bar 0 is never an extremum (argrelextrema clip semantics)
+            return []
+        first = centre - self.order
+        self._min.evict_before(first)
+        self._max.evict_before(first)
+
+        c_n, c_ts, c_price = self.bars[0]
+        events = []
+        for kind, window in (("support", self._min), ("resistance", self._max)):
+            if window.is_strict_extreme(c_n):
+                events.append({
+                    "type": kind, "date": c_ts, "level": c_price,
+                    "confirmed_at": ts, "bar": c_n, "confirmed_bar": n,
+                })
+        return events
+
+    def run(self, prices):
+        """Feed a whole Series (index = timestamps); returns all events as a DataFrame."""
+        events = []
+        for ts, price in prices.items():
+            events.extend(self.update(ts, price))
+        return pd.DataFrame(events, columns=["type", "date", "level", "confirmed_at", "bar", "confirmed_bar"])
+
+
+def detect_levels(df, past_window, trade_window, price_col="Close"):
+    """Causal support/resistance events for a price frame (see StreamingExtremaDetector)."""
+    if price_col not in df.columns:
+        price_col = "Close"
+    detector = StreamingExtremaDetector(int(past_window + trade_window))
+    return detector.run(df[price_col])
@@ -16,33 +16,15 @@ symbol's daily data file for that date. If price missing -> None.
 """
 import os
 import json
-from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
+from price_lookup import at_or_after
+from trading_calendar import recent_sessions
 from tickers_config import tickers
 
-US_HOLIDAYS_2025 = {
-    "2025-01-01","2025-01-20","2025-02-17","2025-04-18","2025-05-26",
-    "2025-06-19","2025-07-04","2025-09-01","2025-11-27","2025-12-25"
-}
-
-def is_trading_day(d: datetime) -> bool:
-    if d.weekday() >= 5:
-        return False
-    if d.strftime('%Y-%m-%d') in US_HOLIDAYS_2025:
-        return False
-    return True
-
 def get_recent_trading_days(n: int = 14) -> list[str]:
-    days = []
-    cur = datetime.now()
-    # If today not trading day, back up to last trading day
-    while not is_trading_day(cur):
-        cur -= timedelta(days=1)
-    while len(days) < n:
-        if is_trading_day(cur):
-            days.append(cur.strftime('%Y-%m-%d'))
-        cur -= timedelta(days=1)
-    return sorted(days)  # chronological
+    """Last n NYSE sessions up to today (chronological)."""
+    return [d.strftime('%Y-%m-%d') for d in recent_sessions(n)]
 
 def load_daily_prices(symbol: str) -> pd.DataFrame | None:
     fn = f"{symbol}_data.csv"
@@ -102,25 +84,17 @@ def enrich_prices(trade_map: dict[str, list], symbol: str, cfg: dict, daily_df):
     if daily_df is None or daily_df.empty:
         return
     col = 'Open' if cfg.get('trade_on','Open').lower() == 'open' else 'Close'
-    for d, lst in trade_map.items():
-        if not lst:
-            continue
-        try:
-            # daily_df index is Timestamp
-            ts = pd.Timestamp(d)
-            if ts in daily_df.index:
-                px = daily_df.at[ts, col]
-            else:
-                # forward fill attempt via searchsorted
-                idx = daily_df.index.searchsorted(ts)
-                if idx < len(daily_df.index):
-                    px = daily_df.iloc[idx][col]
-                else:
-                    px = None
-        except Exception:
-            px = None
-        for tr in lst:
-            tr['price'] = float(px) if px is not None and pd.notna(px) else None
+    days = [d for d, lst in trade_map.items() if lst]
+    if not days:
+        return
+    try:
+        # price at the date or the next bar after it, for all days at once
+        prices = at_or_after(daily_df, days, col)
+    except Exception:
+        prices = [np.nan] * len(days)
+    for d, px in zip(days, prices):
+        for tr in trade_map[d]:
+            tr['price'] = float(px) if pd.notna(px) else None
             tr['trade_on'] = col.upper()
 
 def build_last14():
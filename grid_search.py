@@ -0,0 +1,95 @@
+"""(p, tw) search over the configured grids (P_RANGE x TW_RANGE, FORCE_TW).
+
+Small grids are evaluated exhaustively. Grids with more than
+OPT_EXHAUSTIVE_MAX_CELLS cells (e.g. p up to 100, tw up to 30) use a
+coarse-to-fine search on the index lattice of the two ranges:
+
+1. coarse round: about OPT_COARSE_POINTS values per axis (always including
+   both ends of each range)
+2. refine rounds: the step is halved and only the neighbourhoods of the
+   OPT_REFINE_TOP best cells so far are evaluated; every other region is
+   pruned, until the step is 1.
+
+A 98 x 30 grid (2940 cells) typically needs 200-300 evaluations. The
+evaluator is a batch callback (cells -> result rows), so the caller decides
+on serial or pooled execution per round.
+"""
+import math
+
+from config import (P_RANGE, TW_RANGE, FORCE_TW,
+                    OPT_EXHAUSTIVE_MAX_CELLS, OPT_COARSE_POINTS, OPT_REFINE_TOP)
+
+
+def configured_axes(p_values=None, tw_values=None):
+    """Sorted p and tw axes from the config (FORCE_TW pins tw)."""
+    p_axis = sorted(set(int(p) for p in (p_values if p_values is not None else P_RANGE)))
+    if tw_values is None:
+        tw_values = [FORCE_TW] if FORCE_TW else TW_RANGE
+    tw_axis = sorted(set(int(tw) for tw in tw_values))
+    return p_axis, tw_axis
+
+
+def full_grid(p_axis, tw_axis):
+    return [(p, tw) for p in p_axis for tw in tw_axis]
+
+
+def grid_axes(grid):
+    """Sorted p and tw values of a (p, tw) grid."""
+    return sorted({p for p, _ in grid}), sorted({tw for _, tw in grid})
+
+
+def _lattice(n, step):
+    idx = list(range(0, n, step))
+    if idx[-1] != n - 1:
+        idx.append(n - 1)
+    return idx
+
+
+def coarse_to_fine(evaluate, p_axis, tw_axis, keys=("final_cap",), coarse_points=OPT_COARSE_POINTS,
+                   top=OPT_REFINE_TOP):
+    """Coarse-to-fine search; returns the evaluated rows in grid order.
+
+    evaluate(cells) -> rows with past_window, trade_window and the score keys.
+    keys: score columns to maximize; the neighbourhoods of the best cells of
+    every key are refined (one evaluation serves all keys).
+    """
+    n_p, n_tw = len(p_axis), len(tw_axis)
+    step_p = max(1, math.ceil(n_p / coarse_points))
+    step_tw = max(1, math.ceil(n_tw / coarse_points))
+    seen = {}
+
+    def run(index_cells):
+        todo = sorted(c for c in set(index_cells) if c not in seen)
+        if not todo:
+            return
+        rows = evaluate([(p_axis[i], tw_axis[j]) for i, j in todo])
+        for cell, row in zip(todo, rows):
+            seen[cell] = row
+
+    run([(i, j) for i in _lattice(n_p, step_p) for j in _lattice(n_tw, step_tw)])
+    while step_p > 1 or step_tw > 1:
+        step_p, step_tw = max(1, step_p // 2), max(1, step_tw // 2)
+        best = set()
+        for key in keys:
+            scored = [(row[key], cell) for cell, row in seen.items() if row.get(key) is not None]
+            # höchster Wert zuerst, bei Gleichstand die kleinere Zelle
+            scored.sort(key=lambda x: (-x[0], x[1]))
+            best.update(cell for _, cell in scored[:top])
+        run([(i + di * step_p, j + dj * step_tw)
+             for i, j in best for di in (-1, 0, 1) for dj in (-1, 0, 1)
+             if 0 <= i + di * step_p < n_p and 0 <= j + dj * step_tw < n_tw])
+    return [seen[cell] for cell in sorted(seen)]
+
+
+def search(evaluate, grid, keys=("final_cap",), max_exhaustive=OPT_EXHAUSTIVE_MAX_CELLS):
+    """Evaluate a (p, tw) grid exhaustively, or coarse-to-fine when it is larger than max_exhaustive.
+
+    Cells outside the grid's own p/tw values are never evaluated: the
+    coarse-to-fine lattice is built from the axes of the grid, and for
+    non-rectangular grids the exhaustive path is used.
+    """
+    p_axis, tw_axis = grid_axes(grid)
+    rectangular = len(grid) == len(p_axis) * len(tw_axis)
+    if len(grid) <= max_exhaustive or not rectangular:
+        return evaluate(list(grid))
+    return coarse_to_fine(evaluate, p_axis, tw_axis, keys)
@@ -0,0 +1,192 @@
+"""Intraday backtest mode on bars resampled from the minute store.
+
+data_sync.update_historical_data_minute appends 1-minute RTH bars to
+MINUTE_DATA_FILE (per ticker). This module resamples that file to 1m/5m/15m/1h
+bars and runs the usual support/resistance -> extended signals -> simulation
+stages on it, so shorter trade_window horizons can be evaluated.
+
+Both heavy passes are chunked to keep memory bounded on hundreds of thousands
+of bars:
+- the CSV is read and resampled INTRADAY_CHUNK_ROWS rows at a time (the
+  last, possibly incomplete bucket is carried into the next chunk)
+- extrema are searched per chunk with a halo of p+tw bars on both sides, which
+  gives exactly the same levels as calculate_support_resistance on the full
+  series.
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.signal import argrelextrema
+
+from config import MINUTE_DATA_FILE, INTRADAY_CHUNK_ROWS, DEFAULT_COMMISSION_RATE, MIN_COMMISSION
+from signal_utils import (
+    calculate_support_resistance,
+    assign_long_signals_extended,
+    assign_short_signals_extended,
+    update_level_close_long,
+    update_level_close_short,
+)
+from simulation_utils import simulate_trades_compound_extended
+
+# bar size -> (pandas rule, bucket offset). 1h bars start at 9:30 like the session.
+BAR_SIZES = {
+    "1m": ("1min", None),
+    "5m": ("5min", None),
+    "15m": ("15min", None),
+    "1h": ("1h", "30min"),
+}
+
+_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def _resample(df, bar_size):
+    rule, offset = BAR_SIZES[bar_size]
+    agg = {c: f for c, f in _AGG.items() if c in df.columns}
+    out = df.resample(rule, label="left", closed="left", offset=offset).agg(agg)
+    return out.dropna(subset=["Close"])  # no buckets outside trading hours
+
+
+def load_intraday_bars(ticker, bar_size="5m", fn=None, chunksize=INTRADAY_CHUNK_ROWS):
+    """Read the minute CSV in chunks and resample to bar_size."""
+    if bar_size not in BAR_SIZES:
+        raise ValueError(f"bar_size must be one of {list(BAR_SIZES)}, got {bar_size!r}")
+    fn = fn or MINUTE_DATA_FILE.format(ticker=ticker)
+    if not os.path.exists(fn):
+        print(f"{ticker}: minute data {fn} not found")
+        return pd.DataFrame(columns=list(_AGG))
+
+    parts, carry = [], None
+    for chunk in pd.read_csv(fn, parse_dates=["date"], index_col="date", chunksize=chunksize):
+        chunk.rename(columns={"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"},
+                     inplace=True)
+        if carry is not None:
+            chunk = pd.concat([carry, chunk])
+        chunk = chunk[~chunk.index.duplicated(keep="last")].sort_index()
+        bars = _resample(chunk, bar_size)
+        if bars.empty:
+            carry = chunk
+            continue
+        # Last bucket may continue in the next chunk: keep its raw rows
+        carry = chunk[chunk.index >= bars.index[-1]]
+        parts.append(bars.iloc[:-1])
+    if carry is not None and not carry.empty:
+        parts.append(_resample(carry, bar_size))
+    if not parts:
+        return pd.DataFrame(columns=list(_AGG))
+    df = pd.concat(parts)
+    return df[~df.index.duplicated(keep="last")].sort_index()
+
+
+def calculate_support_resistance_chunked(df, past_window, trade_window, price_col="Close",
+                                         chunk_rows=INTRADAY_CHUNK_ROWS):
+    """calculate_support_resistance in chunks with a p+tw halo (identical levels)."""
+    if price_col not in df.columns:
+        price_col = "Close"
+    order = int(past_window + trade_window)
+    prices = df[price_col].to_numpy(dtype=float)
+    n = len(prices)
+    min_idx, max_idx = [], []
+    for start in range(0, n, chunk_rows):
+        end = min(start + chunk_rows, n)
+        lo, hi = max(start - order, 0), min(end + order, n)
+        window = prices[lo:hi]
+        for found, cmp in ((min_idx, np.less), (max_idx, np.greater)):
+            idx = argrelextrema(window, cmp, order=order)[0] + lo
+            found.append(idx[(idx >= start) & (idx < end)])
+    min_idx = np.concatenate(min_idx) if min_idx else np.array([], dtype=np.int64)
+    max_idx = np.concatenate(max_idx) if max_idx else np.array([], dtype=np.int64)
+
+    # Globale Werte ergänzen (wie calculate_support_resistance)
+    if n:
+        min_idx = np.union1d(min_idx, [int(np.nanargmin(prices))])
+        max_idx = np.union1d(max_idx, [int(np.nanargmax(prices))])
+    support = pd.Series(prices[min_idx], index=df.index[min_idx])
+    resistance = pd.Series(prices[max_idx], index=df.index[max_idx])
+    return support, resistance
+
+
+def run_intraday_side(df, cfg, p, tw, bar_size, direction="long", causal=False):
+    """S/R -> extended signals -> simulation for one side. Returns (capital, trades, ext).
+
+    causal: levels from the streaming detector (no lookahead) instead of argrelextrema.
+    """
+    price_col = "Open" if cfg.get("trade_on", "Close").lower() == "open" else "Close"
+    if causal:
+        sup, res = calculate_support_resistance(df, p, tw, price_col=price_col, causal=True)
+    else:
+        sup, res = calculate_support_resistance_chunked(df, p, tw, price_col=price_col)
+    if direction == "long":
+        ext = assign_long_signals_extended(sup, res, df, tw, bar_size)
+        ext = update_level_close_long(ext, df)
+    else:
+        ext = assign_short_signals_extended(sup, res, df, tw, bar_size)
+        ext = update_level_close_short(ext, df)
+    cap, trades = simulate_trades_compound_extended(
+        ext, df, cfg,
+        DEFAULT_COMMISSION_RATE, MIN_COMMISSION,
+        cfg.get("order_round_factor", 1),
+        artificial_close_price=float(df[price_col].iloc[-1]),
+        artificial_close_date=df.index[-1],
+        direction=direction,
+    )
+    return cap, trades, ext
+
+
+def run_intraday_backtest(ticker, cfg, bar_size="5m", p_values=(3, 5, 8), tw_values=(1, 2, 3), df=None,
+                          causal=False):
+    """Evaluate (p, tw) combinations on intraday bars. Returns one row per side/p/tw."""
+    if df is None:
+        df = load_intraday_bars(ticker, bar_size)
+    if df.empty:
+        return pd.DataFrame()
+    print(f"{ticker}: {len(df)} {bar_size} bars {df.index[0]} -> {df.index[-1]}")
+
+    rows = []
+    for direction in ("long", "short"):
+        if not cfg.get(direction, False):
+            continue
+        init_cap = cfg["initialCapitalLong"] if direction == "long" else cfg["initialCapitalShort"]
+        for p in p_values:
+            for tw in tw_values:
+                t0 = time.time()
+                cap, trades, _ = run_intraday_side(df, cfg, p, tw, bar_size, direction, causal)
+                pnl = [t.get("pnl", 0.0) for t in trades]
+                rows.append({
+                    "ticker": ticker, "bar_size": bar_size, "side": direction, "p": p, "tw": tw, "causal": causal,
+                    "trades": len(trades),
+                    "win_rate": round(sum(1 for x in pnl if x > 0) / len(pnl) * 100, 1) if pnl else 0.0,
+                    "final_capital": round(cap, 2),
+                    "return_pct": round((cap / init_cap - 1) * 100, 2) if init_cap else 0.0,
+                    "seconds": round(time.time() - t0, 2),
+                })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+    from tickers_config import tickers
+
+    parser = argparse.ArgumentParser(description="Intraday support/resistance backtest")
+    parser.add_argument("tickers", nargs="*", help="Tickers (default: all)")
+    parser.add_argument("--bar", choices=list(BAR_SIZES), default="5m")
+    parser.add_argument("--p", type=int, nargs="+", default=[3, 5, 8])
+    parser.add_argument("--tw", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--causal", action="store_true", help="Confirm levels without lookahead")
+    parser.add_argument("--out", default=None, help="CSV output (default intraday_<bar>_results.csv)")
+    args = parser.parse_args()
+
+    results = []
+    for tkr in args.tickers or list(tickers.keys()):
+        if tkr not in tickers:
+            print(f"WARN unknown ticker {tkr}")
+            continue
+        res = run_intraday_backtest(tkr, tickers[tkr], args.bar, args.p, args.tw, causal=args.causal)
+        if not res.empty:
+            print(res.to_string(index=False))
+            results.append(res)
+    if results:
+        out = args.out or f"intraday_{args.bar}_results.csv"
+        pd.concat(results).to_csv(out, index=False)
+        print(f"[DONE] Intraday results saved to {out}")
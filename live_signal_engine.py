@@ -0,0 +1,413 @@
+"""Long-running signal engine fed by minute bars.
+
+The traders used to run the whole comprehensive backtest right before every
+session and then pick today's rows out of the results JSON. The only thing a
+session actually needs is: "is the bar tw days before the session day a
+support/resistance level, and is the strategy flat/in a position there?".
+This engine keeps exactly that per ticker and side in memory:
+
+- daily history up to the last completed bar ({ticker}_data.csv) and the
+  long/short position state after all levels that can no longer change
+  (rebuilt once per day with the regular calculate_support_resistance /
+  assign_*_signals pipeline, so it matches the backtest)
+- a provisional bar for the session day, aggregated from minute bars as they
+  arrive (MINUTE_DATA_FILE store written by data_sync, or on_minute_bar()
+  from a live subscription)
+
+Every minute bar only re-tests the last p+tw bars and the candidate bar
+against their windows (O((p+tw)^2)), using the same strict/clipped comparison as argrelextrema and the
+global min/max rule of calculate_support_resistance. The resulting signals
+(same dicts as check_todays_signals) are written to LIVE_SIGNALS_FILE, so at
+OPEN_TRADE_DELAY / CLOSE_TRADE_ADVANCE the trader only does a lookup and
+fetches a quote:
+
+    python live_signal_engine.py            # poll the minute store
+    python live_signal_engine.py --once     # one refresh, print signals
+"""
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from config import MINUTE_DATA_FILE, LIVE_SIGNALS_FILE, LIVE_SIGNALS_MAX_AGE_MIN, LIVE_POLL_SECONDS
+from trading_calendar import session_offset
+from results_export import load_results_file, results_exists
+from signal_utils import calculate_support_resistance, assign_long_signals, assign_short_signals
+
+SIDES = {
+    # strategy: (entry level type, exit level type, entry action, exit action, assign function, column)
+    "LONG": ("support", "resistance", "BUY", "SELL", assign_long_signals, "Long"),
+    "SHORT": ("resistance", "support", "SHORT", "COVER", assign_short_signals, "Short"),
+}
+
+_TAIL_BYTES = 256 * 1024  # minute store is rewritten sorted; new rows are at the end
+
+
+def session_day(now=None):
+    """Session date the engine prepares: today, or the next session on weekends and holidays."""
+    d = pd.Timestamp(now or datetime.now()).normalize()
+    return session_offset(d, 0)
+
+
+def candidate_level(prices, i, order, lo, hi):
+    """Level type of bar i ('support'/'resistance'/None) in the given price array.
+
+    Same rule as calculate_support_resistance: strictly below/above every
+    other price within `order` bars (clipped at the ends, so the first and
+    last bar never qualify), or the first occurrence of the global min/max.
+    lo/hi are the global min/max of the whole series.
+    """
+    n = len(prices)
+    if i < 0 or i >= n:
+        return None
+    v = prices[i]
+    if 0 < i < n - 1:
+        left = prices[max(0, i - order):i]
+        right = prices[i + 1:min(n, i + order + 1)]
+        if (left > v).all() and (right > v).all():
+            return "support"
+        if (left < v).all() and (right < v).all():
+            return "resistance"
+    if v == lo and not (prices[:i] == lo).any():
+        return "support"
+    if v == hi and not (prices[:i] == hi).any():
+        return "resistance"
+    return None
+
+
+def _read_minute_tail(fn, since):
+    """Minute rows after `since` (reads only the end of the file when possible)."""
+    size = os.path.getsize(fn)
+    if since is None or size <= _TAIL_BYTES:
+        df = pd.read_csv(fn, parse_dates=["date"], index_col="date")
+    else:
+        with open(fn, "r") as f:
+            header = f.readline()
+            f.seek(size - _TAIL_BYTES)
+            f.readline()  # partial line
+            tail = f.read()
+        from io import StringIO
+        df = pd.read_csv(StringIO(header + tail), parse_dates=["date"], index_col="date")
+        if df.empty or df.index[0] > since:
+            df = pd.read_csv(fn, parse_dates=["date"], index_col="date")
+    df.rename(columns={"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"},
+              inplace=True)
+    if since is not None:
+        df = df[df.index > since]
+    return df.sort_index()
+
+
+class _TickerState:
+    """Daily history, provisional session bar and per-side state of one ticker."""
+
+    def __init__(self, ticker, cfg, params):
+        self.ticker = ticker
+        self.cfg = cfg
+        self.params = params                  # {"LONG": (p, tw), "SHORT": (p, tw)}
+        self.trade_on = cfg.get("trade_on", "open").upper()
+        self.price_col = "Open" if self.trade_on == "OPEN" else "Close"
+        self.session = None
+        self.history = np.array([], dtype=float)  # price_col of completed bars before the session day
+        self.dates = pd.DatetimeIndex([])
+        self.active = {}                      # strategy -> in position after the settled levels
+        self.bar = None                       # provisional session bar {Open, High, Low, Close, Volume}
+        self.last_ts = None                   # last minute bar consumed
+
+    def rebuild(self, daily, session):
+        """Reset to a new session day from the completed daily bars (once per day)."""
+        daily = daily[daily.index < session]
+        self.session = session
+        self.history = daily[self.price_col].to_numpy(dtype=float)
+        self.dates = daily.index
+        self.bar = None
+        self.active = {}
+        for strategy, (p, tw) in self.params.items():
+            self.active[strategy] = self._active_before(daily, strategy, p, tw)
+
+    def _settled(self, p, tw):
+        """First history bar whose level can still change when the session bar is added."""
+        return max(len(self.history) - int(p + tw), 0)
+
+    def _active_before(self, daily, strategy, p, tw):
+        """Position state after all settled levels before the candidate bar."""
+        end = min(self._settled(p, tw), len(self.history) - tw)
+        if len(daily) < 3 or end <= 0:
+            return False
+        assign, col = SIDES[strategy][4], SIDES[strategy][5]
+        sup, res = calculate_support_resistance(daily, p, tw, price_col=self.price_col)
+        rows = assign(sup, res, daily.copy(), tw)
+        rows = rows[(rows["Date"] < self.dates[end]) & rows[col].notna()]
+        if rows.empty:
+            return False
+        return rows[col].iloc[-1] in ("buy", "short")
+
+    def on_bar(self, ts, o, h, l, c, v=0):
+        """Merge one intraday bar into the provisional session bar."""
+        if self.bar is None:
+            self.bar = {"Open": o, "High": h, "Low": l, "Close": c, "Volume": v or 0}
+        else:
+            b = self.bar
+            b["High"] = max(b["High"], h)
+            b["Low"] = min(b["Low"], l)
+            b["Close"] = c
+            b["Volume"] += v or 0
+        self.last_ts = ts
+
+    def signals(self):
+        """Signals for the session day given the bars seen so far."""
+        if self.bar is None or not len(self.history):
+            return []
+        quote = float(self.bar[self.price_col])
+        prices = np.append(self.history, quote)
+        lo, hi = prices.min(), prices.max()
+        out = []
+        for strategy, (p, tw) in self.params.items():
+            order = int(p + tw)
+            i = len(prices) - 1 - tw
+            entry, exit_, buy, sell = SIDES[strategy][:4]
+            active = self.active.get(strategy, False)
+            # Levels in the last p+tw history bars depend on the session bar: replay them
+            for k in range(self._settled(p, tw), i):
+                level = candidate_level(prices, k, order, lo, hi)
+                if level == entry:
+                    active = True
+                elif level == exit_:
+                    active = False
+            level = candidate_level(prices, i, order, lo, hi)
+            if level == entry and not active:
+                action = buy
+            elif level == exit_ and active:
+                action = sell
+            else:
+                continue
+            out.append({
+                "ticker": self.ticker,
+                "strategy": strategy,
+                "date": self.session.strftime("%Y-%m-%d"),
+                "action": action,
+                "price": round(quote, 4),
+                "signal_type": level,
+                "p_param": p,
+                "tw_param": tw,
+                "trade_on": self.trade_on,
+                "level_date": self.dates[i].strftime("%Y-%m-%d"),
+                "level": float(prices[i]),
+            })
+        return out
+
+
+def load_strategy_parameters(results_file="complete_comprehensive_backtest_results.json"):
+    """{ticker: {"LONG": (p, tw), "SHORT": (p, tw)}} from the last backtest export."""
+    out = {}
+    if results_exists(results_file):
+        try:
+            data = load_results_file(results_file) or {}
+        except Exception:
+            data = {}
+        for ticker, td in data.items():
+            for strategy in SIDES:
+                params = (td.get(f"{strategy.lower()}_strategy") or {}).get("parameters") or {}
+                if params.get("p") is not None and params.get("tw") is not None:
+                    out.setdefault(ticker, {})[strategy] = (int(params["p"]), int(params["tw"]))
+    if not out:
+        from check_todays_signals import load_runner_parameters
+        for ticker, sides in load_runner_parameters().items():
+            for strategy, params in sides.items():
+                if params.get("p") is not None and params.get("tw") is not None:
+                    out.setdefault(ticker, {})[strategy] = (int(params["p"]), int(params["tw"]))
+    return out
+
+
+class LiveSignalEngine:
+    """Keeps "signals for the next OPEN/CLOSE session" up to date for all tickers."""
+
+    def __init__(self, tickers=None, params=None, signals_file=LIVE_SIGNALS_FILE):
+        if tickers is None:
+            from tickers_config import tickers
+        self.tickers = tickers
+        self.params = params if params is not None else load_strategy_parameters()
+        self.signals_file = signals_file
+        self.states = {}
+        self._daily_cache = {}
+        self.current = {}  # (ticker, session type) -> list of signal dicts
+        for ticker, cfg in tickers.items():
+            sides = {s: pt for s, pt in self.params.get(ticker, {}).items()
+                     if cfg.get(s.lower(), False)}
+            if sides:
+                self.states[ticker] = _TickerState(ticker, cfg, sides)
+
+    def warm_up(self, now=None, daily=None):
+        """Load daily history and rebuild every ticker for the current session day."""
+        session = session_day(now)
+        for ticker, state in self.states.items():
+            df = daily.get(ticker) if daily is not None else self._load_daily(ticker)
+            if df is None or df.empty:
+                print(f"{ticker}: no daily data, live signals disabled")
+                continue
+            state.rebuild(df, session)
+            self._daily_cache[ticker] = df
+        self.refresh()
+
+    def _load_daily(self, ticker):
+        fn = f"{ticker}_data.csv"
+        if not os.path.exists(fn):
+            return None
+        df = pd.read_csv(fn, index_col=0, parse_dates=True)
+        df.rename(columns={"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"},
+                  inplace=True)
+        return df.sort_index()
+
+    def on_minute_bar(self, ticker, ts, o, h, l, c, v=0, publish=True):
+        """Feed one intraday bar (minute store row or live subscription update)."""
+        state = self.states.get(ticker)
+        if state is None or state.session is None:
+            return
+        ts = pd.Timestamp(ts)
+        day = ts.tz_localize(None).normalize() if ts.tzinfo is not None else ts.normalize()
+        if day < state.session or (state.last_ts is not None and ts <= state.last_ts):
+            return
+        if day > state.session:
+            self._roll(state, day)
+        state.on_bar(ts, float(o), float(h), float(l), float(c), v)
+        if publish:
+            self._update(ticker)
+
+    def _roll(self, state, day):
+        """New trading day: the provisional bar becomes history, state is rebuilt."""
+        df = self._daily_cache.get(state.ticker)
+        if state.bar is not None:
+            row = pd.DataFrame([state.bar], index=pd.DatetimeIndex([state.session]))
+            df = pd.concat([df[df.index < state.session], row])
+            self._daily_cache[state.ticker] = df
+        state.rebuild(df, day)
+
+    def _update(self, ticker):
+        state = self.states[ticker]
+        sigs = state.signals()
+        key = (ticker, state.trade_on)
+        if sigs != self.current.get(key, []):
+            self.current[key] = sigs
+            for s in sigs:
+                print(f"[LIVE] {s['ticker']} {s['strategy']} {s['action']} @ {s['price']} "
+                      f"({s['signal_type']} {s['level_date']}) for {s['trade_on']} {s['date']}")
+            self.save()
+
+    def refresh(self):
+        for ticker in self.states:
+            self._update(ticker)
+        self.save()
+
+    def get_signals(self, session_type):
+        """Current signals for an OPEN/CLOSE session (dictionary lookup)."""
+        session_type = session_type.upper()
+        return [s for (ticker, st), sigs in self.current.items() if st == session_type for s in sigs]
+
+    def save(self):
+        payload = {
+            "updated": datetime.now().isoformat(timespec="seconds"),
+            "session_date": next((s.session.strftime("%Y-%m-%d") for s in self.states.values()
+                                  if s.session is not None), None),
+            "signals": {"OPEN": self.get_signals("OPEN"), "CLOSE": self.get_signals("CLOSE")},
+            "last_bar": {t: str(s.last_ts) for t, s in self.states.items() if s.last_ts is not None},
+        }
+        tmp = f"{self.signals_file}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(payload, f, indent=2, default=str)
+        os.replace(tmp, self.signals_file)
+
+    def poll_minute_store(self):
+        """Consume new rows of every ticker's MINUTE_DATA_FILE."""
+        for ticker, state in self.states.items():
+            fn = MINUTE_DATA_FILE.format(ticker=ticker)
+            if state.session is None or not os.path.exists(fn):
+                continue
+            try:
+                rows = _read_minute_tail(fn, state.last_ts)
+            except Exception as e:
+                print(f"{ticker}: could not read {fn}: {e}")
+                continue
+            if rows.empty:
+                continue
+            for ts, r in zip(rows.index, rows.itertuples(index=False)):
+                self.on_minute_bar(ticker, ts, r.Open, r.High, r.Low, r.Close,
+                                   getattr(r, "Volume", 0), publish=False)
+            self._update(ticker)
+
+    def subscribe_ib(self, ib, contracts):
+        """Feed 5-second real-time bars from IB (ib_insync) into the engine.
+
+        contracts: {ticker: qualified Contract}
+        """
+        subs = []
+        for ticker, contract in contracts.items():
+            if ticker not in self.states:
+                continue
+            bars = ib.reqRealTimeBars(contract, 5, "TRADES", True)
+
+            def _on_update(bars, has_new, ticker=ticker):
+                if has_new and bars:
+                    b = bars[-1]
+                    self.on_minute_bar(ticker, b.time, b.open_, b.high, b.low, b.close, b.volume)
+
+            bars.updateEvent += _on_update
+            subs.append(bars)
+        return subs
+
+    def run(self, poll_seconds=LIVE_POLL_SECONDS):
+        """Poll the minute store until interrupted."""
+        self.warm_up()
+        print(f"[LIVE] Engine running for {len(self.states)} tickers, polling every {poll_seconds}s")
+        try:
+            while True:
+                if session_day() > max(s.session for s in self.states.values() if s.session is not None):
+                    self.warm_up()
+                self.poll_minute_store()
+                self.save()  # heartbeat: traders only trust a recently updated file
+                time.sleep(poll_seconds)
+        except KeyboardInterrupt:
+            print("[LIVE] Stopped")
+
+
+def load_live_signals(session_type, signals_file=LIVE_SIGNALS_FILE, max_age_min=LIVE_SIGNALS_MAX_AGE_MIN, now=None):
+    """Signals published by a running engine, or None if missing/stale/for another day."""
+    if not os.path.exists(signals_file):
+        return None
+    try:
+        with open(signals_file, "r") as f:
+            payload = json.load(f)
+    except Exception:
+        return None
+    now = now or datetime.now()
+    if payload.get("session_date") != now.strftime("%Y-%m-%d"):
+        return None
+    try:
+        age_min = (now - datetime.fromisoformat(payload["updated"])).total_seconds() / 60.0
+    except Exception:
+        return None
+    if age_min > max_age_min:
+        return None
+    return payload.get("signals", {}).get(session_type.upper(), [])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Live support/resistance signal engine")
+    parser.add_argument("--poll", type=int, default=LIVE_POLL_SECONDS, help="Seconds between minute-store polls")
+    parser.add_argument("--once", action="store_true", help="Warm up, consume the minute store once and exit")
+    args = parser.parse_args()
+
+    engine = LiveSignalEngine()
+    if args.once:
+        engine.warm_up()
+        engine.poll_minute_store()
+        for session in ("OPEN", "CLOSE"):
+            sigs = engine.get_signals(session)
+            print(f"{session}: {len(sigs)} signals")
+            for s in sigs:
+                print(f"  {s['ticker']:6} {s['strategy']:5} {s['action']:5} {s['price']}")
+    else:
+        engine.run(args.poll)
@@ -26,6 +26,7 @@ from tickers_config import TICKERS_CONFIG
 from config import *
 import backtesting_core
 import signal_utils
+from contract_registry import get_contract, get_registry
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -68,6 +69,8 @@ class LiveTradingManager:
             
             # Get current portfolio positions
             await self.update_portfolio()
+            # Qualify contracts once up front (cached on disk by conID)
+            get_registry().prefetch(self.ib, list(TICKERS_CONFIG.keys()))
             return True
             
         except Exception as e:
@@ -93,8 +96,7 @@ class LiveTradingManager:
     async def get_realtime_price(self, ticker: str) -> Optional[float]:
         """Get real-time market price from IB"""
         try:
-            contract = Stock(ticker, 'SMART', 'USD')
-            self.ib.qualifyContracts(contract)
+            contract = get_contract(self.ib, ticker)
             
             # Request market data
             ticker_data = self.ib.reqMktData(contract, '', False, False)
@@ -316,8 +318,7 @@ class LiveTradingManager:
                 return False
             
             # Create contract
-            contract = Stock(ticker, 'SMART', 'USD')
-            self.ib.qualifyContracts(contract)
+            contract = get_contract(self.ib, ticker)
             
             # Create order
             ib_order = LimitOrder(action, shares, real_price)
@@ -24,6 +24,7 @@ from typing import Dict, Tuple
 # Import our modules
 from check_todays_signals import check_todays_signals, TICKERS_CONFIG
 from portfolio_manager import PortfolioManager
+from contract_registry import get_contract, get_registry
 from config import *
 
 class ManualTrader:
@@ -49,6 +50,10 @@ class ManualTrader:
                     except Exception:
                         pass
                     self.sync_portfolio_with_ib()
+                    # Qualify all configured contracts now instead of inside the trading window
+                    refreshed = get_registry().prefetch(self.ib)
+                    if refreshed:
+                        print(f"Contract registry: qualified {refreshed} contract(s)")
                     return True
             except Exception as e:
                 print(f"WARN: IB connect attempt {attempts} failed: {e}")
@@ -81,8 +86,7 @@ class ManualTrader:
 
     def get_realtime_price(self, ticker: str) -> float | None:
         try:
-            contract = Stock(ticker, 'SMART', 'USD')
-            self.ib.qualifyContracts(contract)
+            contract = get_contract(self.ib, ticker)
             tickers = self.ib.reqTickers(contract)
             self.ib.sleep(1.0)
             if not tickers:
@@ -153,8 +157,7 @@ class ManualTrader:
             if not execute:
                 print("DRY RUN - Order not executed (use --execute to place)")
                 return True
-            contract = Stock(ticker, 'SMART', 'USD')
-            self.ib.qualifyContracts(contract)
+            contract = get_contract(self.ib, ticker)
             if limit_price is not None:
                 ib_order = LimitOrder(action, shares, limit_price)
             else:
@@ -7,6 +7,8 @@ further analyzed.
 """
 from typing import List, Dict
 
+from trade_table import TradeTable
+
 def match_trades(trades: List[Dict], side: str = "long") -> List[Dict]:
     """Normalize trade dictionaries into a common schema.
 
@@ -18,6 +20,8 @@ def match_trades(trades: List[Dict], side: str = "long") -> List[Dict]:
     normalized = []
     if not trades or side not in ("long", "short"):
         return normalized
+    if isinstance(trades, TradeTable):
+        return trades.matched()
 
     for t in trades:
         if side == "long":
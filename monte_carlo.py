@@ -0,0 +1,170 @@
+"""Monte Carlo resampling of matched trade sequences.
+
+The historical backtest is a single path through the trades. To size capital
+per ticker/side we want the distribution instead: each trade's PnL is turned
+into a return on the capital before that trade, and the sequence is resampled
+thousands of times with
+- "shuffle": random reordering (same final capital, different drawdowns)
+- "block":   circular block bootstrap with replacement (keeps short-range
+             clustering of wins/losses, MC_BLOCK_SIZE trades per block)
+
+All simulations of a ticker/side run as batched NumPy matrices (chunks of
+MC_BATCH_SIZE paths); tickers are spread over a process pool. Random streams
+are derived from MC_SEED and the ticker/side name, so results are reproducible
+regardless of worker scheduling.
+"""
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config import MC_SIMULATIONS, MC_BLOCK_SIZE, MC_BATCH_SIZE, MC_SEED, MAX_WORKERS
+from performance_analytics import max_drawdown
+from trade_table import trade_pnls
+
+MC_METHODS = ("shuffle", "block")
+
+MC_COLUMNS = [
+    "ticker", "side", "method", "n_trades", "simulations", "initial_capital",
+    "hist_final", "final_p5", "final_p50", "final_p95", "final_mean", "prob_loss_pct",
+    "hist_max_dd_pct", "max_dd_p50", "max_dd_p95", "max_dd_p99",
+]
+
+
+def trade_returns(pnl, initial_capital):
+    """Per-trade return on the capital available before each trade (compounding)."""
+    pnl = np.nan_to_num(np.asarray(pnl, dtype=float))
+    before = initial_capital + np.concatenate(([0.0], np.cumsum(pnl)[:-1]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(before > 0, pnl / before, 0.0)
+
+
+def shuffle_indices(rng, n_sims, n):
+    return rng.permuted(np.tile(np.arange(n), (n_sims, 1)), axis=1)
+
+
+def block_indices(rng, n_sims, n, block_size=MC_BLOCK_SIZE):
+    """Circular block bootstrap: n_sims rows of n trade indices."""
+    b = max(1, min(int(block_size), n))
+    n_blocks = -(-n // b)
+    starts = rng.integers(0, n, size=(n_sims, n_blocks))
+    idx = (starts[:, :, None] + np.arange(b)) % n
+    return idx.reshape(n_sims, n_blocks * b)[:, :n]
+
+
+def simulate_paths(returns, initial_capital, idx):
+    """Equity paths (n_sims x n_trades+1) for resampled trade returns."""
+    growth = np.maximum(1.0 + returns[idx], 0.0)  # a path cannot go below zero capital
+    eq = np.empty((idx.shape[0], idx.shape[1] + 1))
+    eq[:, 0] = initial_capital
+    np.cumprod(growth, axis=1, out=eq[:, 1:])
+    eq[:, 1:] *= initial_capital
+    return eq
+
+
+def _rng_for(seed, ticker, side, method):
+    key = zlib.crc32(f"{ticker}|{side}|{method}".encode())
+    return np.random.default_rng(np.random.SeedSequence([int(seed), key]))
+
+
+def _simulate_side(task):
+    """Worker: all methods for one ticker/side. Returns a list of summary rows."""
+    ticker, side, pnl, initial_capital, n_sims, block_size, seed, methods = task
+    r = trade_returns(pnl, initial_capital)
+    n = len(r)
+    hist = simulate_paths(r, initial_capital, np.arange(n)[None, :])
+    rows = []
+    for method in methods:
+        rng = _rng_for(seed, ticker, side, method)
+        finals, dds = [], []
+        for start in range(0, n_sims, MC_BATCH_SIZE):
+            m = min(MC_BATCH_SIZE, n_sims - start)
+            idx = shuffle_indices(rng, m, n) if method == "shuffle" else block_indices(rng, m, n, block_size)
+            eq = simulate_paths(r, initial_capital, idx)
+            finals.append(eq[:, -1])
+            dds.append(max_drawdown(eq))
+        finals = np.concatenate(finals)
+        dds = np.concatenate(dds) * 100
+        f5, f50, f95 = np.percentile(finals, [5, 50, 95])
+        d50, d95, d99 = np.percentile(dds, [50, 95, 99])
+        rows.append({
+            "ticker": ticker, "side": side, "method": method,
+            "n_trades": n, "simulations": n_sims, "initial_capital": initial_capital,
+            "hist_final": hist[0, -1], "final_p5": f5, "final_p50": f50, "final_p95": f95,
+            "final_mean": finals.mean(), "prob_loss_pct": (finals < initial_capital).mean() * 100,
+            "hist_max_dd_pct": max_drawdown(hist[0]) * 100,
+            "max_dd_p50": d50, "max_dd_p95": d95, "max_dd_p99": d99,
+        })
+    return rows
+
+
+def _initial_capital(ticker, side, sd):
+    cap = sd.get("initial_capital") or (sd.get("stats", {}) or {}).get("initial_capital")
+    if cap:
+        return float(cap)
+    from tickers_config import tickers
+    cfg = tickers.get(ticker, {})
+    return float(cfg.get("initialCapitalLong" if side == "long" else "initialCapitalShort", 1000))
+
+
+def run_monte_carlo(results, n_sims=MC_SIMULATIONS, methods=MC_METHODS, block_size=MC_BLOCK_SIZE,
+                    seed=MC_SEED, max_workers=MAX_WORKERS):
+    """Resample the matched trades of every ticker/side; returns a tidy DataFrame.
+
+    results: {ticker: {"long": {"trades": [...], ...}, "short": {...}}}
+    """
+    tasks = []
+    for ticker, data in (results or {}).items():
+        for side in ("long", "short"):
+            sd = data.get(side)
+            if not isinstance(sd, dict):
+                continue
+            pnl = trade_pnls(sd.get("trades")).tolist()
+            if len(pnl) < 2:
+                continue
+            tasks.append((ticker, side, pnl, _initial_capital(ticker, side, sd),
+                          int(n_sims), block_size, seed, tuple(methods)))
+    if not tasks:
+        return pd.DataFrame(columns=MC_COLUMNS)
+
+    rows = []
+    if max_workers is None or max_workers <= 1 or len(tasks) == 1:
+        for task in tasks:
+            rows.extend(_simulate_side(task))
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks))) as pool:
+            for side_rows in pool.map(_simulate_side, tasks):
+                rows.extend(side_rows)
+    return pd.DataFrame(rows, columns=MC_COLUMNS)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from results_export import load_results_file
+
+    parser = argparse.ArgumentParser(description="Monte Carlo resampling of backtest trades")
+    parser.add_argument("--results", default="runner_fullbacktest_results.json",
+                        help="Results JSON/NDJSON with per-side trades (runner fullbacktest export)")
+    parser.add_argument("--sims", type=int, default=MC_SIMULATIONS)
+    parser.add_argument("--method", choices=["shuffle", "block", "both"], default="both")
+    parser.add_argument("--block-size", type=int, default=MC_BLOCK_SIZE)
+    parser.add_argument("--seed", type=int, default=MC_SEED)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--out", default="monte_carlo_summary.csv")
+    args = parser.parse_args()
+
+    data = load_results_file(args.results)  # .json or .ndjson export
+    if data is None:
+        raise SystemExit(f"{args.results} not found")
+    t0 = time.time()
+    summary = run_monte_carlo(
+        data, n_sims=args.sims,
+        methods=MC_METHODS if args.method == "both" else (args.method,),
+        block_size=args.block_size, seed=args.seed, max_workers=args.workers,
+    )
+    summary.to_csv(args.out, index=False)
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    print(f"\n[DONE] {len(summary)} rows in {time.time() - t0:.1f}s -> {args.out}")
@@ -5,19 +5,17 @@ Creates a filtered trade list for a specific date range with ticker symbols
 Perfect for paper trading preparation and execution
 """
 
-import json
 import pandas as pd
 from datetime import datetime, timedelta
 from tickers_config import tickers
+from results_store import load_results, store_of
 
 def load_trade_data():
-    """Load trade data from the comprehensive backtest results"""
-    try:
-        with open('complete_comprehensive_backtest_results.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
+    """Load trade data from the comprehensive backtest results (cached per file change, see results_store)"""
+    data = load_results()
+    if data is None:
         print("❌ Results file not found. Please run the comprehensive backtest first.")
-        return None
+    return data
 
 def parse_date_range(start_date_str, end_date_str):
     """Parse date range strings into datetime objects"""
@@ -32,82 +30,38 @@ def parse_date_range(start_date_str, end_date_str):
 def extract_trades_for_paper_trading(data, start_date, end_date, strategy_filter=None, min_pnl=None):
     """Extract trades for paper trading with ticker information"""
     
+    # Nur die 'long'/'short'-Blöcke tragen Trades; Datumsfilter per Binärsuche im Trade-Index
+    sides = [strategy_filter] if strategy_filter else ['long', 'short']
+    rows = store_of(data).trades_for(side=sides, start=start_date, end=end_date, on='entry_date')
+    if min_pnl is not None:
+        rows = rows[rows['pnl'] >= min_pnl]
+    order = {t: i for i, t in enumerate(data)}
+    rows = rows.assign(_t=rows['ticker'].map(order), _s=rows['side'].map(sides.index))
+    rows = rows.sort_values(['_t', '_s', 'n'], kind='stable')
+    actions = {'long': ('BUY', 'SELL'), 'short': ('SHORT', 'COVER')}
+
     paper_trades = []
-    
-    for ticker, ticker_data in data.items():
-        # Get ticker config
-        ticker_config = tickers.get(ticker, {})
-        trade_on = ticker_config.get('trade_on', 'close')
-        
-        strategies = ['long', 'short']
-        if strategy_filter:
-            strategies = [strategy_filter]
-        
-        for strategy in strategies:
-            if strategy not in ticker_data or not isinstance(ticker_data[strategy], dict):
-                continue
-            
-            strategy_data = ticker_data[strategy]
-            trades = strategy_data.get('trades', [])
-            
-            if not trades:
-                continue
-            
-            # Get strategy parameters
-            params = strategy_data.get('parameters', {})
-            p_param = params.get('p', 'N/A')
-            tw_param = params.get('tw', 'N/A')
-            
-            for trade in trades:
-                # Handle different trade formats (long vs short)
-                if 'buy_date' in trade:
-                    # Long trades
-                    entry_date = datetime.strptime(trade['buy_date'], '%Y-%m-%d %H:%M:%S')
-                    exit_date = datetime.strptime(trade['sell_date'], '%Y-%m-%d %H:%M:%S')
-                    entry_price = trade['buy_price']
-                    exit_price = trade['sell_price']
-                    entry_action = 'BUY'
-                    exit_action = 'SELL'
-                else:
-                    # Short trades
-                    entry_date = datetime.strptime(trade['short_date'], '%Y-%m-%d %H:%M:%S')
-                    exit_date = datetime.strptime(trade['cover_date'], '%Y-%m-%d %H:%M:%S')
-                    entry_price = trade['short_price']
-                    exit_price = trade['cover_price']
-                    entry_action = 'SHORT'
-                    exit_action = 'COVER'
-                
-                # Apply date filter
-                if not (start_date <= entry_date <= end_date):
-                    continue
-                
-                # Apply PnL filter
-                if min_pnl is not None and trade['pnl'] < min_pnl:
-                    continue
-                
-                hold_days = (exit_date - entry_date).days
-                
-                # Create paper trading record
-                paper_trade = {
-                    'ticker': ticker,
-                    'strategy': strategy.upper(),
-                    'entry_date': entry_date.strftime('%Y-%m-%d'),
-                    'exit_date': exit_date.strftime('%Y-%m-%d'),
-                    'entry_action': entry_action,
-                    'exit_action': exit_action,
-                    'entry_price': entry_price,
-                    'exit_price': exit_price,
-                    'shares': trade['shares'],
-                    'fee': trade['fee'],
-                    'pnl': trade['pnl'],
-                    'hold_days': hold_days,
-                    'trade_on': trade_on.upper(),
-                    'p_param': p_param,
-                    'tw_param': tw_param,
-                    'return_pct': ((exit_price - entry_price) / entry_price * 100) if strategy == 'long' else ((entry_price - exit_price) / entry_price * 100)
-                }
-                
-                paper_trades.append(paper_trade)
+    for r in rows.itertuples(index=False):
+        trade_on = tickers.get(r.ticker, {}).get('trade_on', 'close')
+        entry_price, exit_price = r.entry_price, r.exit_price
+        paper_trades.append({
+            'ticker': r.ticker,
+            'strategy': r.side.upper(),
+            'entry_date': r.entry_date.strftime('%Y-%m-%d'),
+            'exit_date': r.exit_date.strftime('%Y-%m-%d'),
+            'entry_action': actions[r.side][0],
+            'exit_action': actions[r.side][1],
+            'entry_price': entry_price,
+            'exit_price': exit_price,
+            'shares': r.shares,
+            'fee': r.fee,
+            'pnl': r.pnl,
+            'hold_days': (r.exit_date - r.entry_date).days,
+            'trade_on': trade_on.upper(),
+            'p_param': 'N/A' if r.p is None else r.p,
+            'tw_param': 'N/A' if r.tw is None else r.tw,
+            'return_pct': ((exit_price - entry_price) / entry_price * 100) if r.side == 'long' else ((entry_price - exit_price) / entry_price * 100)
+        })
     
     return paper_trades
 
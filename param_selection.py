@@ -0,0 +1,177 @@
+"""Stability-aware (p, tw) selection on the score grid.
+
+The optimizers used to take the single best cell (df_result.iloc[0]), so a
+lone spike surrounded by poor neighbours won over a broad plateau. Here the
+grid results are held as (p x tw) score and trade-count matrices and the
+choice is made on arrays:
+
+1. smoothing: each cell gets the mean of its (2r+1) x (2r+1) neighbourhood
+   (r = OPT_SMOOTH_RADIUS, NaN-aware box convolution; cells the coarse-to-fine
+   search skipped are NaN and neither count nor get picked). Pass the grid's
+   own axes (p_axis/tw_axis) for sparse results, otherwise neighbours are the
+   nearest *evaluated* values, several lattice steps apart.
+2. penalty: score = smoothed - OPT_TW_PENALTY * tw
+3. filter: cells with fewer than OPT_MIN_TRADES trades are dropped (if that
+   leaves nothing, every evaluated cell stays eligible)
+4. tolerance: candidates lie within OPT_TOLERANCE_PCT of the best score
+5. tie-break: smallest tw (OPT_PARSIMONY_TW), more trades
+   (OPT_PREFER_MORE_TRADES), higher score, smaller p
+
+All steps work on stacked (tickers, p, tw) arrays, so select_all() picks the
+parameters of the whole universe in one pass:
+
+    python param_selection.py --side long     # re-select from the opt_long_*.csv grids
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from config import (OPT_MIN_TRADES, OPT_TOLERANCE_PCT, OPT_PARSIMONY_TW, OPT_PREFER_MORE_TRADES,
+                    OPT_TW_PENALTY, OPT_SMOOTH_RADIUS)
+
+
+def grid_matrices(results, score_key="final_cap", trades_key="trades", p_axis=None, tw_axis=None):
+    """Result rows (dicts or DataFrame with past_window/trade_window) -> (p_axis, tw_axis, scores, trades).
+
+    p_axis/tw_axis: full grid axes (values of the rows are added); default the row values.
+    Missing cells are NaN; trades is None when the rows carry no trade count.
+    """
+    df = pd.DataFrame(results)
+    p_rows = df["past_window"].astype(int).to_numpy()
+    tw_rows = df["trade_window"].astype(int).to_numpy()
+    p_axis = np.union1d(p_rows, np.asarray([] if p_axis is None else p_axis, dtype=int)).astype(int)
+    tw_axis = np.union1d(tw_rows, np.asarray([] if tw_axis is None else tw_axis, dtype=int)).astype(int)
+    i = np.searchsorted(p_axis, df["past_window"].astype(int).to_numpy())
+    j = np.searchsorted(tw_axis, df["trade_window"].astype(int).to_numpy())
+    scores = np.full((len(p_axis), len(tw_axis)), np.nan)
+    scores[i, j] = pd.to_numeric(df[score_key], errors="coerce").to_numpy(dtype=float)
+    trades = None
+    if trades_key in df:
+        trades = np.full(scores.shape, np.nan)
+        trades[i, j] = pd.to_numeric(df[trades_key], errors="coerce").to_numpy(dtype=float)
+    return p_axis, tw_axis, scores, trades
+
+
+def smooth_scores(scores, radius=OPT_SMOOTH_RADIUS):
+    """NaN-aware box mean over the last two axes; NaN cells stay NaN."""
+    scores = np.asarray(scores, dtype=float)
+    if not radius or radius <= 0:
+        return scores.copy()
+    valid = np.isfinite(scores)
+    pad = [(0, 0)] * (scores.ndim - 2) + [(radius, radius)] * 2
+    vals = np.pad(np.where(valid, scores, 0.0), pad)
+    cnt = np.pad(valid.astype(float), pad)
+    win = (2 * radius + 1,) * 2
+    total = sliding_window_view(vals, win, axis=(-2, -1)).sum(axis=(-2, -1))
+    count = sliding_window_view(cnt, win, axis=(-2, -1)).sum(axis=(-2, -1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = total / count
+    return np.where(valid, out, np.nan)
+
+
+def select_batch(scores, trades, p_axis, tw_axis, radius=OPT_SMOOTH_RADIUS, min_trades=OPT_MIN_TRADES,
+                 tolerance=OPT_TOLERANCE_PCT, parsimony=OPT_PARSIMONY_TW,
+                 prefer_more_trades=OPT_PREFER_MORE_TRADES, tw_penalty=OPT_TW_PENALTY):
+    """Pick one cell per grid of a (tickers, p, tw) stack.
+
+    Returns (pi, ti, detail): index arrays into p_axis/tw_axis (-1 where a
+    grid has no evaluated cell) and the smoothed/score/eligible/candidate
+    arrays of the stack's shape.
+    """
+    scores = np.asarray(scores, dtype=float)
+    if scores.ndim == 2:
+        scores = scores[None]
+    n_tickers, n_p, n_tw = scores.shape
+    trades = np.full(scores.shape, np.inf) if trades is None else np.asarray(trades, dtype=float).reshape(scores.shape)
+    tw_grid = np.broadcast_to(np.asarray(tw_axis, dtype=float)[None, None, :], scores.shape)
+    p_idx = np.broadcast_to(np.arange(n_p)[None, :, None], scores.shape)
+
+    smoothed = smooth_scores(scores, radius)
+    score = smoothed - tw_penalty * tw_grid
+    evaluated = np.isfinite(score)
+    # unbekannte Trade-Anzahl (NaN) filtert nicht
+    eligible = evaluated & ~(trades < min_trades)
+    none_left = ~eligible.any(axis=(1, 2))
+    eligible[none_left] = evaluated[none_left]
+
+    best = np.where(eligible, score, -np.inf).max(axis=(1, 2))
+    floor = best - np.abs(best) * tolerance
+    candidate = eligible & (score >= floor[:, None, None])
+
+    def flat(a):
+        return np.asarray(a, dtype=float).reshape(n_tickers, -1)
+
+    # np.lexsort: der letzte Schlüssel ist der primäre
+    keys = [flat(p_idx), -flat(np.where(candidate, score, 0.0))]
+    if prefer_more_trades:
+        keys.append(-flat(np.where(np.isfinite(trades), trades, 0.0)))
+    if parsimony:
+        keys.append(flat(tw_grid))
+    keys.append(flat(~candidate))
+    first = np.lexsort(keys, axis=-1)[:, 0]
+    has_cell = candidate.reshape(n_tickers, -1)[np.arange(n_tickers), first]
+    pi = np.where(has_cell, first // n_tw, -1)
+    ti = np.where(has_cell, first % n_tw, -1)
+    detail = {"smoothed": smoothed, "score": score, "eligible": eligible, "candidate": candidate}
+    return pi, ti, detail
+
+
+def select_params(results, score_key="final_cap", trades_key="trades", p_axis=None, tw_axis=None, **kwargs):
+    """(p, tw) for one grid plus the result frame in selection order (chosen cell first).
+
+    p_axis/tw_axis: axes of the searched grid (see grid_matrices).
+    Returns ((None, None), frame) when no cell was evaluated.
+    """
+    p_axis, tw_axis, scores, trades = grid_matrices(results, score_key, trades_key, p_axis, tw_axis)
+    pi, ti, detail = select_batch(scores, trades, p_axis, tw_axis, **kwargs)
+    df = pd.DataFrame(results).reset_index(drop=True)
+    i = np.searchsorted(p_axis, df["past_window"].astype(int).to_numpy())
+    j = np.searchsorted(tw_axis, df["trade_window"].astype(int).to_numpy())
+    for name in ("smoothed", "score", "eligible", "candidate"):
+        df[name] = detail[name][0][i, j]
+    if pi[0] < 0:
+        return (None, None), df
+    chosen = (i == pi[0]) & (j == ti[0])
+    df["_rank"] = np.where(chosen, 0, 1)
+    df = df.sort_values(["_rank", "candidate", "score"], ascending=[True, False, False], kind="stable")
+    return (int(p_axis[pi[0]]), int(tw_axis[ti[0]])), df.drop(columns="_rank").reset_index(drop=True)
+
+
+def select_all(grids, score_key="final_cap", trades_key="trades", p_axis=None, tw_axis=None, **kwargs):
+    """{ticker: result rows} -> {ticker: (p, tw)} with one stacked selection over the union axes."""
+    frames = {t: pd.DataFrame(rows) for t, rows in grids.items() if len(rows)}
+    if not frames:
+        return {}
+    allrows = pd.concat(frames.values(), ignore_index=True)
+    p_axis, tw_axis, _, _ = grid_matrices(allrows, score_key, None, p_axis, tw_axis)
+    stack, counts = [], []
+    for df in frames.values():
+        _, _, scores, trades = grid_matrices(df, score_key, trades_key, p_axis, tw_axis)
+        stack.append(scores)
+        counts.append(np.full(scores.shape, np.nan) if trades is None else trades)
+    pi, ti, _ = select_batch(np.stack(stack), np.stack(counts), p_axis, tw_axis, **kwargs)
+    return {t: (int(p_axis[a]), int(tw_axis[b])) if a >= 0 else (None, None)
+            for t, a, b in zip(frames, pi, ti)}
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+    import os
+
+    parser = argparse.ArgumentParser(description="Stability-aware (p, tw) selection from saved optimization grids")
+    parser.add_argument("--side", choices=["long", "short"], default="long")
+    parser.add_argument("--dir", default=".", help="Directory with opt_<side>_<ticker>.csv files")
+    args = parser.parse_args()
+
+    prefix = f"opt_{args.side}_"
+    grids = {}
+    for fn in sorted(glob.glob(os.path.join(args.dir, f"{prefix}*.csv"))):
+        grids[os.path.basename(fn)[len(prefix):-4]] = pd.read_csv(fn)
+    from grid_search import configured_axes
+    picks = select_all(grids, p_axis=configured_axes()[0], tw_axis=configured_axes()[1])
+    if not picks:
+        print(f"No {prefix}*.csv grids in {args.dir}")
+    for ticker, (p, tw) in picks.items():
+        peak = grids[ticker].sort_values("final_cap", ascending=False).iloc[0]
+        print(f"{ticker:>8}: p={p}, tw={tw}   (raw best p={int(peak['past_window'])}, tw={int(peak['trade_window'])})")
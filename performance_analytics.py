@@ -0,0 +1,299 @@
+"""Vectorized performance analytics for equity curves and matched trades.
+
+Extends stats_tools: all metrics are computed on NumPy arrays. Curves of
+different length are stacked into one NaN-padded matrix, so
+performance_table() evaluates every ticker/side of a results dict in one
+batched pass and returns a tidy DataFrame (one row per ticker/side),
+including the rolling metrics of the last ROLLING_WINDOW bars of every curve.
+
+Drawdowns are fractions of the running peak (0.25 == 25%). Ratios are
+annualized with PERIODS_PER_YEAR bars (daily data).
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from trade_table import TradeTable
+
+PERIODS_PER_YEAR = 252
+ROLLING_WINDOW = 63  # ca. ein Quartal
+
+ROLLING_COLUMNS = ["rolling_return_pct", "rolling_sharpe", "rolling_sortino", "rolling_max_dd_pct"]
+
+PERFORMANCE_COLUMNS = [
+    "ticker", "side", "trades", "win_rate", "sum_pnl", "profit_factor",
+    "initial_capital", "final_capital", "total_return_pct", "cagr_pct",
+    "max_drawdown_pct", "max_dd_duration", "sharpe", "sortino", "calmar", "exposure_pct",
+] + ROLLING_COLUMNS
+
+
+def stack_curves(curves):
+    """List of 1D curves -> (NaN-padded 2D matrix, lengths)."""
+    lengths = np.array([len(c) for c in curves], dtype=np.int64)
+    width = int(lengths.max()) if len(lengths) else 0
+    mat = np.full((len(curves), width), np.nan)
+    for i, c in enumerate(curves):
+        mat[i, :lengths[i]] = np.asarray(c, dtype=float)
+    return mat, lengths
+
+
+def _2d(equity):
+    eq = np.asarray(equity, dtype=float)
+    return eq[None, :] if eq.ndim == 1 else eq
+
+
+def drawdown_series(equity):
+    """Drawdown from the running peak for a 1D curve or a 2D matrix (rows = curves)."""
+    eq = _2d(equity)
+    peak = np.fmax.accumulate(eq, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd = np.where(peak > 0, 1.0 - eq / peak, 0.0)
+    dd[np.isnan(eq)] = np.nan
+    return dd[0] if np.ndim(equity) == 1 else dd
+
+
+def max_drawdown(equity):
+    """Maximum drawdown (fraction) per curve."""
+    dd = _2d(drawdown_series(equity))
+    out = np.nanmax(np.where(np.isnan(dd), -np.inf, dd), axis=1) if dd.shape[1] else np.zeros(len(dd))
+    out = np.where(np.isfinite(out), out, 0.0)
+    return out[0] if np.ndim(equity) == 1 else out
+
+
+def max_drawdown_duration(equity):
+    """Longest stretch (in bars) spent below the previous peak, per curve."""
+    dd = _2d(drawdown_series(equity))
+    if not dd.shape[1]:
+        return 0 if np.ndim(equity) == 1 else np.zeros(len(dd), dtype=np.int64)
+    underwater = np.nan_to_num(dd, nan=0.0) > 0
+    pos = np.broadcast_to(np.arange(dd.shape[1]), dd.shape)
+    last_peak = np.maximum.accumulate(np.where(underwater, -1, pos), axis=1)
+    out = (pos - last_peak).max(axis=1)
+    return int(out[0]) if np.ndim(equity) == 1 else out
+
+
+def period_returns(equity):
+    """Simple bar-to-bar returns (NaN where undefined)."""
+    eq = _2d(equity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.where(eq[:, :-1] > 0, eq[:, 1:] / eq[:, :-1] - 1.0, np.nan)
+    return r[0] if np.ndim(equity) == 1 else r
+
+
+def _nan_std(r):
+    r = np.asarray(r, dtype=float)
+    if r.shape[-1] < 2:
+        return np.full(r.shape[:-1], np.nan)
+    n = np.sum(np.isfinite(r), axis=-1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # rows with < 2 values
+        sd = np.nanstd(r, axis=-1, ddof=1)
+    return np.where(n > 1, sd, np.nan)
+
+
+def sharpe_ratio(returns, periods_per_year=PERIODS_PER_YEAR, risk_free=0.0):
+    """Annualized Sharpe ratio along the last axis (NaN for flat/too short series)."""
+    r = np.asarray(returns, dtype=float) - risk_free / periods_per_year
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(r, axis=-1)
+    sd = _nan_std(r)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(sd > 0, mean / sd * np.sqrt(periods_per_year), np.nan)
+
+
+def sortino_ratio(returns, periods_per_year=PERIODS_PER_YEAR, risk_free=0.0):
+    """Annualized Sortino ratio (downside deviation below zero)."""
+    r = np.asarray(returns, dtype=float) - risk_free / periods_per_year
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(r, axis=-1)
+        downside = np.sqrt(np.nanmean(np.minimum(r, 0.0) ** 2, axis=-1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(downside > 0, mean / downside * np.sqrt(periods_per_year), np.nan)
+
+
+def cagr(equity, lengths=None, periods_per_year=PERIODS_PER_YEAR):
+    """Compound annual growth rate per curve (lengths for NaN-padded matrices)."""
+    eq = _2d(equity)
+    if lengths is None:
+        lengths = np.full(len(eq), eq.shape[1])
+    lengths = np.asarray(lengths)
+    first = eq[:, 0] if eq.shape[1] else np.full(len(eq), np.nan)
+    last = eq[np.arange(len(eq)), np.maximum(lengths - 1, 0)] if eq.shape[1] else first
+    years = (lengths - 1) / periods_per_year
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = np.where((first > 0) & (last > 0) & (years > 0), (last / first) ** (1.0 / years) - 1.0, np.nan)
+    return out[0] if np.ndim(equity) == 1 else out
+
+
+def profit_factor(pnl, groups=None, n_groups=None):
+    """Gross profit / gross loss; grouped via integer ids when groups is given."""
+    pnl = np.nan_to_num(np.asarray(pnl, dtype=float))
+    if groups is None:
+        loss = -pnl[pnl < 0].sum()
+        return pnl[pnl > 0].sum() / loss if loss > 0 else np.inf if (pnl > 0).any() else np.nan
+    gains = np.bincount(groups, weights=np.where(pnl > 0, pnl, 0.0), minlength=n_groups)
+    losses = -np.bincount(groups, weights=np.where(pnl < 0, pnl, 0.0), minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(losses > 0, gains / losses, np.where(gains > 0, np.inf, np.nan))
+
+
+def exposure(entry, exit, start, end, groups=None, n_groups=None):
+    """Share of [start, end] spent in a position (datetime64 arrays, grouped like profit_factor)."""
+    entry = np.asarray(entry, dtype="datetime64[ns]")
+    exit = np.asarray(exit, dtype="datetime64[ns]")
+    start = np.asarray(start, dtype="datetime64[ns]")
+    end = np.asarray(end, dtype="datetime64[ns]")
+    single = groups is None
+    if single:
+        groups = np.zeros(len(entry), dtype=np.int64)
+        start, end, n_groups = start.reshape(1), end.reshape(1), 1
+    s, e = start[groups], end[groups]
+    lo = np.maximum(entry, s).astype(np.int64)
+    hi = np.minimum(exit, e).astype(np.int64)
+    ok = ~(np.isnat(entry) | np.isnat(exit) | np.isnat(s) | np.isnat(e))
+    held = np.bincount(groups[ok], weights=np.maximum(hi[ok] - lo[ok], 0).astype(float), minlength=n_groups)
+    span = (end.astype(np.int64) - start.astype(np.int64)).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = np.where(~(np.isnat(start) | np.isnat(end)) & (span > 0), held / span, np.nan)
+    return out[0] if single else out
+
+
+def _window_metrics(win, periods_per_year=PERIODS_PER_YEAR):
+    """ROLLING_COLUMNS for windows of window+1 equity values along the last axis."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.where(win[..., :-1] > 0, win[..., 1:] / win[..., :-1] - 1.0, np.nan)
+        peak = np.fmax.accumulate(win, axis=-1)
+        dd = np.where(peak > 0, 1.0 - win / peak, 0.0)
+        ret = (win[..., -1] / win[..., 0] - 1.0) * 100
+    # Fenster mit NaN (Padding, zu kurze Kurve) liefern NaN
+    valid = ~np.isnan(win).any(axis=-1)
+    return {
+        "rolling_return_pct": np.where(valid, ret, np.nan),
+        "rolling_sharpe": np.where(valid, sharpe_ratio(r, periods_per_year), np.nan),
+        "rolling_sortino": np.where(valid, sortino_ratio(r, periods_per_year), np.nan),
+        "rolling_max_dd_pct": np.where(valid, np.max(np.nan_to_num(dd), axis=-1) * 100, np.nan),
+    }
+
+
+def rolling_metrics(equity, window=ROLLING_WINDOW, index=None, periods_per_year=PERIODS_PER_YEAR):
+    """Rolling return, Sharpe, Sortino and max drawdown over `window` bars of one curve (time series)."""
+    eq = np.asarray(equity, dtype=float)
+    n = len(eq)
+    cols = {k: np.full(n, np.nan) for k in ROLLING_COLUMNS}
+    if n > window >= 2:
+        win = np.lib.stride_tricks.sliding_window_view(eq, window + 1)  # window returns per row
+        for k, v in _window_metrics(win, periods_per_year).items():
+            cols[k][window:] = v
+    return pd.DataFrame(cols, index=index if index is not None and len(index) == n else None)
+
+
+def trailing_metrics(mat, lengths, window=ROLLING_WINDOW, periods_per_year=PERIODS_PER_YEAR):
+    """ROLLING_COLUMNS over the last `window` bars of every row of a stack_curves matrix (NaN if shorter)."""
+    mat, lengths = np.asarray(mat, dtype=float), np.asarray(lengths)
+    if window < 2 or not mat.size:
+        return {k: np.full(len(mat), np.nan) for k in ROLLING_COLUMNS}
+    cols = np.asarray(lengths)[:, None] - 1 - window + np.arange(window + 1)
+    win = np.where(cols >= 0, np.take_along_axis(mat, np.clip(cols, 0, mat.shape[1] - 1), axis=1), np.nan)
+    return _window_metrics(win, periods_per_year)
+
+
+def _side_keys(side):
+    return ("buy_date", "sell_date") if side == "long" else ("short_date", "cover_date")
+
+
+def performance_table(results, periods_per_year=PERIODS_PER_YEAR, rolling_window=ROLLING_WINDOW):
+    """One tidy row per ticker/side of a results dict, computed in one batched pass.
+
+    rolling_* columns: rolling_metrics of the last rolling_window bars (the
+    current value of the rolling series), for all curves at once.
+
+    results: {ticker: {"long": {...}, "short": {...}, "data_info": {...}}} where a
+    side carries "equity_curve" and "trades" (plus optional "initial_capital",
+    "final_capital" or "stats").
+    """
+    keys, curves, starts, ends = [], [], [], []
+    pnl, entries, exits, groups = [], [], [], []
+    init_caps, final_caps = [], []
+    for ticker, data in (results or {}).items():
+        info = data.get("data_info", {}) or {}
+        for side in ("long", "short"):
+            sd = data.get(side)
+            if not isinstance(sd, dict):
+                continue
+            g = len(keys)
+            keys.append((ticker, side))
+            eq = [v for v in (sd.get("equity_curve") or []) if v is not None]
+            curves.append(eq)
+            st = sd.get("stats", {}) or {}
+            init_caps.append(sd.get("initial_capital", st.get("initial_capital")) or (eq[0] if eq else np.nan))
+            final_caps.append(sd.get("final_capital", st.get("final_capital")) or (eq[-1] if eq else np.nan))
+            starts.append(info.get("start_date"))
+            ends.append(info.get("end_date"))
+            entry_key, exit_key = _side_keys(side)
+            trades = sd.get("trades", []) or []
+            if isinstance(trades, TradeTable):
+                pnl.extend(trades.column("pnl").tolist())
+                entries.extend(trades.column("entry_date"))
+                exits.extend(trades.column("exit_date"))
+                groups.extend([g] * len(trades))
+                continue
+            for t in trades:
+                pnl.append(t.get("pnl", 0.0) or 0.0)
+                entries.append(t.get(entry_key))
+                exits.append(t.get(exit_key))
+                groups.append(g)
+    if not keys:
+        return pd.DataFrame(columns=PERFORMANCE_COLUMNS)
+
+    n = len(keys)
+    mat, lengths = stack_curves(curves)
+    rets = period_returns(mat) if mat.shape[1] > 1 else np.full((n, 1), np.nan)
+    max_dd = max_drawdown(mat)
+    growth = cagr(mat, lengths, periods_per_year)
+
+    groups = np.asarray(groups, dtype=np.int64)
+    pnl = np.asarray(pnl, dtype=float)
+    n_trades = np.bincount(groups, minlength=n)
+    wins = np.bincount(groups, weights=(pnl > 0).astype(float), minlength=n)
+    init_caps = np.asarray(init_caps, dtype=float)
+    final_caps = np.asarray(final_caps, dtype=float)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        table = pd.DataFrame({
+            "ticker": [k[0] for k in keys],
+            "side": [k[1] for k in keys],
+            "trades": n_trades,
+            "win_rate": np.where(n_trades > 0, wins / np.maximum(n_trades, 1) * 100, 0.0),
+            "sum_pnl": np.bincount(groups, weights=pnl, minlength=n),
+            "profit_factor": profit_factor(pnl, groups, n),
+            "initial_capital": init_caps,
+            "final_capital": final_caps,
+            "total_return_pct": np.where(init_caps > 0, (final_caps / init_caps - 1) * 100, np.nan),
+            "cagr_pct": growth * 100,
+            "max_drawdown_pct": max_dd * 100,
+            "max_dd_duration": max_drawdown_duration(mat) if mat.shape[1] else np.zeros(n, dtype=np.int64),
+            "sharpe": sharpe_ratio(rets, periods_per_year),
+            "sortino": sortino_ratio(rets, periods_per_year),
+            "calmar": np.where(max_dd > 0, growth / max_dd, np.nan),
+            "exposure_pct": exposure(
+                pd.to_datetime(pd.Series(entries, dtype=object), errors="coerce").values,
+                pd.to_datetime(pd.Series(exits, dtype=object), errors="coerce").values,
+                pd.to_datetime(pd.Series(starts, dtype=object), errors="coerce").values,
+                pd.to_datetime(pd.Series(ends, dtype=object), errors="coerce").values,
+                groups, n,
+            ) * 100,
+        })
+    for k, v in trailing_metrics(mat, lengths, rolling_window, periods_per_year).items():
+        table[k] = v
+    return table[PERFORMANCE_COLUMNS]
+
+
+def print_performance_table(table, title="PERFORMANCE"):
+    if table is None or table.empty:
+        print(f"{title}: no results")
+        return
+    print(f"\n{title}")
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
@@ -0,0 +1,361 @@
+"""Stage pipeline with on-disk memoization and dirty tracking.
+
+A Pipeline is a small DAG of named stages. Each stage declares its input
+stages, JSON-able parameters and the files it writes. Its fingerprint is the
+hash of code, parameters and input fingerprints; results are pickled to
+PIPELINE_CACHE_DIR/<key>/<stage>.pkl and a stage only re-executes when its
+fingerprint differs from the manifest (or its outputs are gone). Source
+stages (data load) are re-read when their stamp (file mtime/size) changes and
+fingerprinted by content, so a touched but unchanged CSV does not dirty the
+optimization and everything after it.
+
+ticker_pipeline() wires the backtest_engine stages per ticker:
+
+    data -> [params ->] params_<side> -> signals_<side> -> trades_<side> -> equity_<side> -> stats_<side>
+
+    python pipeline.py AAPL MSFT --explain      # what was recomputed and why
+"""
+import hashlib
+import json
+import os
+import pickle
+import time
+
+from config import PIPELINE_CACHE_DIR, DATA_VALIDATION
+from chart_stage import _digest
+
+# Dateien, deren Änderung alle berechneten Stufen ungültig macht
+CODE_FILES = ("backtest_engine.py", "backtesting_core.py", "signal_utils.py", "simulation_utils.py",
+              "stats_tools.py", "trade_table.py", "grid_search.py", "param_selection.py",
+              "data_validation.py", "trading_calendar.py", "extrema_stream.py",
+              "price_lookup.py", "pipeline.py")
+
+# Config-Werte, die Optimierung oder Simulation beeinflussen
+SETTING_NAMES = ("DEFAULT_COMMISSION_RATE", "MIN_COMMISSION", "backtesting_begin", "backtesting_end",
+                 "trade_years", "P_RANGE", "TW_RANGE", "FORCE_TW", "OPT_MIN_TRADES", "OPT_TOLERANCE_PCT",
+                 "OPT_PARSIMONY_TW", "OPT_PREFER_MORE_TRADES", "OPT_TW_PENALTY", "FORCE_FLAT_AT_END",
+                 "OPT_EXHAUSTIVE_MAX_CELLS", "OPT_COARSE_POINTS", "OPT_REFINE_TOP",
+                 "OPT_SMOOTH_RADIUS", "DATA_VALIDATION", "DATA_MAX_NAN_RUN", "DATA_MAX_GAP_DAYS", "DATA_JUMP_PCT")
+
+_code_digest = None
+
+
+def code_digest():
+    """Digest of the engine sources and the relevant config values (computed once per process)."""
+    global _code_digest
+    if _code_digest is None:
+        import config
+        here = os.path.dirname(os.path.abspath(__file__))
+        h = hashlib.sha1()
+        for name in CODE_FILES:
+            fn = os.path.join(here, name)
+            if os.path.exists(fn):
+                with open(fn, "rb") as f:
+                    h.update(f.read())
+        h.update(_digest({name: getattr(config, name, None) for name in SETTING_NAMES}).encode())
+        _code_digest = h.hexdigest()
+    return _code_digest
+
+
+def file_stamp(path):
+    """Cheap change marker of a file: (mtime, size), None if missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+class Stage:
+    def __init__(self, name, func, inputs=(), params=None, outputs=(), stamp=None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.params = params or {}
+        self.outputs = tuple(outputs)
+        self.stamp = stamp  # callable -> JSON-able marker; makes this a source stage
+
+
+class Pipeline:
+    """Memoized DAG; stages must be added after their inputs.
+
+    key: cache sub-directory (e.g. the ticker). Stage functions are called as
+    func(*input_values, **params).
+    """
+
+    def __init__(self, key, cache_dir=PIPELINE_CACHE_DIR, enabled=True):
+        self.key = key
+        self.dir = os.path.join(cache_dir, key)
+        self.enabled = enabled
+        self.stages = {}
+        self.report = []
+        self._values = {}
+        self._fps = {}
+        self._manifest = self._load_manifest()
+
+    def add(self, name, func, inputs=(), params=None, outputs=(), stamp=None):
+        missing = [i for i in inputs if i not in self.stages]
+        if missing:
+            raise ValueError(f"Stage {name}: unknown inputs {missing}")
+        self.stages[name] = Stage(name, func, inputs, params, outputs, stamp)
+        return self
+
+    # ── cache files ──────────────────────────────────────────────────────────
+    def _manifest_file(self):
+        return os.path.join(self.dir, "manifest.json")
+
+    def _cache_file(self, name):
+        return os.path.join(self.dir, f"{name}.pkl")
+
+    def _load_manifest(self):
+        if not self.enabled or not os.path.exists(self._manifest_file()):
+            return {}
+        try:
+            with open(self._manifest_file(), "r") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"WARN pipeline manifest {self._manifest_file()} unreadable, recomputing: {e}")
+            return {}
+
+    def _save_manifest(self):
+        tmp = self._manifest_file() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._manifest, f, indent=2)
+        os.replace(tmp, self._manifest_file())
+
+    def _store(self, name, value):
+        tmp = self._cache_file(name) + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._cache_file(name))
+
+    def _cached(self, name):
+        """Load a memoized value; None if missing or unreadable."""
+        try:
+            with open(self._cache_file(name), "rb") as f:
+                return (pickle.load(f),)
+        except Exception:
+            return None
+
+    # ── execution ────────────────────────────────────────────────────────────
+    def _fingerprint(self, stage):
+        parts = [stage.name, code_digest(), _digest(stage.params)] + [self._fps[i] for i in stage.inputs]
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+    def _why_dirty(self, stage, fp, entry):
+        if not entry:
+            return "no cached result"
+        if entry.get("code") != code_digest():
+            return "code or config changed"
+        if entry.get("params") != _digest(stage.params):
+            return "parameters changed"
+        changed = [i for i in stage.inputs if entry.get("inputs", {}).get(i) != self._fps[i]]
+        if changed:
+            return "input changed: " + ", ".join(changed)
+        if entry.get("fp") != fp:
+            return "fingerprint changed"
+        missing = [o for o in stage.outputs if not os.path.exists(o)]
+        if missing:
+            return "output missing: " + ", ".join(missing)
+        return None
+
+    def _execute(self, stage):
+        t0 = time.time()
+        value = stage.func(*(self._values[i] for i in stage.inputs), **stage.params)
+        return value, time.time() - t0
+
+    def _run_stage(self, stage, force):
+        entry = self._manifest.get(stage.name) if self.enabled else None
+        if stage.stamp is not None:
+            stamp = stage.stamp()
+            reason = "forced" if force else (
+                "no cached result" if not entry else
+                None if entry.get("stamp") == stamp else "source changed")
+            hit = self._cached(stage.name) if reason is None else None
+            if hit is not None:
+                self._values[stage.name], self._fps[stage.name] = hit[0], entry["fp"]
+                self.report.append((stage.name, "cached", "", 0.0))
+                return
+            if reason is None:
+                reason = "cache file missing"
+            value, secs = self._execute(stage)
+            fp = _digest(value)
+            if entry and entry.get("fp") == fp and reason == "source changed":
+                reason += " (content identical)"
+            record = {"fp": fp, "stamp": stamp}
+        else:
+            fp = self._fingerprint(stage)
+            reason = "forced" if force else self._why_dirty(stage, fp, entry)
+            hit = self._cached(stage.name) if reason is None else None
+            if hit is not None:
+                self._values[stage.name], self._fps[stage.name] = hit[0], fp
+                self.report.append((stage.name, "cached", "", 0.0))
+                return
+            if reason is None:
+                reason = "cache file missing"
+            value, secs = self._execute(stage)
+            record = {"fp": fp, "code": code_digest(), "params": _digest(stage.params),
+                      "inputs": {i: self._fps[i] for i in stage.inputs}}
+        self._values[stage.name], self._fps[stage.name] = value, fp
+        self.report.append((stage.name, "computed", reason, secs))
+        if self.enabled:
+            self._store(stage.name, value)
+            self._manifest[stage.name] = record
+
+    def run(self, targets=None, force=()):
+        """Execute the stages needed for targets (default all); returns {stage: value}.
+
+        force: stage names to recompute regardless of the cache ("*" for all).
+        Stages already evaluated by this instance are not run again.
+        """
+        targets = list(targets or self.stages)
+        needed, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.stages[name].inputs)
+        if self.enabled:
+            os.makedirs(self.dir, exist_ok=True)
+        for name, stage in self.stages.items():  # insertion order is topological
+            if name in needed and name not in self._values:
+                self._run_stage(stage, "*" in force or name in force)
+        if self.enabled:
+            self._save_manifest()
+        return {name: self._values[name] for name in targets}
+
+    def explain(self):
+        """Print which stages were recomputed and why."""
+        print(f"[PIPELINE] {self.key}")
+        for name, status, reason, secs in self.report:
+            detail = f"{reason} ({secs:.2f}s)" if status == "computed" else ""
+            print(f"   {name:<16} {status:<9} {detail}")
+
+
+# ── backtest wiring ──────────────────────────────────────────────────────────
+def _load(ticker, data_file, years, trade_on="Close"):
+    from backtest_engine import load_stage, read_stage, validate_stage, window_stage
+    df = read_stage(ticker, data_file=data_file)
+    if df is None or (DATA_VALIDATION and not validate_stage(ticker, window_stage(df, years), {"trade_on": trade_on}).ok):
+        return None
+    return load_stage(ticker, df, years=years)
+
+
+def _optimize(df, cfg, direction, ticker):
+    from backtest_engine import optimize_stage
+    return optimize_stage(df, cfg, direction, ticker)
+
+
+def _optimize_pair(df, cfg, ticker):
+    from backtest_engine import optimize_pair_stage
+    return optimize_pair_stage(df, cfg, ticker)
+
+
+def _side_params(pair, side):
+    return pair[side]
+
+
+def _signals(df, params, cfg, direction):
+    from backtest_engine import signal_stage
+    return signal_stage(df, cfg, params[0], params[1], direction)
+
+
+def _trades(df, signals, cfg, direction, last_price_col):
+    from backtest_engine import price_column, simulate_stage
+    col = last_price_col or price_column(cfg)
+    return simulate_stage(signals[2], df, cfg, direction, float(df[col].iloc[-1]), df.index[-1])
+
+
+def _equity(df, trades, initial_capital, direction):
+    from backtest_engine import equity_stage
+    return equity_stage(df, trades[1], initial_capital, direction)
+
+
+def _stats(trades, equity, initial_capital, label):
+    from backtest_engine import stats_stage
+    return stats_stage(trades[1], label, initial_capital, trades[0], equity, verbose=False)
+
+
+def ticker_pipeline(ticker, cfg, data_file=None, years=None, params=None, last_price_col=None,
+                    cache_dir=PIPELINE_CACHE_DIR, enabled=True):
+    """Backtest stages of one ticker as a memoized Pipeline (see run_ticker_cached)."""
+    data_file = data_file or f"{ticker}_data.csv"
+    engine_cfg = {k: v for k, v in cfg.items() if k not in ("tags", "enabled", "conID")}
+    pipe = Pipeline(ticker, cache_dir, enabled)
+    pipe.add("data", _load, params={"ticker": ticker, "data_file": data_file, "years": years,
+                                    "trade_on": cfg.get("trade_on", "Close")},
+             stamp=lambda: {"file": file_stamp(data_file), "years": years, "trade_on": cfg.get("trade_on", "Close"),
+                            # code_digest deckt die DATA_*-Settings und trading_calendar.py ab (Validierung)
+                            "code": code_digest()})
+    # Beide Seiten optimieren -> ein gemeinsamer Raster-Durchlauf
+    optimize = [side for side in ("long", "short") if cfg.get(side, False) and not (params or {}).get(side)]
+    if len(optimize) == 2:
+        pipe.add("params", _optimize_pair, ["data"], {"cfg": engine_cfg, "ticker": ticker})
+    for side in ("long", "short"):
+        if not cfg.get(side, False):
+            continue
+        fixed = (params or {}).get(side)
+        if fixed:
+            pipe.add(f"params_{side}", lambda p=tuple(fixed): p, stamp=lambda p=list(fixed): p)
+        elif len(optimize) == 2:
+            pipe.add(f"params_{side}", _side_params, ["params"], {"side": side})
+        else:
+            pipe.add(f"params_{side}", _optimize, ["data"],
+                     {"cfg": engine_cfg, "direction": side, "ticker": ticker})
+        pipe.add(f"signals_{side}", _signals, ["data", f"params_{side}"], {"cfg": engine_cfg, "direction": side})
+        pipe.add(f"trades_{side}", _trades, ["data", f"signals_{side}"],
+                 {"cfg": engine_cfg, "direction": side, "last_price_col": last_price_col})
+        init = cfg.get("initialCapitalLong" if side == "long" else "initialCapitalShort", 1000)
+        pipe.add(f"equity_{side}", _equity, ["data", f"trades_{side}"], {"initial_capital": init, "direction": side})
+        pipe.add(f"stats_{side}", _stats, [f"trades_{side}", f"equity_{side}"],
+                 {"initial_capital": init, "label": f"{ticker} {side.capitalize()}"})
+    return pipe
+
+
+def run_ticker_cached(ticker, cfg, data_file=None, years=None, params=None, last_price_col=None,
+                      explain=False, force=(), enabled=True):
+    """run_ticker() through the memoized pipeline. Returns a BacktestResult or None without data."""
+    from backtest_engine import BacktestResult, SideResult, price_column
+
+    pipe = ticker_pipeline(ticker, cfg, data_file, years, params, last_price_col, enabled=enabled)
+    if pipe.run(["data"], force)["data"] is None:
+        if explain:
+            pipe.explain()
+        return None
+    out = pipe.run(force=force)
+    if explain:
+        pipe.explain()
+    df = out["data"]
+    if df.empty:
+        return None
+    last_price = float(df[last_price_col or price_column(cfg)].iloc[-1])
+    result = BacktestResult(ticker, cfg, df, last_price, df.index[-1])
+    for side in ("long", "short"):
+        if f"stats_{side}" not in out:
+            continue
+        p, tw = out[f"params_{side}"]
+        support, resistance, ext = out[f"signals_{side}"]
+        cap, trades = out[f"trades_{side}"]
+        init = pipe.stages[f"equity_{side}"].params["initial_capital"]
+        result.sides[side] = SideResult(side, p, tw, support, resistance, ext, cap, trades, init,
+                                        out[f"equity_{side}"], out[f"stats_{side}"])
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    from tickers_config import tickers
+
+    parser = argparse.ArgumentParser(description="Memoized per-ticker backtest pipeline")
+    parser.add_argument("tickers", nargs="*", help="Tickers (default: all)")
+    parser.add_argument("--explain", action="store_true", help="Print recomputed stages and why")
+    parser.add_argument("--force", nargs="*", default=None, help="Stages to recompute (no names: all)")
+    args = parser.parse_args()
+    force = () if args.force is None else (args.force or ["*"])
+
+    for tkr in args.tickers or list(tickers.keys()):
+        bt = run_ticker_cached(tkr, tickers[tkr], explain=args.explain, force=force)
+        if bt is None:
+            continue
+        for side, res in bt.sides.items():
+            print(f"   {tkr} {side}: p={res.p} tw={res.tw} trades={len(res.trades)} return={res.return_pct:.2f}%")
@@ -10,14 +10,154 @@ import plotly.io as pio
 from plotly.subplots import make_subplots
 import plotly.graph_objs as go
 
+import json
+from config import CHART_RENDER_MODE, CHART_MAX_POINTS, CHART_DOWNSAMPLE, CHART_AUTO_OPEN
+
 # Erzwinge Browser-Renderer
 pio.renderers.default = "browser"
 
+
+# ─── Downsampling (fast render mode) ─────────────────────────────────────────
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out representative points.
+
+    First and last point are always kept. Each bucket is evaluated vectorized,
+    so the Python loop runs n_out times regardless of the series length.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo = hi
+        nhi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nlo:nhi].mean()
+        avg_y = np.nanmean(y[nlo:nhi]) if np.isfinite(y[nlo:nhi]).any() else y[a]
+        xs, ys = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - avg_x) * (ys - y[a]) - (x[a] - xs) * (avg_y - y[a]))
+        a = lo + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        idx[i + 1] = a
+    return idx
+
+
+def minmax_indices(y, n_out):
+    """Min/max per bucket (n_out // 2 buckets), plus first/last point; fully vectorized."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    n_buckets = n_out // 2
+    size = int(np.ceil(n / n_buckets))
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    mins = offsets + np.argmin(np.where(np.isnan(blocks), np.inf, blocks), axis=1)
+    maxs = offsets + np.argmax(np.where(np.isnan(blocks), -np.inf, blocks), axis=1)
+    idx = np.unique(np.concatenate(([0, n - 1], mins, maxs)))
+    return idx[idx < n]
+
+
+def downsample_ohlc(index, o, h, l, c, n_out):
+    """Aggregate OHLC bars into at most n_out buckets (first/max/min/last)."""
+    n = len(index)
+    if n_out >= n:
+        return index, np.asarray(o), np.asarray(h), np.asarray(l), np.asarray(c)
+    size = int(np.ceil(n / n_out))
+    starts = np.arange(0, n, size)
+    ends = np.minimum(starts + size - 1, n - 1)
+    h = np.asarray(h, dtype=float)
+    l = np.asarray(l, dtype=float)
+    return (index[starts], np.asarray(o)[starts], np.fmax.reduceat(h, starts),
+            np.fmin.reduceat(l, starts), np.asarray(c)[ends])
+
+
+def _line_indices(x, y, n_out, method):
+    if method == "minmax":
+        return minmax_indices(y, n_out)
+    return lttb_indices(x, y, n_out)
+
+
+def _lod_budgets(n, max_points):
+    """Point budgets for precomputed levels of detail: coarse -> full resolution."""
+    budgets = []
+    b = max(int(max_points), 3)
+    while b < n:
+        budgets.append(b)
+        b *= 4
+    budgets.append(n)
+    return budgets
+
+
+def _epoch_ms(index):
+    return (pd.DatetimeIndex(index).asi8 // 1_000_000).astype(np.int64)
+
+
+def _round_list(values, digits=4):
+    arr = np.round(np.asarray(values, dtype=float), digits)
+    return [None if not np.isfinite(v) else float(v) for v in arr]
+
+
+_LOD_SCRIPT = """
+(function(){
+  var gd = document.getElementById('{plot_id}');
+  var LOD = __LOD_DATA__, BUDGET = __LOD_BUDGET__;
+  function lower(a, v){ var lo = 0, hi = a.length; while (lo < hi) { var m = (lo + hi) >> 1; if (a[m] < v) lo = m + 1; else hi = m; } return lo; }
+  function toMs(v){ return typeof v === 'number' ? v : new Date(String(v).replace(' ', 'T') + (String(v).length <= 10 ? 'T00:00:00Z' : 'Z')).getTime(); }
+  function apply(x0, x1){
+    LOD.forEach(function(t){
+      var lvl = t.levels[0], i0 = 0, i1 = lvl.x.length;
+      for (var k = t.levels.length - 1; k >= 0; k--) {
+        var L = t.levels[k];
+        var a = x0 === null ? 0 : Math.max(lower(L.x, x0) - 1, 0);
+        var b = x1 === null ? L.x.length : Math.min(lower(L.x, x1) + 1, L.x.length);
+        if (b - a <= BUDGET || k === 0) { lvl = L; i0 = a; i1 = b; break; }
+      }
+      var upd = {x: [lvl.x.slice(i0, i1)]};
+      Object.keys(lvl.cols).forEach(function(c){ upd[c] = [lvl.cols[c].slice(i0, i1)]; });
+      Plotly.restyle(gd, upd, [t.trace]);
+    });
+  }
+  var busy = false;
+  gd.on('plotly_relayout', function(ev){
+    if (busy) return;
+    var x0 = null, x1 = null, reset = false;
+    Object.keys(ev).forEach(function(k){
+      if (/^xaxis\\d*\\.range\\[0\\]$/.test(k)) x0 = toMs(ev[k]);
+      else if (/^xaxis\\d*\\.range\\[1\\]$/.test(k)) x1 = toMs(ev[k]);
+      else if (/^xaxis\\d*\\.range$/.test(k)) { x0 = toMs(ev[k][0]); x1 = toMs(ev[k][1]); }
+      else if (/^xaxis\\d*\\.autorange$/.test(k)) reset = true;
+    });
+    if (x0 === null && x1 === null && !reset) return;
+    busy = true;
+    try { apply(reset ? null : x0, reset ? null : x1); } finally { busy = false; }
+  });
+})();
+"""
+
 def plot_combined_chart_and_equity(
     df, ext_long, ext_short, supp, res, trend,
-    equity_long, equity_short, equity_combined, buyhold, ticker
+    equity_long, equity_short, equity_combined, buyhold, ticker,
+    render_mode=None, max_points=None, auto_open=None, filename=None
 ):
-    df       = df.copy()
+    """Candles + markers + equity curves as HTML chart.
+
+    render_mode: "full" (every bar as SVG trace), "fast" (downsampled WebGL traces with
+    zoom-dependent levels of detail, written headlessly) or "auto" (fast above
+    max_points bars). Defaults come from CHART_RENDER_MODE / CHART_MAX_POINTS.
+    """
+    render_mode = (render_mode or CHART_RENDER_MODE or "full").lower()
+    max_points = int(max_points or CHART_MAX_POINTS)
+    fast = render_mode == "fast" or (render_mode == "auto" and len(df) > max_points)
+    if auto_open is None:
+        auto_open = CHART_AUTO_OPEN and not fast
+    # df is only read below; no defensive copy of the full price frame needed
     long_df  = ext_long.copy()  if isinstance(ext_long, pd.DataFrame)  else pd.DataFrame()
     short_df = ext_short.copy() if isinstance(ext_short, pd.DataFrame) else pd.DataFrame()
 
@@ -93,12 +233,28 @@ def plot_combined_chart_and_equity(
     fig = make_subplots(rows=2, cols=1, shared_xaxes=True,
                         row_heights=[0.6,0.4], vertical_spacing=0.05,
                         subplot_titles=(f"{ticker} Candles+Marker","Equity-Kurven"))
+    Marker = go.Scattergl if fast else go.Scatter
+    lod = []  # levels of detail for downsampled traces (fast mode)
 
     # Candlestick
-    fig.add_trace(go.Candlestick(
-        x=df.index, open=df["Open"], high=df["High"],
-        low=df["Low"], close=df["Close"], name="Candle"
-    ), row=1, col=1)
+    if fast:
+        levels = []
+        for budget in _lod_budgets(len(df), max_points):
+            xi, o, h, l, c = downsample_ohlc(df.index, df["Open"].values, df["High"].values,
+                                             df["Low"].values, df["Close"].values, budget)
+            levels.append({"x": _epoch_ms(xi).tolist(), "cols": {
+                "open": _round_list(o), "high": _round_list(h), "low": _round_list(l), "close": _round_list(c)}})
+        coarse = levels[0]
+        fig.add_trace(go.Candlestick(
+            x=pd.to_datetime(coarse["x"], unit="ms"), open=coarse["cols"]["open"], high=coarse["cols"]["high"],
+            low=coarse["cols"]["low"], close=coarse["cols"]["close"], name="Candle"
+        ), row=1, col=1)
+        lod.append({"trace": len(fig.data) - 1, "levels": levels})
+    else:
+        fig.add_trace(go.Candlestick(
+            x=df.index, open=df["Open"], high=df["High"],
+            low=df["Low"], close=df["Close"], name="Candle"
+        ), row=1, col=1)
 
     # Marker
     for idx, sym, col in [
@@ -109,7 +265,7 @@ def plot_combined_chart_and_equity(
     ]:
         if not idx.empty:
             y = df.loc[idx, "Close"] + off * (2 if sym in ["triangle-up","triangle-down"] else 1) * (1 if col!="red" else -1)
-            fig.add_trace(go.Scatter(
+            fig.add_trace(Marker(
                 x=idx, y=y, mode="markers",
                 marker=dict(symbol=sym, color=col, size=10),
                 name={"triangle-up":"Buy","triangle-down":"Sell","x":"Short","circle":"Cover"}[sym]
@@ -117,29 +273,45 @@ def plot_combined_chart_and_equity(
 
     # Supp/Res/Trend
     if not supp_filt.empty:
-        fig.add_trace(go.Scatter(x=supp_filt.index, y=supp_filt.values,
-                                 mode="markers", marker=dict(symbol="circle-open",color="limegreen",size=10),
-                                 name="Support"), row=1, col=1)
+        fig.add_trace(Marker(x=supp_filt.index, y=supp_filt.values,
+                             mode="markers", marker=dict(symbol="circle-open",color="limegreen",size=10),
+                             name="Support"), row=1, col=1)
     if not res_filt.empty:
-        fig.add_trace(go.Scatter(x=res_filt.index, y=res_filt.values,
-                                 mode="markers", marker=dict(symbol="x",color="firebrick",size=10),
-                                 name="Resistance"), row=1, col=1)
-    if not trend_filt.empty:
-        fig.add_trace(go.Scatter(x=trend_filt.index, y=trend_filt.values,
-                                 mode="lines", line=dict(color="#006400",width=2), name="Trend"),
-                      row=1, col=1)
+        fig.add_trace(Marker(x=res_filt.index, y=res_filt.values,
+                             mode="markers", marker=dict(symbol="x",color="firebrick",size=10),
+                             name="Resistance"), row=1, col=1)
 
-    # Equity-Kurven
+    # Linien: Trend (Preis-Panel) + Equity-Kurven
     equity_map = [
         (equity_long,    "Long Equity",   "green"),
         (equity_short,   "Short Equity",  "orange"),
         (equity_combined,"Combined Equity","red"),  # changed to red per request
         (buyhold,        "Buy & Hold",    "gray")
     ]
+    line_traces = []
+    if not trend_filt.empty:
+        line_traces.append((trend_filt.index, trend_filt.values, "Trend", dict(color="#006400", width=2), 1))
     for series, name, color in equity_map:
-        fig.add_trace(go.Scatter(x=df.index, y=series, mode="lines", name=name,
-                                 line=dict(color=color)),
-                      row=2, col=1)
+        line_traces.append((df.index, series, name, dict(color=color), 2))
+
+    for x, series, name, line, row in line_traces:
+        if not fast:
+            fig.add_trace(go.Scatter(x=x, y=series, mode="lines", name=name, line=line), row=row, col=1)
+            continue
+        values = np.asarray(series.values if isinstance(series, pd.Series) else series, dtype=float)
+        if len(values) != len(x):
+            # e.g. empty equity lists: nothing to draw
+            continue
+        xs = _epoch_ms(x)
+        levels = []
+        for k, budget in enumerate(_lod_budgets(len(values), max_points)):
+            # LTTB only for the overview; zoom levels use the vectorized min/max buckets
+            keep = _line_indices(xs, values, budget, CHART_DOWNSAMPLE if k == 0 else "minmax")
+            levels.append({"x": xs[keep].tolist(), "cols": {"y": _round_list(values[keep])}})
+        coarse = levels[0]
+        fig.add_trace(go.Scattergl(x=pd.to_datetime(coarse["x"], unit="ms"), y=coarse["cols"]["y"],
+                                   mode="lines", name=name, line=line), row=row, col=1)
+        lod.append({"trace": len(fig.data) - 1, "levels": levels})
 
     # Layout & Range
     base_height = 800
@@ -160,9 +332,14 @@ def plot_combined_chart_and_equity(
 
     # Show & Save
     #fig.show()
-    fn = f"{ticker}_chart.html"
-    fig.write_html(fn, auto_open=True)
-    print(f"🔧 Chart saved to {fn}")
+    fn = filename or f"{ticker}_chart.html"
+    post_script = None
+    if lod:
+        post_script = (_LOD_SCRIPT.replace("__LOD_DATA__", json.dumps(lod, separators=(",", ":")))
+                                  .replace("__LOD_BUDGET__", str(max_points)))
+    fig.write_html(fn, auto_open=auto_open, post_script=post_script)
+    print(f"🔧 Chart saved to {fn}" + (f" (fast mode, {len(df)} bars -> {max_points} pts/level)" if fast else ""))
+    return fn
 
 def plot_trades_with_equity(df, trades, equity_curve, ticker="TICKER"):
     fig = go.Figure()
@@ -0,0 +1,74 @@
+"""Bulk date -> price resolution.
+
+Signals carry trade dates that may fall on days without a bar (holidays,
+gaps); the project convention is "price at or after the date": the bar on
+that date, else the next bar, else no price. That rule used to be written
+out per row (``date in df.index`` / ``df.loc`` / ``searchsorted``) in
+update_level_close_*, get_trade_price, extract_trades_by_date and
+generate_last14_trades. Here it is one searchsorted over the whole date
+array:
+
+    closes = at_or_after(market_df, ext["Long Date detected"], "Close")
+    px = price_at_or_after(df, date, "Open")     # scalar, None when missing
+
+Missing prices are NaN in the array functions.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _sorted_index(df):
+    if df.index.is_monotonic_increasing:
+        return df
+    return df.sort_index()
+
+
+def _as_dates(dates, index):
+    """Date-like array -> DatetimeIndex comparable with index (unparseable -> NaT)."""
+    if not isinstance(dates, (pd.Series, pd.Index, np.ndarray)):
+        dates = list(dates)
+    dates = pd.DatetimeIndex(pd.to_datetime(pd.Series(dates), errors="coerce"))
+    tz = getattr(index, "tz", None)
+    if tz is not None and dates.tz is None:
+        dates = dates.tz_localize(tz)
+    elif tz is None and dates.tz is not None:
+        dates = dates.tz_localize(None)
+    return dates
+
+
+def positions_at_or_after(index, dates):
+    """Bar positions of the first bar at or after each date. Returns (positions, valid mask)."""
+    dates = _as_dates(dates, index)
+    pos = index.searchsorted(dates, side="left")
+    valid = ~dates.isna() & (pos < len(index))
+    return pos, np.asarray(valid)
+
+
+def at_or_after(df, dates, column="Close"):
+    """Price of column on each date or the next bar after it (NaN past the last bar / for NaT)."""
+    df = _sorted_index(df)
+    pos, valid = positions_at_or_after(df.index, dates)
+    out = np.full(len(pos), np.nan)
+    if valid.any():
+        out[valid] = df[column].to_numpy(dtype=float)[pos[valid]]
+    return out
+
+
+def on_date(df, dates, column="Close"):
+    """Price of the first bar on each calendar day (NaN when the day has no bar)."""
+    df = _sorted_index(df)
+    days = _as_dates(dates, df.index).normalize()
+    pos = df.index.searchsorted(days, side="left")
+    valid = ~days.isna() & (pos < len(df.index))
+    valid = np.asarray(valid)
+    valid[valid] = df.index[pos[valid]].normalize() == days[valid]
+    out = np.full(len(pos), np.nan)
+    if valid.any():
+        out[valid] = df[column].to_numpy(dtype=float)[pos[valid]]
+    return out
+
+
+def price_at_or_after(df, date, column="Close"):
+    """Scalar at_or_after; None when there is no price."""
+    px = at_or_after(df, [date], column)[0]
+    return None if np.isnan(px) else float(px)
@@ -31,9 +31,7 @@ Examples:
 
 import asyncio
 import sys
-import os
 import signal
-import json
 import subprocess
 import logging
 from datetime import datetime, time, timedelta
@@ -43,6 +41,8 @@ from pathlib import Path
 # Import our modules
 from config import *
 from tickers_config import tickers
+from event_log import log_event
+import trading_calendar
 import importlib
 
 # Configure logging
@@ -136,18 +136,9 @@ class ProductionAutoTrader:
             self.market_close = (now + timedelta(minutes=5)).time()
             self.logger.info("🧪 Test mode: Using accelerated timing")
         else:
-            # Production: 5 minutes after open, 5 minutes before close
-            market_open = datetime.strptime(MARKET_OPEN_TIME, "%H:%M")
-            market_close = datetime.strptime(MARKET_CLOSE_TIME, "%H:%M")
-            
-            # OPEN session: 5 minutes after market open
-            open_plus_5 = market_open + timedelta(minutes=5)
-            self.open_trade_time = open_plus_5.time()
-            
-            # CLOSE session: 5 minutes before market close
-            close_minus_5 = market_close - timedelta(minutes=5)
-            self.close_trade_time = close_minus_5.time()
-            self.market_close = market_close.time()
+            # Production: 5 minutes after open, 5 minutes before close (13:00 on half days)
+            self.open_trade_time, self.close_trade_time, self.market_close = \
+                trading_calendar.session_times(datetime.now())
         
         self.logger.info(f"⏰ Trading Schedule:")
         self.logger.info(f"   📈 OPEN trades: {self.open_trade_time.strftime('%H:%M')}")
@@ -155,29 +146,10 @@ class ProductionAutoTrader:
         self.logger.info(f"   🔔 Market close: {self.market_close.strftime('%H:%M')}")
 
     def is_trading_day(self, check_date: datetime = None) -> bool:
-        """Check if date is a trading day (excludes weekends and major holidays)"""
+        """Check if date is an NYSE session (weekends, holidays and closures from trading_calendar)"""
         if check_date is None:
             check_date = datetime.now()
-        
-        # Skip weekends
-        if check_date.weekday() in [5, 6]:  # Saturday=5, Sunday=6
-            return False
-        
-        # US market holidays for 2025 (basic list - can be expanded)
-        holidays_2025 = [
-            datetime(2025, 1, 1).date(),   # New Year's Day
-            datetime(2025, 1, 20).date(),  # MLK Day
-            datetime(2025, 2, 17).date(),  # Presidents' Day
-            datetime(2025, 4, 18).date(),  # Good Friday
-            datetime(2025, 5, 26).date(),  # Memorial Day
-            datetime(2025, 6, 19).date(),  # Juneteenth
-            datetime(2025, 7, 4).date(),   # Independence Day
-            datetime(2025, 9, 1).date(),   # Labor Day
-            datetime(2025, 11, 27).date(), # Thanksgiving
-            datetime(2025, 12, 25).date(), # Christmas
-        ]
-        
-        return check_date.date() not in holidays_2025
+        return trading_calendar.is_trading_day(check_date)
 
     def reset_daily_sessions(self, date):
         """Reset session tracking for a new day"""
@@ -187,6 +159,9 @@ class ProductionAutoTrader:
             'close': False
         }
         self.logger.info(f"📅 New trading day: {date.strftime('%Y-%m-%d (%A)')}")
+        if not self.test_mode:
+            # Schließzeit des neuen Tages (Halbtag: HALF_DAY_CLOSE_TIME)
+            self.calculate_trading_times()
 
     def run_comprehensive_backtest(self) -> bool:
         """Run the comprehensive backtest to get fresh signals"""
@@ -199,7 +174,7 @@ class ProductionAutoTrader:
         try:
             # Run the backtest script
             result = subprocess.run([
-                sys.executable, 'complete_comprehensive_backtest.py'
+                sys.executable, 'complete_comprehensive_backtest.py', '--charts', 'background'
             ], capture_output=True, text=True, timeout=600)  # 10 minute timeout
             
             if result.returncode == 0:
@@ -219,6 +194,16 @@ class ProductionAutoTrader:
             self.logger.error(f"❌ Error running backtest: {e}")
             return False
 
+    def live_signals_current(self, session_type: str) -> bool:
+        """True if live_signal_engine.py has published fresh signals for this session"""
+        if self.dry_run:
+            return False
+        from live_signal_engine import load_live_signals
+        if load_live_signals(session_type) is None:
+            return False
+        self.logger.info(f"📡 Live signal engine is current - skipping {session_type} backtest")
+        return True
+
     def get_todays_signals(self, session_type: str) -> List:
         """Get today's trading signals for the specified session type"""
         if self.dry_run:
@@ -234,9 +219,14 @@ class ProductionAutoTrader:
         self.logger.info(f"🔍 Checking for {session_type} signals...")
         
         try:
-            # Import and use the signal checker
-            from check_todays_signals import check_todays_signals
-            signals = check_todays_signals(session_type)
+            # Prefer the running live signal engine, fall back to the backtest results
+            from live_signal_engine import load_live_signals
+            signals = load_live_signals(session_type)
+            if signals is not None:
+                self.logger.info(f"📡 Using live signal engine for {session_type} signals")
+            else:
+                from check_todays_signals import check_todays_signals
+                signals = check_todays_signals(session_type)
             self.logger.info(f"📊 Found {len(signals)} {session_type} signals")
             return signals or []
         
@@ -291,6 +281,8 @@ class ProductionAutoTrader:
                     ok = await loop.run_in_executor(None, trader.place_order, order, True)
                     if ok:
                         successful_orders += 1
+                    log_event('order', trader='production_auto', session_type=session_type, ticker=order['ticker'],
+                              action=order['action'], shares=order.get('shares'), ok=bool(ok))
                     
                     # Brief pause between orders
                     if i < len(orders):
@@ -314,33 +306,19 @@ class ProductionAutoTrader:
             return False
 
     def log_session_results(self, session_type: str, signals_count: int, orders_count: int, successful_orders: int):
-        """Log session results to file"""
+        """Append session results to the event log"""
         try:
-            session_log = {
-                'timestamp': datetime.now().isoformat(),
-                'session_type': session_type,
-                'signals_found': signals_count,
-                'orders_created': orders_count,
-                'orders_successful': successful_orders,
-                'success_rate': successful_orders / orders_count if orders_count > 0 else 1.0,
-                'paper_trading': self.paper_trading,
-                'dry_run': self.dry_run
-            }
-            
-            # Append to daily session log
-            log_file = f'logs/sessions_{datetime.now().strftime("%Y%m%d")}.json'
-            
-            if os.path.exists(log_file):
-                with open(log_file, 'r') as f:
-                    sessions = json.load(f)
-            else:
-                sessions = []
-            
-            sessions.append(session_log)
-            
-            with open(log_file, 'w') as f:
-                json.dump(sessions, f, indent=2)
-        
+            log_event(
+                'session',
+                trader='production_auto',
+                session_type=session_type,
+                signals_found=signals_count,
+                orders_created=orders_count,
+                orders_successful=successful_orders,
+                success_rate=successful_orders / orders_count if orders_count > 0 else 1.0,
+                paper_trading=self.paper_trading,
+                dry_run=self.dry_run,
+            )
         except Exception as e:
             self.logger.error(f"❌ Error logging session results: {e}")
 
@@ -433,8 +411,8 @@ class ProductionAutoTrader:
                         
                         self.logger.info("🌅 Starting OPEN trading session")
                         
-                        # Run backtest first
-                        if self.run_comprehensive_backtest() and self.running:
+                        # Run backtest first (not needed while the live signal engine is current)
+                        if (self.live_signals_current('OPEN') or self.run_comprehensive_backtest()) and self.running:
                             # Get signals and execute
                             signals = self.get_todays_signals('OPEN')
                             if self.running:
@@ -455,8 +433,8 @@ class ProductionAutoTrader:
                         
                         self.logger.info("🌙 Starting CLOSE trading session")
                         
-                        # Run backtest first
-                        if self.run_comprehensive_backtest() and self.running:
+                        # Run backtest first (not needed while the live signal engine is current)
+                        if (self.live_signals_current('CLOSE') or self.run_comprehensive_backtest()) and self.running:
                             # Get signals and execute
                             signals = self.get_todays_signals('CLOSE')
                             if self.running:
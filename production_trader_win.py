@@ -31,9 +31,7 @@ Examples:
 
 import asyncio
 import sys
-import os
 import signal
-import json
 import subprocess
 import logging
 from datetime import datetime, time, timedelta
@@ -43,6 +41,8 @@ from pathlib import Path
 # Import our modules
 from config import *
 from tickers_config import tickers
+from event_log import log_event
+import trading_calendar
 import importlib
 
 # Configure logging
@@ -167,17 +167,9 @@ class ProductionAutoTrader:
             self.logger.info("TEST MODE: Using accelerated timing")
         else:
             # Production: use config-driven offsets for open/close sessions
-            market_open = datetime.strptime(MARKET_OPEN_TIME, "%H:%M")
-            market_close = datetime.strptime(MARKET_CLOSE_TIME, "%H:%M")
-
-            # OPEN session: OPEN_TRADE_DELAY minutes after market open
-            open_plus_delay = market_open + timedelta(minutes=OPEN_TRADE_DELAY)
-            self.open_trade_time = open_plus_delay.time()
-
-            # CLOSE session: CLOSE_TRADE_ADVANCE minutes before market close
-            close_minus_advance = market_close - timedelta(minutes=CLOSE_TRADE_ADVANCE)
-            self.close_trade_time = close_minus_advance.time()
-            self.market_close = market_close.time()
+            # Market close comes from trading_calendar (HALF_DAY_CLOSE_TIME on half days)
+            self.open_trade_time, self.close_trade_time, self.market_close = trading_calendar.session_times(
+                self.get_market_now(), OPEN_TRADE_DELAY, CLOSE_TRADE_ADVANCE)
 
         self.logger.info(f"TRADING SCHEDULE:")
         self.logger.info(f"  OPEN trades: {self.open_trade_time.strftime('%H:%M')} (open + {OPEN_TRADE_DELAY}m)")
@@ -185,29 +177,10 @@ class ProductionAutoTrader:
         self.logger.info(f"  Market close: {self.market_close.strftime('%H:%M')}")
 
     def is_trading_day(self, check_date: datetime = None) -> bool:
-        """Check if date is a trading day (excludes weekends and major holidays)"""
+        """Check if date is an NYSE session (weekends, holidays and closures from trading_calendar)"""
         if check_date is None:
             check_date = datetime.now()
-        
-        # Skip weekends
-        if check_date.weekday() in [5, 6]:  # Saturday=5, Sunday=6
-            return False
-        
-        # US market holidays for 2025 (basic list - can be expanded)
-        holidays_2025 = [
-            datetime(2025, 1, 1).date(),   # New Year's Day
-            datetime(2025, 1, 20).date(),  # MLK Day
-            datetime(2025, 2, 17).date(),  # Presidents' Day
-            datetime(2025, 4, 18).date(),  # Good Friday
-            datetime(2025, 5, 26).date(),  # Memorial Day
-            datetime(2025, 6, 19).date(),  # Juneteenth
-            datetime(2025, 7, 4).date(),   # Independence Day
-            datetime(2025, 9, 1).date(),   # Labor Day
-            datetime(2025, 11, 27).date(), # Thanksgiving
-            datetime(2025, 12, 25).date(), # Christmas
-        ]
-        
-        return check_date.date() not in holidays_2025
+        return trading_calendar.is_trading_day(check_date)
 
     def reset_daily_sessions(self, date):
         """Reset session tracking for a new day. Always allow OPEN session unless already executed earlier today."""
@@ -219,6 +192,9 @@ class ProductionAutoTrader:
             'close': False
         }
         self.logger.info(f"NEW TRADING DAY: {date.strftime('%Y-%m-%d (%A)')}")
+        if not self.test_mode:
+            # Schließzeit des neuen Tages (Halbtag: HALF_DAY_CLOSE_TIME)
+            self.calculate_trading_times()
         if now.time() > self.open_trade_time:
             self.logger.info(f"NOTE: Current time is past scheduled OPEN trade time ({self.open_trade_time.strftime('%H:%M')}). OPEN session will run now if not yet executed.")
 
@@ -233,7 +209,7 @@ class ProductionAutoTrader:
         try:
             # Run the original backtest script
             result = subprocess.run([
-                sys.executable, 'complete_comprehensive_backtest.py'
+                sys.executable, 'complete_comprehensive_backtest.py', '--charts', 'background'
             ], capture_output=True, text=True, timeout=600, encoding='utf-8', errors='ignore')  # Handle Unicode gracefully
             
             if result.returncode == 0:
@@ -266,6 +242,11 @@ class ProductionAutoTrader:
             self.logger.info("DRY RUN: Skipping real backtest (simulated)")
             return True
 
+        from live_signal_engine import load_live_signals
+        if load_live_signals(session_label) is not None:
+            self.logger.info(f"LIVE SIGNAL ENGINE IS CURRENT - no backtest needed for {session_label} session")
+            return True
+
         now = datetime.now()
         if self._last_backtest_run is not None:
             delta_min = (now - self._last_backtest_run).total_seconds() / 60.0
@@ -427,9 +408,14 @@ class ProductionAutoTrader:
             self.logger.info(f"CHECKING FOR {session_type} ENTRY SIGNALS...")
             
             try:
-                # Import and use the signal checker
-                from check_todays_signals import check_todays_signals
-                entry_signals = check_todays_signals(session_type)
+                # Prefer the running live signal engine, fall back to the backtest results
+                from live_signal_engine import load_live_signals
+                entry_signals = load_live_signals(session_type)
+                if entry_signals is not None:
+                    self.logger.info(f"USING LIVE SIGNAL ENGINE FOR {session_type} ENTRY SIGNALS")
+                else:
+                    from check_todays_signals import check_todays_signals
+                    entry_signals = check_todays_signals(session_type)
                 if entry_signals:
                     self.logger.info(f"FOUND {len(entry_signals)} {session_type} entry signals")
                     all_signals.extend(entry_signals)
@@ -538,6 +524,8 @@ class ProductionAutoTrader:
                     ok = await loop.run_in_executor(None, trader.place_order, order, True)
                     if ok:
                         successful_orders += 1
+                    log_event('order', trader='production_win', session_type=session_type, ticker=order['ticker'],
+                              action=order['action'], shares=order.get('shares'), ok=bool(ok))
                     
                     # Brief pause between orders
                     if i < len(orders):
@@ -562,33 +550,19 @@ class ProductionAutoTrader:
             return False
 
     def log_session_results(self, session_type: str, signals_count: int, orders_count: int, successful_orders: int):
-        """Log session results to file"""
+        """Append session results to the event log"""
         try:
-            session_log = {
-                'timestamp': datetime.now().isoformat(),
-                'session_type': session_type,
-                'signals_found': signals_count,
-                'orders_created': orders_count,
-                'orders_successful': successful_orders,
-                'success_rate': successful_orders / orders_count if orders_count > 0 else 1.0,
-                'paper_trading': self.paper_trading,
-                'dry_run': self.dry_run
-            }
-            
-            # Append to daily session log
-            log_file = f'logs/sessions_{datetime.now().strftime("%Y%m%d")}.json'
-            
-            if os.path.exists(log_file):
-                with open(log_file, 'r') as f:
-                    sessions = json.load(f)
-            else:
-                sessions = []
-            
-            sessions.append(session_log)
-            
-            with open(log_file, 'w') as f:
-                json.dump(sessions, f, indent=2)
-        
+            log_event(
+                'session',
+                trader='production_win',
+                session_type=session_type,
+                signals_found=signals_count,
+                orders_created=orders_count,
+                orders_successful=successful_orders,
+                success_rate=successful_orders / orders_count if orders_count > 0 else 1.0,
+                paper_trading=self.paper_trading,
+                dry_run=self.dry_run,
+            )
         except Exception as e:
             self.logger.error(f"ERROR logging session results: {e}")
 
@@ -0,0 +1,225 @@
+"""Data-driven HTML backtest report.
+
+Instead of rendering every signal and trade into one HTML string, the report
+is split into
+- a lightweight HTML shell (summary table + collapsible per-ticker sections)
+- one compact data file per ticker/side in ``data_dir``.
+
+Data files are JSON payloads wrapped in a tiny JS callback so the shell can load
+them lazily via <script> tags (works from file:// where fetch() is blocked).
+Tables are paginated in the browser, so nothing is truncated and generation
+cost no longer grows with the number of rendered rows.
+"""
+import json
+import math
+import os
+import re
+from datetime import datetime
+
+from performance_analytics import performance_table
+
+SIGNAL_COLUMNS = [
+    "Long Date detected", "Long Action", "Short Date detected", "Short Action",
+    "Supp/Resist", "Level trade", "Level Close", "p_param", "tw_param",
+]
+
+SUMMARY_COLUMNS = ["Ticker", "Side", "p", "tw", "Trades", "Win%", "Sum PnL", "Avg PnL", "MaxDD%", "Init", "Final", "ROI%"]
+
+
+def _cell(v):
+    """Convert a value into a compact JSON-safe cell."""
+    if v is None:
+        return None
+    if isinstance(v, float):
+        return None if math.isnan(v) or math.isinf(v) else round(v, 6)
+    if isinstance(v, (int, str, bool)):
+        return v
+    if hasattr(v, "item"):  # numpy scalar
+        return _cell(v.item())
+    s = str(v)
+    return None if s in ("NaT", "nan") else s
+
+
+def _table(rows, columns=None):
+    """Columnar table payload: {"columns": [...], "rows": [[...], ...]}."""
+    if columns is None:
+        columns = []
+        for r in rows:
+            for k in r.keys():
+                if k not in columns:
+                    columns.append(k)
+    else:
+        columns = [c for c in columns if any(c in r for r in rows)]
+    return {"columns": columns, "rows": [[_cell(r.get(c)) for c in columns] for r in rows]}
+
+
+def _data_key(ticker, side):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", f"{ticker}_{side}")
+
+
+def _summary_row(ticker, side, sd):
+    st = sd.get("stats", {}) or {}
+    params = sd.get("parameters", {}) or {}
+    init_cap = st.get("initial_capital", 0) or 0
+    final_cap = st.get("final_capital", 0) or 0
+    roi = (final_cap / init_cap - 1) * 100 if init_cap else 0
+    return [
+        ticker, side.upper(), params.get("p"), params.get("tw"),
+        st.get("trades", 0), _cell(float(st.get("win_rate", 0) or 0)),
+        _cell(float(st.get("sum_pnl", 0) or 0)), _cell(float(st.get("avg_pnl", 0) or 0)),
+        _cell(float(st.get("max_drawdown_pct", 0) or 0)),
+        _cell(float(init_cap)), _cell(float(final_cap)), _cell(float(roi)),
+    ]
+
+
+def write_side_data(ticker, side, sd, data_dir):
+    """Write one ticker/side data file. Returns (key, relative path, counts)."""
+    key = _data_key(ticker, side)
+    payload = {
+        "signals": _table(sd.get("extended_signals_data", []) or [], SIGNAL_COLUMNS),
+        "trades": _table(sd.get("trades", []) or []),
+    }
+    fn = os.path.join(data_dir, f"{key}.js")
+    with open(fn, "w", encoding="utf-8") as f:
+        f.write("window.__reportData(")
+        f.write(json.dumps(key))
+        f.write(",")
+        json.dump(payload, f, separators=(",", ":"), default=str)
+        f.write(");\n")
+    counts = (len(payload["signals"]["rows"]), len(payload["trades"]["rows"]))
+    return key, os.path.basename(data_dir) + "/" + os.path.basename(fn), counts
+
+
+def _performance_html(results):
+    """Risk/return metrics per ticker/side (performance_analytics, one batched pass)."""
+    try:
+        perf = performance_table(results)
+    except Exception as e:
+        print(f"[WARN] Performance metrics unavailable: {e}")
+        return ""
+    if perf.empty:
+        return ""
+    rows = ["<h2>Performance</h2><table><tr>" + "".join(f"<th>{c}</th>" for c in perf.columns) + "</tr>"]
+    for rec in perf.itertuples(index=False):
+        cells = []
+        for v in rec:
+            v = _cell(v)
+            cells.append(f"<td>{v:.2f}</td>" if isinstance(v, float) else f"<td>{'' if v is None else v}</td>")
+        rows.append("<tr>" + "".join(cells) + "</tr>")
+    return "\n".join(rows) + "</table>\n"
+
+
+_SHELL_STYLE = (
+    "body{font-family:Arial;background:#111;color:#eee;margin:20px;}"
+    "table{border-collapse:collapse;width:100%;margin-bottom:12px;}"
+    "th,td{border:1px solid #444;padding:4px 6px;font-size:12px;}th{background:#222;}"
+    "tr:nth-child(even){background:#1d1d1d;}h1,h2,h3{color:#fff;}.pos{color:#4caf50;}.neg{color:#ff5252;}"
+    "details{margin:12px 0;}summary{cursor:pointer;font-weight:bold;}"
+    ".grid{display:grid;grid-template-columns:repeat(auto-fit,minmax(220px,1fr));gap:12px;}"
+    ".card{background:#1c1c1c;padding:8px 10px;border:1px solid #333;border-radius:6px;}"
+    ".pager button{background:#222;color:#eee;border:1px solid #444;margin-right:4px;cursor:pointer;}"
+)
+
+_SHELL_SCRIPT = """
+var REPORT_DATA = {}, PENDING = {}, PAGE_SIZE = %(page_size)d;
+window.__reportData = function(key, payload){ REPORT_DATA[key] = payload; (PENDING[key] || []).forEach(function(cb){ cb(payload); }); delete PENDING[key]; };
+function loadData(key, src, cb){
+  if (REPORT_DATA[key]) { cb(REPORT_DATA[key]); return; }
+  if (PENDING[key]) { PENDING[key].push(cb); return; }
+  PENDING[key] = [cb];
+  var s = document.createElement('script'); s.src = src; document.body.appendChild(s);
+}
+function esc(v){ return v === null || v === undefined ? '' : String(v).replace(/&/g,'&amp;').replace(/</g,'&lt;'); }
+function renderTable(el, table, page){
+  var n = table.rows.length, pages = Math.max(1, Math.ceil(n / PAGE_SIZE));
+  page = Math.min(Math.max(page, 0), pages - 1);
+  if (!n) { el.innerHTML = '<p>No rows</p>'; return; }
+  var h = ['<div class="pager">'];
+  h.push('<button data-p="0">&laquo;</button><button data-p="' + (page - 1) + '">&lsaquo;</button>');
+  h.push(' Page ' + (page + 1) + ' / ' + pages + ' (' + n + ' rows) ');
+  h.push('<button data-p="' + (page + 1) + '">&rsaquo;</button><button data-p="' + (pages - 1) + '">&raquo;</button></div>');
+  h.push('<table><tr>' + table.columns.map(function(c){ return '<th>' + esc(c) + '</th>'; }).join('') + '</tr>');
+  table.rows.slice(page * PAGE_SIZE, (page + 1) * PAGE_SIZE).forEach(function(r){
+    h.push('<tr>' + r.map(function(v){ return '<td>' + esc(v) + '</td>'; }).join('') + '</tr>');
+  });
+  h.push('</table>');
+  el.innerHTML = h.join('');
+  el.querySelectorAll('button[data-p]').forEach(function(b){
+    b.onclick = function(){ renderTable(el, table, parseInt(b.getAttribute('data-p'), 10)); };
+  });
+}
+document.querySelectorAll('details[data-key]').forEach(function(d){
+  d.addEventListener('toggle', function(){
+    if (!d.open || d.getAttribute('data-loaded')) return;
+    d.setAttribute('data-loaded', '1');
+    var target = d.querySelector('.table-slot');
+    loadData(d.getAttribute('data-key'), d.getAttribute('data-src'), function(payload){
+      renderTable(target, payload[d.getAttribute('data-table')], 0);
+    });
+  });
+});
+"""
+
+
+def write_backtest_report(results, html_path="runner_fullbacktest_report.html", data_dir=None, page_size=100,
+                          title="Runner Full Backtest Report"):
+    """Write the HTML shell plus per-ticker data files for a results dict.
+
+    results: {ticker: {"long": {...}, "short": {...}}} as produced by the backtest
+    (parameters, stats, extended_signals_data, trades per side).
+    """
+    if data_dir is None:
+        data_dir = os.path.splitext(html_path)[0] + "_data"
+    os.makedirs(data_dir, exist_ok=True)
+
+    summary_rows = []
+    sections = []
+    for tkr, data in (results or {}).items():
+        section = [f"<h2>{tkr}</h2>"]
+        for side in ["long", "short"]:
+            if side not in data:
+                continue
+            sd = data[side]
+            summary_rows.append(_summary_row(tkr, side, sd))
+            # Data files are written ticker by ticker; only counts stay in memory
+            key, src, (n_signals, n_trades) = write_side_data(tkr, side, sd, data_dir)
+            st = sd.get("stats", {}) or {}
+            params = sd.get("parameters", {}) or {}
+            section.append(f"<h3>{side.upper()} Strategy</h3><div class='grid'>")
+            for label, val in [
+                ("p", params.get("p")), ("tw", params.get("tw")),
+                ("Trades", st.get("trades")), ("Win%", st.get("win_rate")),
+                ("SumPnL", st.get("sum_pnl")), ("AvgPnL", st.get("avg_pnl")),
+                ("MaxDD%", st.get("max_drawdown_pct")),
+                ("InitCap", st.get("initial_capital")), ("FinalCap", st.get("final_capital")),
+            ]:
+                section.append(f"<div class='card'><b>{label}</b><br>{val}</div>")
+            section.append("</div>")
+            for table, label, count in [("signals", "Extended Signals", n_signals), ("trades", "Matched Trades", n_trades)]:
+                section.append(
+                    f"<details data-key='{key}' data-src='{src}' data-table='{table}'>"
+                    f"<summary>{label} ({count})</summary><div class='table-slot'>Loading...</div></details>"
+                )
+        sections.append("".join(section))
+
+    with open(html_path, "w", encoding="utf-8") as hf:
+        hf.write(f"<html><head><meta charset='utf-8'><title>{title}</title><style>{_SHELL_STYLE}</style></head><body>\n")
+        hf.write(f"<h1>{title} - {datetime.now().strftime('%Y-%m-%d %H:%M')}</h1>\n")
+        hf.write("<h2>Summary</h2><table><tr>" + "".join(f"<th>{c}</th>" for c in SUMMARY_COLUMNS) + "</tr>\n")
+        for row in summary_rows:
+            cells = []
+            for col, val in zip(SUMMARY_COLUMNS, row):
+                if col in ("Sum PnL", "ROI%"):
+                    css = "pos" if (val or 0) >= 0 else "neg"
+                    cells.append(f"<td class='{css}'>{'' if val is None else f'{val:.2f}'}</td>")
+                elif isinstance(val, float):
+                    cells.append(f"<td>{val:.2f}</td>")
+                else:
+                    cells.append(f"<td>{'' if val is None else val}</td>")
+            hf.write("<tr>" + "".join(cells) + "</tr>\n")
+        hf.write("</table>\n")
+        hf.write(_performance_html(results))
+        for section in sections:
+            hf.write(section + "\n")
+        hf.write("<script>" + _SHELL_SCRIPT % {"page_size": int(page_size)} + "</script>\n</body></html>\n")
+    return html_path
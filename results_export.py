@@ -0,0 +1,242 @@
+"""Compact, streamable backtest exports (NDJSON with a per-ticker offset index).
+
+complete_comprehensive_backtest_results.json and runner_fullbacktest_results.json
+were written in one json.dump(indent=2, default=str) at the very end: every
+timestamp stringified, every equity curve point on its own line, and a reader
+had to parse the whole file to get one ticker. With RESULTS_FORMAT = "ndjson"
+(or "both") the exports go to <name>.ndjson instead:
+
+    {"ticker":"AAPL","data_info":{...},"long":{...}}      one compact line per ticker
+    {"ticker":"MSFT",...}
+
+Datetimes are stored as epoch seconds (keys "date" / "*_date"), numpy scalars
+and equity curves as plain floats, NaN as null. ResultsWriter appends each
+ticker as soon as it is finished and keeps <name>.ndjson.idx ({ticker:
+[offset, length]} plus the file size); read_ticker() seeks straight to one
+line. A missing or stale index (e.g. after an aborted run) is rebuilt by
+scanning the line prefixes, without parsing the records. Readers take the
+newer of <name>.json and <name>.ndjson (results_path).
+
+    python results_export.py complete_comprehensive_backtest_results.json   # convert an existing export
+    python results_export.py runner_fullbacktest_results.ndjson AAPL          # print one ticker
+"""
+import datetime as _dt
+import json
+import math
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from config import RESULTS_FORMAT
+
+_EPOCH = pd.Timestamp("1970-01-01")
+_TICKER_PREFIX = re.compile(rb'^\{"ticker":("(?:[^"\\]|\\.)*")')
+
+
+def ndjson_path(path):
+    """<name>.json -> <name>.ndjson (other names unchanged)."""
+    return path[:-5] + ".ndjson" if path.endswith(".json") else path
+
+
+def _is_date_key(key):
+    return isinstance(key, str) and (key == "date" or key.endswith("_date"))
+
+
+def encode(obj):
+    """Results object -> plain JSON types (datetimes as epoch seconds, NaN as None)."""
+    if isinstance(obj, dict):
+        return {str(k): encode(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [encode(v) for v in obj]
+    if isinstance(obj, (pd.Series, np.ndarray)):
+        return [encode(v) for v in np.asarray(obj).tolist()]
+    if isinstance(obj, (pd.Timestamp, _dt.datetime, _dt.date, np.datetime64)):
+        ts = pd.Timestamp(obj)
+        if pd.isna(ts):
+            return None
+        if ts.tz is not None:
+            ts = ts.tz_convert(None)
+        return int((ts - _EPOCH) // pd.Timedelta(seconds=1))
+    if isinstance(obj, (bool, np.bool_)):
+        return bool(obj)
+    if isinstance(obj, (int, np.integer)):
+        return int(obj)
+    if isinstance(obj, (float, np.floating)):
+        return None if not math.isfinite(obj) else float(obj)
+    if obj is None or isinstance(obj, str):
+        return obj
+    return str(obj)
+
+
+def decode(obj, key=None):
+    """Inverse of encode() for date keys: epoch seconds -> 'YYYY-MM-DD HH:MM:SS' (as str(Timestamp))."""
+    if isinstance(obj, dict):
+        return {k: decode(v, k) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [decode(v, key) for v in obj]
+    if _is_date_key(key) and isinstance(obj, int) and not isinstance(obj, bool):
+        return str(_EPOCH + pd.Timedelta(seconds=obj))
+    return obj
+
+
+def _dumps(ticker, record):
+    return json.dumps({"ticker": ticker, **encode(record)}, separators=(",", ":"), allow_nan=False)
+
+
+class ResultsWriter:
+    """Streams one NDJSON line per ticker; the offset index is rewritten on close()."""
+
+    def __init__(self, path):
+        self.path = ndjson_path(path)
+        self.index = {}
+        self._f = open(self.path, "wb")
+
+    def write(self, ticker, record):
+        line = _dumps(ticker, record).encode("utf-8") + b"\n"
+        self.index[ticker] = [self._f.tell(), len(line)]
+        self._f.write(line)
+        self._f.flush()
+
+    def close(self):
+        if self._f.closed:
+            return
+        size = self._f.tell()
+        self._f.close()
+        _write_index(self.path, self.index, size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _write_index(path, index, size):
+    tmp = path + ".idx.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"size": size, "tickers": index}, f, separators=(",", ":"))
+    os.replace(tmp, path + ".idx")
+
+
+def _scan_index(path):
+    """{ticker: [offset, length]} from the line prefixes (records are not parsed)."""
+    index, offset = {}, 0
+    with open(path, "rb") as f:
+        for line in f:
+            m = _TICKER_PREFIX.match(line)
+            if m and line.endswith(b"\n"):
+                index[json.loads(m.group(1))] = [offset, len(line)]
+            offset += len(line)
+    return index
+
+
+def read_index(path):
+    """Offset index of an NDJSON export; rebuilt (and saved) when missing or stale."""
+    path = ndjson_path(path)
+    size = os.path.getsize(path)
+    try:
+        with open(path + ".idx", "r", encoding="utf-8") as f:
+            idx = json.load(f)
+        if idx.get("size") == size:
+            return idx["tickers"]
+    except (OSError, ValueError):
+        pass
+    index = _scan_index(path)
+    try:
+        _write_index(path, index, size)
+    except OSError:
+        pass
+    return index
+
+
+def read_ticker(path, ticker):
+    """One ticker's record from an NDJSON export (None when absent); only that line is parsed."""
+    path = ndjson_path(path)
+    pos = read_index(path).get(ticker)
+    if pos is None:
+        return None
+    with open(path, "rb") as f:
+        f.seek(pos[0])
+        record = json.loads(f.read(pos[1]))
+    record.pop("ticker", None)
+    return decode(record)
+
+
+def iter_records(path):
+    """(ticker, record) per line of an NDJSON export, streamed."""
+    with open(ndjson_path(path), "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # abgebrochene letzte Zeile
+            yield record.pop("ticker"), decode(record)
+
+
+def results_path(path):
+    """Export to read for path: the newer of <name>.json and <name>.ndjson (None if neither exists).
+
+    With RESULTS_FORMAT = "ndjson" an old tracked .json stays on disk; the
+    mtime decides, so readers never pick up that stale copy.
+    """
+    stamps = []
+    for p in dict.fromkeys((path, ndjson_path(path))):
+        try:
+            stamps.append((os.stat(p).st_mtime_ns, p))
+        except OSError:
+            pass
+    return max(stamps)[1] if stamps else None
+
+
+def load_results_file(path):
+    """{ticker: record} from the newer of the .json / .ndjson export of path (None without file)."""
+    path = results_path(path)
+    if path is None:
+        return None
+    if path.endswith(".json"):
+        with open(path, "r") as f:
+            return json.load(f)
+    return dict(iter_records(path))
+
+
+def results_exists(path):
+    return results_path(path) is not None
+
+
+def write_results(results, path, fmt=RESULTS_FORMAT):
+    """Write {ticker: record} as legacy JSON, NDJSON or both (fmt = RESULTS_FORMAT)."""
+    written = []
+    if fmt in ("ndjson", "both"):
+        with ResultsWriter(path) as w:
+            for ticker, record in results.items():
+                w.write(ticker, record)
+        written.append(w.path)
+    if fmt in ("json", "both"):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+        written.append(path)
+    return written
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    src = sys.argv[1]
+    if len(sys.argv) > 2:
+        for t in sys.argv[2:]:
+            print(json.dumps({t: read_ticker(src, t)}, indent=2))
+    else:
+        data = load_results_file(src)
+        if data is None:
+            print(f"❌ {src} not found")
+            sys.exit(1)
+        out = write_results(data, src, "ndjson")[0]
+        print(f"[SAVE] {len(data)} tickers -> {out} ({os.path.getsize(src) / 1024:.0f} KB -> "
+              f"{os.path.getsize(out) / 1024:.0f} KB)")
@@ -0,0 +1,265 @@
+"""Cached, indexed access to complete_comprehensive_backtest_results.json (or its .ndjson export).
+
+The CLI tools (single_trades, paper_trading_list, comprehensive_trade_summary,
+trade_viewer, check_todays_signals) each json.load'ed the whole results file
+and parsed every trade date with strptime in a Python loop. Here the file is
+loaded once per change: the raw dict plus two typed tables
+
+    trades    ticker, side, n, entry_date, exit_date, entry_price, exit_price, shares, fee, pnl, p, tw
+    signals   ticker, side, n, date, action, price, signal_type, p_param, tw_param
+
+(dates as datetime64, sorted by ticker/side/date, n = position in the JSON
+list) are kept in memory and pickled to PIPELINE_CACHE_DIR, both keyed by
+the file's mtime/size. Later runs reuse the pickle without parsing JSON;
+queries use per-(ticker, side) slices plus a binary search on the date:
+
+    store = load_store()
+    store.trades_for("AAPL", "long", "2025-07-01", "2025-08-01")
+    store.signals_for(side="short", start=today, end=today)
+    store_of(load_results())            # the same store for a dict from load_results()
+
+The raw dict is shared between callers: do not mutate it without writing it
+back through save_results().
+"""
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from config import PIPELINE_CACHE_DIR, RESULTS_FILE
+from results_export import load_results_file, ndjson_path, results_path, write_results
+
+# Seite -> mögliche Schlüssel (runner-/Engine-Export bzw. Signal-Export)
+SIDE_KEYS = {"long": ("long", "long_strategy"), "short": ("short", "short_strategy")}
+_TRADE_FIELDS = {
+    "long": ("buy_date", "sell_date", "buy_price", "sell_price"),
+    "short": ("short_date", "cover_date", "short_price", "cover_price"),
+}
+TRADE_COLUMNS = ["ticker", "side", "n", "entry_date", "exit_date", "entry_price", "exit_price",
+                 "shares", "fee", "pnl", "p", "tw"]
+SIGNAL_COLUMNS = ["ticker", "side", "n", "date", "action", "price", "signal_type", "p_param", "tw_param"]
+_CACHE_VERSION = 1
+
+_stores = {}
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def parse_dates(values):
+    """Date strings ('2025-08-01' or '2025-08-01 00:00:00') -> datetime64 array (NaT when unparseable)."""
+    return pd.to_datetime(pd.Series(values, dtype=object), format="ISO8601", errors="coerce").to_numpy()
+
+
+def trade_frame(trades, ticker="", side=None, params=None):
+    """Trade dicts (long or short layout) -> typed frame with TRADE_COLUMNS."""
+    params = params or {}
+    rows = []
+    for n, tr in enumerate(trades or []):
+        s = side or ("long" if "buy_date" in tr else "short")
+        d_in, d_out, px_in, px_out = _TRADE_FIELDS[s]
+        rows.append((ticker, s, n, tr.get(d_in), tr.get(d_out), tr.get(px_in), tr.get(px_out),
+                     tr.get("shares"), tr.get("fee"), tr.get("pnl")))
+    df = pd.DataFrame(rows, columns=TRADE_COLUMNS[:10])
+    for col in ("entry_date", "exit_date"):
+        df[col] = parse_dates(df[col])
+    for col in ("entry_price", "exit_price", "fee", "pnl"):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df["p"], df["tw"] = params.get("p"), params.get("tw")
+    return df
+
+
+def _side_data(ticker_data, side):
+    """(trades, extended_signals, parameters) of one side over all key variants."""
+    trades, signals, params = [], [], {}
+    for key in SIDE_KEYS[side]:
+        block = ticker_data.get(key)
+        if not isinstance(block, dict):
+            continue
+        trades = trades or block.get("trades") or []
+        signals = signals or block.get("extended_signals") or []
+        params = params or block.get("parameters") or {}
+    return trades, signals, params
+
+
+def _slices(df):
+    """{(ticker, side): (start, stop)} of a frame sorted by ticker and side."""
+    if df.empty:
+        return {}
+    keys = list(zip(df["ticker"], df["side"]))
+    starts = [0] + [i for i in range(1, len(keys)) if keys[i] != keys[i - 1]]
+    stops = starts[1:] + [len(keys)]
+    return {keys[a]: (a, b) for a, b in zip(starts, stops)}
+
+
+class ResultsStore:
+    """Parsed results file: raw dict, trades and signals tables with (ticker, side) slices."""
+
+    def __init__(self, path, stamp, raw):
+        self.path = path
+        self.stamp = stamp
+        self.raw = raw
+        frames, sigs = [], []
+        for ticker, ticker_data in raw.items():
+            if not isinstance(ticker_data, dict):
+                continue
+            for side in SIDE_KEYS:
+                trades, signals, params = _side_data(ticker_data, side)
+                if trades:
+                    frames.append(trade_frame(trades, ticker, side, params))
+                if signals:
+                    sig = pd.DataFrame(signals)
+                    sig = sig.reindex(columns=SIGNAL_COLUMNS[3:])
+                    sig.insert(0, "n", np.arange(len(sig)))
+                    sig.insert(0, "side", side)
+                    sig.insert(0, "ticker", ticker)
+                    sig["date"] = parse_dates(sig["date"])
+                    sig["price"] = pd.to_numeric(sig["price"], errors="coerce")
+                    sigs.append(sig)
+        self.trades = self._index(frames, TRADE_COLUMNS, "entry_date")
+        self.signals = self._index(sigs, SIGNAL_COLUMNS, "date")
+        self._trade_slices = _slices(self.trades)
+        self._signal_slices = _slices(self.signals)
+
+    @staticmethod
+    def _index(frames, columns, date_col):
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        df = pd.concat(frames, ignore_index=True)
+        return df.sort_values(["ticker", "side", date_col, "n"], kind="stable").reset_index(drop=True)
+
+    @property
+    def tickers(self):
+        return [t for t, d in self.raw.items() if isinstance(d, dict)]
+
+    def _query(self, df, slices, date_col, ticker, side, start, end, sorted_col):
+        if isinstance(ticker, str):
+            ticker = [ticker]
+        if isinstance(side, str):
+            side = [side.lower()]
+        lo = None if start is None else np.datetime64(pd.Timestamp(start), "ns")
+        hi = None if end is None else np.datetime64(pd.Timestamp(end), "ns")
+        parts = []
+        for (t, s), (a, b) in slices.items():
+            if (ticker is not None and t not in ticker) or (side is not None and s not in side):
+                continue
+            if date_col == sorted_col:
+                dates, first = df[date_col].to_numpy()[a:b], a
+                if lo is not None:
+                    a = first + int(np.searchsorted(dates, lo, side="left"))
+                if hi is not None:
+                    b = first + int(np.searchsorted(dates, hi, side="right"))
+                parts.append(df.iloc[a:b])
+            else:
+                part = df.iloc[a:b]
+                mask = np.ones(len(part), dtype=bool)
+                if lo is not None:
+                    mask &= part[date_col].to_numpy() >= lo
+                if hi is not None:
+                    mask &= part[date_col].to_numpy() <= hi
+                parts.append(part[mask])
+        if not parts:
+            return df.iloc[0:0]
+        return pd.concat(parts)
+
+    def trades_for(self, ticker=None, side=None, start=None, end=None, on="entry_date"):
+        """Trades of ticker(s)/side(s) whose `on` date (entry_date or exit_date) lies in [start, end]."""
+        return self._query(self.trades, self._trade_slices, on, ticker, side, start, end, "entry_date")
+
+    def signals_for(self, ticker=None, side=None, start=None, end=None):
+        """Extended signals of ticker(s)/side(s) dated in [start, end]."""
+        return self._query(self.signals, self._signal_slices, "date", ticker, side, start, end, "date")
+
+    def parameters(self, ticker, side):
+        return _side_data(self.raw.get(ticker) or {}, side)[2]
+
+
+def _cache_file(path):
+    name = os.path.basename(path).replace(".", "_")
+    return os.path.join(PIPELINE_CACHE_DIR, f"results_{name}.pkl")
+
+
+def load_store(path=RESULTS_FILE, use_cache=True):
+    """ResultsStore of path or its .ndjson export (the newer one), None without file. Reused while mtime/size are unchanged."""
+    path = results_path(path)
+    if path is None:
+        return None
+    stamp = _stamp(path)
+    if stamp is None:
+        return None
+    key = os.path.abspath(path)
+    store = _stores.get(key)
+    if store is not None and store.stamp == stamp:
+        return store
+    cache = _cache_file(path)
+    if use_cache:
+        try:
+            with open(cache, "rb") as f:
+                version, cached_stamp, store = pickle.load(f)
+            if version == _CACHE_VERSION and cached_stamp == stamp:
+                _stores[key] = store
+                return store
+        except Exception:
+            pass
+    store = ResultsStore(path, stamp, load_results_file(path))
+    _stores[key] = store
+    if use_cache:
+        try:
+            os.makedirs(PIPELINE_CACHE_DIR, exist_ok=True)
+            tmp = cache + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump((_CACHE_VERSION, stamp, store), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cache)
+        except OSError as e:
+            print(f"WARN results cache not written: {e}")
+    return store
+
+
+def store_of(results):
+    """ResultsStore of a results dict: the cached one when it came from load_results(), else built now."""
+    for store in _stores.values():
+        if store.raw is results:
+            return store
+    return ResultsStore(None, None, results)
+
+
+def load_results(path=RESULTS_FILE):
+    """Raw results dict (cached like load_store), None without file."""
+    store = load_store(path)
+    return None if store is None else store.raw
+
+
+def save_results(results, path=RESULTS_FILE):
+    """Write the results dict in the export format(s) present on disk (legacy JSON if none); drops the cached store."""
+    json_path, nd_path = path, ndjson_path(path)
+    has_json, has_nd = os.path.exists(json_path), nd_path != json_path and os.path.exists(nd_path)
+    write_results(results, json_path, "both" if has_json and has_nd else "ndjson" if has_nd else "json")
+    for p in (json_path, nd_path):
+        _stores.pop(os.path.abspath(p), None)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the backtest results file")
+    parser.add_argument("tickers", nargs="*", help="Tickers (default: all)")
+    parser.add_argument("--side", choices=["long", "short"])
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--signals", action="store_true", help="List extended signals instead of trades")
+    parser.add_argument("--file", default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    store = load_store(args.file)
+    if store is None:
+        print(f"❌ {args.file} not found. Please run the comprehensive backtest first.")
+    else:
+        query = store.signals_for if args.signals else store.trades_for
+        rows = query(args.tickers or None, args.side, args.start, args.end)
+        print(rows.to_string(index=False) if len(rows) else "No rows")
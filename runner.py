@@ -6,10 +6,13 @@ from backtesting_core import run_full_backtest
 from stats_tools import stats
 from simulation_utils import compute_equity_curve
 from plot_utils import plot_combined_chart_and_equity
+from report_html import write_backtest_report
+from trade_table import as_records
+from results_export import ResultsWriter
+from config import RESULTS_FORMAT
 import json
 import os
 import sys
-from datetime import datetime
 import pandas as pd
 
 def load_trades_for_day(date_str, json_path="trades_by_day.json"):
@@ -194,8 +197,9 @@ def main():
             json.dump(ordered, f, indent=2)
         print("[DONE] Full-Backtest abgeschlossen und Trades exportiert (matched trades basis).")
 
-        # 2b) Export unified JSON schema (aligned with comprehensive script)
+        # 2b) Export unified JSON schema (aligned with comprehensive script); NDJSON line per ticker as entries are built (after all backtests)
         export_data = {}
+        writer = ResultsWriter('runner_fullbacktest_results.json') if RESULTS_FORMAT in ("ndjson", "both") else None
         for tkr, data in (results or {}).items():
             t_entry = { 'data_info': data.get('data_info', {}) }
             for side in ['long','short']:
@@ -230,96 +234,25 @@ def main():
                 t_entry[side] = {
                     'parameters': sd.get('parameters', {}),
                     'signals': mapped_signals,
-                    'trades': sd.get('trades', []),
+                    'trades': as_records(sd.get('trades')),
                     'stats': sd.get('stats', {}),
                     'equity_curve': sd.get('equity_curve', [])
                 }
             export_data[tkr] = t_entry
-        with open('runner_fullbacktest_results.json','w') as jf:
-            json.dump(export_data, jf, indent=2, default=str)
-        print("[SAVE] JSON export -> runner_fullbacktest_results.json")
+            if writer is not None:
+                writer.write(tkr, t_entry)
+        if writer is not None:
+            writer.close()
+            print(f"[SAVE] NDJSON export -> {writer.path}")
+        if RESULTS_FORMAT in ("json", "both"):
+            with open('runner_fullbacktest_results.json','w') as jf:
+                json.dump(export_data, jf, indent=2, default=str)
+            print("[SAVE] JSON export -> runner_fullbacktest_results.json")
 
-        # 2c) Build aggregated HTML report
+        # 2c) Build aggregated HTML report (shell + lazily loaded per-ticker data files)
         try:
-            html = [
-                "<html><head><meta charset='utf-8'><title>Runner Backtest Report</title>",
-                "<style>body{font-family:Arial;background:#111;color:#eee;margin:20px;}table{border-collapse:collapse;width:100%;margin-bottom:30px;}th,td{border:1px solid #444;padding:4px 6px;font-size:12px;}th{background:#222;}tr:nth-child(even){background:#1d1d1d;}h1,h2,h3{color:#fff;} .pos{color:#4caf50;} .neg{color:#ff5252;} details{margin:12px 0;} summary{cursor:pointer;font-weight:bold;} .grid{display:grid;grid-template-columns:repeat(auto-fit,minmax(220px,1fr));gap:12px;} .card{background:#1c1c1c;padding:8px 10px;border:1px solid #333;border-radius:6px;} a{color:#64b5f6;text-decoration:none;} a:hover{text-decoration:underline;}</style></head><body>",
-                f"<h1>Runner Full Backtest Report - {datetime.now().strftime('%Y-%m-%d %H:%M')}</h1>"
-            ]
-            # Summary table
-            html.append("<h2>Summary</h2><table><tr><th>Ticker</th><th>Side</th><th>p</th><th>tw</th><th>Trades</th><th>Win%</th><th>Sum PnL</th><th>Avg PnL</th><th>MaxDD%</th><th>Init</th><th>Final</th><th>ROI%</th></tr>")
-            for tkr, data in (results or {}).items():
-                for side in ['long','short']:
-                    if side not in data: continue
-                    st = data[side].get('stats', {})
-                    p = data[side].get('parameters',{}).get('p')
-                    tw = data[side].get('parameters',{}).get('tw')
-                    trades_ct = st.get('trades',0)
-                    win_rate = st.get('win_rate',0)
-                    sum_pnl = st.get('sum_pnl',0)
-                    avg_pnl = st.get('avg_pnl',0)
-                    maxdd = st.get('max_drawdown_pct',0)
-                    init_cap = st.get('initial_capital',0) or 0
-                    final_cap = st.get('final_capital',0) or 0
-                    roi = (final_cap/init_cap -1)*100 if init_cap else 0
-                    html.append(
-                        f"<tr><td>{tkr}</td><td>{side.upper()}</td><td>{p}</td><td>{tw}</td><td>{trades_ct}</td><td>{win_rate:.1f}</td><td class='{'pos' if sum_pnl>=0 else 'neg'}'>{sum_pnl:.2f}</td><td>{avg_pnl:.2f}</td><td>{maxdd:.2f}</td><td>{init_cap:.2f}</td><td>{final_cap:.2f}</td><td class='{'pos' if roi>=0 else 'neg'}'>{roi:.2f}</td></tr>"
-                    )
-            html.append("</table>")
-            # Per ticker detail
-            for tkr, data in (results or {}).items():
-                html.append(f"<h2>{tkr}</h2>")
-                for side in ['long','short']:
-                    if side not in data: continue
-                    sd = data[side]
-                    st = sd.get('stats', {})
-                    html.append(f"<h3>{side.upper()} Strategy</h3>")
-                    html.append("<div class='grid'>")
-                    for label,val in [
-                        ("p", sd.get('parameters',{}).get('p')),
-                        ("tw", sd.get('parameters',{}).get('tw')),
-                        ("Trades", st.get('trades')),
-                        ("Win%", st.get('win_rate')),
-                        ("SumPnL", st.get('sum_pnl')),
-                        ("AvgPnL", st.get('avg_pnl')),
-                        ("MaxDD%", st.get('max_drawdown_pct')),
-                        ("InitCap", st.get('initial_capital')),
-                        ("FinalCap", st.get('final_capital'))
-                    ]:
-                        html.append(f"<div class='card'><b>{label}</b><br>{val}</div>")
-                    html.append("</div>")
-                    # Extended signals
-                    ext_rows = sd.get('extended_signals_data', [])
-                    html.append(f"<details><summary>Extended Signals ({len(ext_rows)})</summary>")
-                    if ext_rows:
-                        keep_cols = [c for c in ["Long Date detected","Long Action","Short Date detected","Short Action","Supp/Resist","Level trade","Level Close","p_param","tw_param"] if any(c in r for r in ext_rows)]
-                        html.append("<table><tr>" + ''.join(f"<th>{c}</th>" for c in keep_cols) + "</tr>")
-                        for r in ext_rows[:400]:
-                            html.append("<tr>" + ''.join(f"<td>{r.get(c,'')}</td>" for c in keep_cols) + "</tr>")
-                        if len(ext_rows) > 400:
-                            html.append(f"<tr><td colspan='{len(keep_cols)}'>... {len(ext_rows)-400} more rows truncated ...</td></tr>")
-                        html.append("</table>")
-                    else:
-                        html.append("<p>No signals</p>")
-                    html.append("</details>")
-                    # Matched trades
-                    trades_rows = sd.get('trades', [])
-                    html.append(f"<details><summary>Matched Trades ({len(trades_rows)})</summary>")
-                    if trades_rows:
-                        cols = list({k for trd in trades_rows for k in trd.keys()})
-                        html.append("<table><tr>" + ''.join(f"<th>{c}</th>" for c in cols) + "</tr>")
-                        for trd in trades_rows[:400]:
-                            html.append("<tr>" + ''.join(f"<td>{trd.get(c,'')}</td>" for c in cols) + "</tr>")
-                        if len(trades_rows) > 400:
-                            html.append(f"<tr><td colspan='{len(cols)}'>... {len(trades_rows)-400} more rows truncated ...</td></tr>")
-                        html.append("</table>")
-                    else:
-                        html.append("<p>No trades</p>")
-                    html.append("</details>")
-            html.append("</body></html>")
-            with open('runner_fullbacktest_report.html','w', encoding='utf-8') as hf:
-                hf.write('\n'.join(html))
-            print("[SAVE] HTML report -> runner_fullbacktest_report.html")
+            write_backtest_report(results, 'runner_fullbacktest_report.html')
+            print("[SAVE] HTML report -> runner_fullbacktest_report.html (+ runner_fullbacktest_report_data/)")
         except Exception as rep_e:
             print(f"[WARN] Could not create runner HTML report: {rep_e}")
 
@@ -0,0 +1,153 @@
+"""Shared-memory price frames for process pools.
+
+A ticker's OHLC columns are published once into one
+``multiprocessing.shared_memory`` block (float64, columns x rows), and the date
+index is published into a second block (datetime64[ns]). Workers receive only a
+small descriptor dict and rebuild a read-only DataFrame on top of zero-copy
+NumPy views, so grid cells no longer pickle whole DataFrames.
+
+The publishing process owns the blocks: release() / SharedFrameStore.close()
+unlink them, and anything still published is unlinked at interpreter exit.
+Workers cache their attachments per block name, so a worker attaches once per
+ticker no matter how many grid cells it evaluates.
+"""
+import atexit
+import uuid
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+SHARED_COLUMNS = ("Open", "High", "Low", "Close")
+
+_owned = {}     # block name -> SharedMemory (publisher side)
+_attached = {}  # values block name -> (values shm, index shm, DataFrame) (worker side)
+_MAX_ATTACHED = 8  # publishers release blocks after each grid; drop old attachments
+
+
+def _create(nbytes):
+    name = f"sr_{uuid.uuid4().hex[:16]}"
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(int(nbytes), 1))
+    _owned[shm.name] = shm
+    return shm
+
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        # Pool workers share the publisher's resource tracker, so the extra
+        # registration is a no-op and nothing is unlinked when a worker exits
+        return shared_memory.SharedMemory(name=name)
+
+
+def publish_frame(df, columns=SHARED_COLUMNS):
+    """Copy df's columns and index into shared memory once. Returns the descriptor."""
+    cols = [c for c in columns if c in df.columns]
+    n = len(df)
+    values = _create(len(cols) * n * 8)
+    arr = np.ndarray((len(cols), n), dtype=np.float64, buffer=values.buf)
+    for i, c in enumerate(cols):
+        arr[i] = df[c].to_numpy(dtype=np.float64)
+
+    index = _create(n * 8)
+    idx = np.ndarray((n,), dtype=np.int64, buffer=index.buf)
+    dt_index = pd.DatetimeIndex(df.index)
+    idx[:] = dt_index.tz_localize(None).asi8 if dt_index.tz is not None else dt_index.asi8
+    return {
+        "values": values.name,
+        "index": index.name,
+        "columns": cols,
+        "rows": n,
+        "tz": str(dt_index.tz) if dt_index.tz is not None else None,
+        "index_name": df.index.name,
+    }
+
+
+def attach_frame(desc):
+    """Read-only DataFrame backed by the shared blocks of a descriptor (cached per process)."""
+    cached = _attached.get(desc["values"])
+    if cached is not None:
+        return cached[2]
+    while len(_attached) >= _MAX_ATTACHED:
+        detach_frame({"values": next(iter(_attached))})
+    values = _attach(desc["values"])
+    index = _attach(desc["index"])
+    n, cols = desc["rows"], desc["columns"]
+    arr = np.ndarray((len(cols), n), dtype=np.float64, buffer=values.buf)
+    arr.flags.writeable = False
+    idx = np.ndarray((n,), dtype=np.int64, buffer=index.buf).view("datetime64[ns]")
+    dt_index = pd.DatetimeIndex(idx, name=desc.get("index_name"))
+    if desc.get("tz"):
+        dt_index = dt_index.tz_localize(desc["tz"])
+    df = pd.DataFrame(arr.T, index=dt_index, columns=cols, copy=False)
+    _attached[desc["values"]] = (values, index, df)
+    return df
+
+
+def detach_frame(desc):
+    """Drop a worker-side attachment (the block itself stays published)."""
+    cached = _attached.pop(desc["values"], None)
+    if cached is not None:
+        for shm in cached[:2]:
+            try:
+                shm.close()
+            except BufferError:
+                pass  # views still referenced; closed at process exit
+
+
+def release(desc):
+    """Unlink the blocks of a descriptor (publisher side)."""
+    for name in (desc.get("values"), desc.get("index")):
+        shm = _owned.pop(name, None)
+        if shm is None:
+            continue
+        try:
+            shm.close()
+        except BufferError:
+            pass
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def release_all():
+    for name in list(_owned):
+        release({"values": name})
+
+
+atexit.register(release_all)
+
+
+class SharedFrameStore:
+    """Publish several frames (e.g. per ticker) and release them together.
+
+        with SharedFrameStore() as store:
+            desc = store.publish("AAPL", df)
+            pool.map(worker, [(desc, p, tw) for ...])
+    """
+
+    def __init__(self):
+        self.descriptors = {}
+
+    def publish(self, key, df, columns=SHARED_COLUMNS):
+        if key in self.descriptors:
+            release(self.descriptors[key])
+        self.descriptors[key] = publish_frame(df, columns)
+        return self.descriptors[key]
+
+    def get(self, key):
+        return self.descriptors.get(key)
+
+    def close(self):
+        for desc in self.descriptors.values():
+            release(desc)
+        self.descriptors.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -1,9 +1,11 @@
 import pandas as pd
 import numpy as np
 import os
-from datetime import timedelta
 
 from scipy.signal import argrelextrema
+from extrema_stream import detect_levels
+from price_lookup import at_or_after, on_date
+from trading_calendar import next_trading_day
 def compute_trend(df, window=20):
     """
     Berechnet den einfachen gleitenden Durchschnitt (SMA) auf Basis der Close‑Preise.
@@ -11,58 +13,68 @@ def compute_trend(df, window=20):
     return df["Close"].rolling(window=window).mean()
 
 def get_next_trading_day(dt):
-    """Return the next trading day (Mon-Fri). Does not account for holidays."""
+    """Return the next NYSE session after dt (weekends and holidays skipped)."""
     if pd.isna(dt):
         return pd.NaT
-    d = pd.Timestamp(dt).normalize()
-    # Move to next day
-    d = d + timedelta(days=1)
-    # Skip weekends
-    while d.weekday() >= 5:
-        d = d + timedelta(days=1)
-    return d
+    return next_trading_day(dt)
 
 def get_trade_day_offset(base_date, trade_window, df):
+    if df.index.is_monotonic_increasing:
+        # Binary search instead of scanning the index (matters for intraday bars)
+        pos = df.index.searchsorted(base_date, side="right") + trade_window - 1
+        return df.index[pos] if pos < len(df.index) else pd.NaT
     future_dates = df.index[df.index > base_date]
     if len(future_dates) < trade_window:
         return pd.NaT
     return future_dates[trade_window - 1]
+
+DAILY_INTERVALS = ("1d", "d", "1day", "day", "daily")
+
+
+def is_daily(interval):
+    """True for daily bar intervals in any spelling ("1d", "1D", "daily", ...)."""
+    return str(interval).strip().lower() in DAILY_INTERVALS
+
+
+def trade_time(dt, interval="1d"):
+    """Execution timestamp for a signal bar: 15:50 on daily bars, the bar itself intraday."""
+    if pd.isna(dt):
+        return pd.NaT
+    if is_daily(interval):
+        return dt.replace(hour=15, minute=50, second=0, microsecond=0)
+    return dt
+def _level_closes(extended_df, market_df, date_col):
+    """Close at or after every trade date of an extended frame (NaN without date/bar)."""
+    if date_col not in extended_df:
+        return np.full(len(extended_df), np.nan)
+    return at_or_after(market_df, extended_df[date_col], "Close")
+
 def update_level_close_long(extended_df, market_df):
-    closes = []
-    for _, row in extended_df.iterrows():
-        trade_day = row.get("Long Date detected")
-        if pd.isna(trade_day):
-            closes.append(np.nan)
-        elif trade_day in market_df.index:
-            closes.append(market_df.loc[trade_day, "Close"])
-        else:
-            idx = market_df.index.searchsorted(trade_day)
-            closes.append(market_df.iloc[idx]["Close"] if idx < len(market_df.index) else np.nan)
-    extended_df["Level Close"] = closes
+    extended_df["Level Close"] = _level_closes(extended_df, market_df, "Long Date detected")
     return extended_df
 def update_level_close_short(extended_df, market_df):
-    closes = []
-    for _, row in extended_df.iterrows():
-        trade_day = row.get("Short Date detected")
-        if pd.isna(trade_day):
-            closes.append(np.nan)
-        elif trade_day in market_df.index:
-            closes.append(market_df.loc[trade_day, "Close"])
-        else:
-            idx = market_df.index.searchsorted(trade_day)
-            closes.append(market_df.iloc[idx]["Close"] if idx < len(market_df.index) else np.nan)
-    extended_df["Level Close"] = closes
+    extended_df["Level Close"] = _level_closes(extended_df, market_df, "Short Date detected")
     return extended_df
 
-def calculate_support_resistance(df, past_window, trade_window, price_col="Close"):
+def calculate_support_resistance(df, past_window, trade_window, price_col="Close", causal=False):
     """Calculate support & resistance using the specified price column.
 
     price_col: which column to use ("Open" or "Close"). Falls back to Close if missing.
     past_window, trade_window: integers controlling extrema detection horizon.
+    causal: no lookahead (extrema_stream). Levels are indexed by the bar on which
+        they are confirmed (p+tw bars after the extremum), so downstream trade
+        offsets start when the level is knowable; no global min/max is added.
     """
     if price_col not in df.columns:
         # Fallback gracefully
         price_col = "Close"
+    if causal:
+        events = detect_levels(df, past_window, trade_window, price_col)
+        levels = []
+        for kind in ("support", "resistance"):
+            ev = events[events["type"] == kind]
+            levels.append(pd.Series(ev["level"].to_numpy(dtype=float), index=pd.DatetimeIndex(ev["confirmed_at"])))
+        return levels[0], levels[1]
     total_window = int(past_window + trade_window)
     prices = df[price_col].values
 
@@ -88,90 +100,142 @@ def calculate_support_resistance(df, past_window, trade_window, price_col="Close
     return support, resistance
 
 
-def assign_long_signals(support, resistance, data, trade_window, interval="1d"):
+def _trade_dates(dates, trade_window, data):
+    """get_trade_day_offset for a whole date column (data sorted): one searchsorted."""
+    idx = data.index
+    pos = idx.searchsorted(np.asarray(dates), side="right") + trade_window - 1
+    ok = pos < len(idx)
+    out = pd.Series(pd.NaT, index=range(len(pos)), dtype=idx.dtype)
+    out[ok] = idx[pos[ok]]
+    return out
+
+
+def _trade_times(trade_dates, interval="1d"):
+    """trade_time for a whole column."""
+    if is_daily(interval):
+        return trade_dates.dt.normalize() + pd.Timedelta(hours=15, minutes=50)
+    return trade_dates
+
+
+# Seite -> (Einstiegstyp, Einstieg, Ausstieg); der Einstiegstyp steht bei gleichem Datum vorn
+_SIDES = {"Long": ("support", "buy", "sell"), "Short": ("resistance", "short", "cover")}
+
+
+def _side_signals(support, resistance, data, trade_window, side):
+    """Date-sorted levels of one side with toggled actions and the trade date of every level."""
     data.sort_index(inplace=True)
     sup_df = pd.DataFrame({'Date': support.index, 'Level': support.values, 'Type': 'support'})
     res_df = pd.DataFrame({'Date': resistance.index, 'Level': resistance.values, 'Type': 'resistance'})
-    df = pd.concat([sup_df, res_df]).sort_values(by='Date').reset_index(drop=True)
-
-    df['Long'] = None
-    df['Long Date'] = pd.NaT
-    long_active = False
-
-    for i, row in df.iterrows():
-        base_date = row['Date']
-        trade_date = get_trade_day_offset(base_date, trade_window, data)
+    entry_type, entry, exit_ = _SIDES[side]
+    parts = [sup_df, res_df] if entry_type == 'support' else [res_df, sup_df]
+    df = pd.concat(parts).sort_values(by='Date', kind='stable').reset_index(drop=True)
+    actions = pd.Series(_toggle_actions(df['Type'].to_numpy(), entry_type, entry, exit_), index=df.index, dtype=object)
+    return df, actions, _trade_dates(df['Date'], trade_window, data)
 
-        if row['Type'] == 'support' and not long_active:
-            df.at[i, 'Long'] = 'buy'
-            df.at[i, 'Long Date'] = trade_date
-            long_active = True
-        elif row['Type'] == 'resistance' and long_active:
-            df.at[i, 'Long'] = 'sell'
-            df.at[i, 'Long Date'] = trade_date
-            long_active = False
 
+def assign_long_signals(support, resistance, data, trade_window, interval="1d"):
+    df, actions, trade_dates = _side_signals(support, resistance, data, trade_window, "Long")
+    df['Long'] = actions
+    df['Long Date'] = trade_dates.where(actions.notna()).dt.as_unit("ns")
     return df
 
 def assign_short_signals(support, resistance, data, trade_window, interval="1d"):
-    data.sort_index(inplace=True)
+    df, actions, trade_dates = _side_signals(support, resistance, data, trade_window, "Short")
+    df['Short'] = actions
+    df['Short Date'] = trade_dates.where(actions.notna()).dt.as_unit("ns")
+    return df
+
+LONG_EXT_COLUMNS = ["Date high/low", "Level high/low", "Supp/Resist", "Long Action",
+                    "Long Date detected", "Level Close", "Long Trade Day", "Level trade"]
+SHORT_EXT_COLUMNS = ["Date high/low", "Level high/low", "Supp/Resist", "Short Action",
+                     "Short Date detected", "Level Close", "Short Trade Day", "Level trade"]
+
+
+def level_events(support, resistance, data, trade_window, interval="1d"):
+    """Merged, date-sorted support/resistance table shared by both sides.
+
+    Trade date (trade_window bars after the level), execution time and the
+    Close at/after the trade date are computed once per event.
+    """
+    if not data.index.is_monotonic_increasing:
+        data = data.sort_index()
     sup_df = pd.DataFrame({'Date': support.index, 'Level': support.values, 'Type': 'support'})
     res_df = pd.DataFrame({'Date': resistance.index, 'Level': resistance.values, 'Type': 'resistance'})
-    df = pd.concat([res_df, sup_df]).sort_values(by='Date').reset_index(drop=True)
+    ev = pd.concat([sup_df, res_df]).sort_values(by='Date', kind='stable').reset_index(drop=True)
 
-    df['Short'] = None
-    df['Short Date'] = pd.NaT
-    short_active = False
+    trade_dates = _trade_dates(ev['Date'], trade_window, data)
+    ev['Trade Date'] = trade_dates
+    ev['Trade Time'] = _trade_times(trade_dates, interval)
+    ev['Level Close'] = at_or_after(data, trade_dates, "Close")
+    return ev
 
-    for i, row in df.iterrows():
-        base_date = row['Date']
-        trade_date = get_trade_day_offset(base_date, trade_window, data)
 
-        if row['Type'] == 'resistance' and not short_active:
-            df.at[i, 'Short'] = 'short'
-            df.at[i, 'Short Date'] = trade_date
-            short_active = True
-        elif row['Type'] == 'support' and short_active:
-            df.at[i, 'Short'] = 'cover'
-            df.at[i, 'Short Date'] = trade_date
-            short_active = False
+def _toggle_actions(types, entry_type, entry, exit_):
+    """Alternating entry/exit actions of a level-type sequence (object array, None = no action).
+
+    The state machine (enter on entry_type when flat, exit on the other type
+    when in a position) acts exactly on the first level of every run of equal
+    types, except for exit runs before the first entry.
+    """
+    is_entry = np.asarray(types) == entry_type
+    run_start = np.ones(len(is_entry), dtype=bool)
+    run_start[1:] = is_entry[1:] != is_entry[:-1]
+    actions = np.full(len(is_entry), None, dtype=object)
+    actions[run_start & is_entry] = entry
+    actions[run_start & ~is_entry & (np.cumsum(is_entry) > 0)] = exit_
+    return actions
+
+
+def assign_signals_extended_both(support, resistance, data, trade_window, interval="1d"):
+    """Extended long and short signals (Level Close filled) from one shared event table.
+
+    Same result as assign_long/short_signals_extended + update_level_close_long/short,
+    but levels are merged and trade dates looked up once for both sides.
+    """
+    ev = level_events(support, resistance, data, trade_window, interval)
+    if ev.empty:
+        return pd.DataFrame(columns=LONG_EXT_COLUMNS), pd.DataFrame(columns=SHORT_EXT_COLUMNS)
+    types = ev['Type'].tolist()
+    out = []
+    for side, entry_type, entry, exit_ in (("Long", "support", "buy", "sell"), ("Short", "resistance", "short", "cover")):
+        out.append(pd.DataFrame({
+            "Date high/low": ev['Date'],
+            "Level high/low": ev['Level'],
+            "Supp/Resist": ev['Type'],
+            f"{side} Action": pd.Series(_toggle_actions(types, entry_type, entry, exit_), index=ev.index, dtype=object),
+            f"{side} Date detected": ev['Trade Date'],
+            "Level Close": ev['Level Close'],
+            f"{side} Trade Day": ev['Trade Time'],
+            "Level trade": np.nan,
+        }))
+    return out[0], out[1]
+
+
+def _extended_signals(support, resistance, data, trade_window, interval, side):
+    """Extended signal frame of one side (Level Close left NaN), built in one constructor call."""
+    columns = LONG_EXT_COLUMNS if side == "Long" else SHORT_EXT_COLUMNS
+    df, actions, trade_dates = _side_signals(support, resistance, data, trade_window, side)
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+    empty = np.full(len(df), np.nan)
+    return pd.DataFrame({
+        "Date high/low": df['Date'],
+        "Level high/low": df['Level'],
+        "Supp/Resist": df['Type'],
+        f"{side} Action": actions,
+        f"{side} Date detected": trade_dates,
+        "Level Close": empty,
+        f"{side} Trade Day": _trade_times(trade_dates, interval),
+        "Level trade": empty.copy(),
+    })
 
-    return df
 
 def assign_long_signals_extended(support, resistance, data, trade_window, interval="1d", price_col="Close"):
-    # Ensure we get a proper DataFrame from assign_long_signals
     try:
-        base_signals = assign_long_signals(support, resistance, data, trade_window, interval)
-        
-        # Check if the result is a DataFrame
-        if not isinstance(base_signals, pd.DataFrame):
-            print(f"Warning: assign_long_signals returned {type(base_signals)} instead of DataFrame")
-            # Return empty DataFrame with expected columns
-            return pd.DataFrame(columns=["Date high/low", "Level high/low", "Supp/Resist", "Long Action",
-                                       "Long Date detected", "Level Close", "Long Trade Day", "Level trade"])
-        
-        if base_signals.empty:
-            # Return empty DataFrame with expected columns
-            return pd.DataFrame(columns=["Date high/low", "Level high/low", "Supp/Resist", "Long Action",
-                                       "Long Date detected", "Level Close", "Long Trade Day", "Level trade"])
-        
-        df = base_signals.copy()
-        df["Long Action"] = df["Long"]
-        df.rename(columns={"Date": "Date high/low", "Level": "Level high/low", "Type": "Supp/Resist"}, inplace=True)
-        df["Long Date detected"] = df["Date high/low"].apply(lambda d: get_trade_day_offset(d, trade_window, data))
-        df["Level Close"] = np.nan
-        df["Long Trade Day"] = df["Long Date detected"].apply(
-            lambda dt: dt.replace(hour=15, minute=50, second=0, microsecond=0) if pd.notna(dt) else pd.NaT
-        )
-        df["Level trade"] = np.nan
-        return df[["Date high/low", "Level high/low", "Supp/Resist", "Long Action",
-                   "Long Date detected", "Level Close", "Long Trade Day", "Level trade"]]
-        
+        return _extended_signals(support, resistance, data, trade_window, interval, "Long")
     except Exception as e:
         print(f"Error in assign_long_signals_extended: {e}")
-        # Return empty DataFrame with expected columns
-        return pd.DataFrame(columns=["Date high/low", "Level high/low", "Supp/Resist", "Long Action",
-                                   "Long Date detected", "Level Close", "Long Trade Day", "Level trade"])
+        return pd.DataFrame(columns=LONG_EXT_COLUMNS)
 
 import pandas as pd
 from tickers_config import tickers
@@ -184,45 +248,32 @@ def extract_trades_by_date(ticker, ext_long, ext_short, cfg, daily_df, current_p
     """
     trades_by_date = {}
     today_str = pd.Timestamp.now().strftime('%Y-%m-%d')
-
-    # LONG trades
-    if not ext_long.empty:
-        for _, row in ext_long.iterrows():
-            action = row.get('Long Action')
-            trade_date = str(row.get('Long Date detected'))[:10]  # Format YYYY-MM-DD
-            if action in ['buy', 'sell']:
-                price_field = cfg.get('trade_on', 'Close').capitalize()
-                # Use minute price if today and current_prices given
-                if trade_date == today_str and current_prices:
-                    price = current_prices.get(ticker)
-                else:
-                    price = daily_df.loc[trade_date, price_field] if trade_date in daily_df.index else None
-                trade = {
-                    "symbol": ticker,
-                    "side": "BUY" if action == "buy" else "SELL",
-                    "date": trade_date,
-                    "price": round(float(price), 2) if price is not None else None
-                }
-                trades_by_date.setdefault(trade_date, []).append(trade)
-
-    # SHORT trades
-    if not ext_short.empty:
-        for _, row in ext_short.iterrows():
-            action = row.get('Short Action')
-            trade_date = str(row.get('Short Date detected'))[:10]
-            if action in ['short', 'cover']:
-                price_field = cfg.get('trade_on', 'Close').capitalize()
-                if trade_date == today_str and current_prices:
-                    price = current_prices.get(ticker)
-                else:
-                    price = daily_df.loc[trade_date, price_field] if trade_date in daily_df.index else None
-                trade = {
-                    "symbol": ticker,
-                    "side": "SHORT" if action == "short" else "COVER",
-                    "date": trade_date,
-                    "price": round(float(price), 2) if price is not None else None
-                }
-                trades_by_date.setdefault(trade_date, []).append(trade)
+    price_field = cfg.get('trade_on', 'Close').capitalize()
+
+    for ext, side, sides in ((ext_long, 'Long', {'buy': 'BUY', 'sell': 'SELL'}),
+                             (ext_short, 'Short', {'short': 'SHORT', 'cover': 'COVER'})):
+        action_col = f'{side} Action'
+        if ext.empty or action_col not in ext:
+            continue
+        acted = ext[ext[action_col].isin(list(sides))]
+        if acted.empty:
+            continue
+        dates = [str(d)[:10] for d in acted.get(f'{side} Date detected', [None] * len(acted))]  # YYYY-MM-DD
+        # Tagespreise aller Trades mit einem Lookup
+        prices = on_date(daily_df, dates, price_field)
+        for action, trade_date, px in zip(acted[action_col].tolist(), dates, prices):
+            # Use minute price if today and current_prices given
+            if trade_date == today_str and current_prices:
+                price = current_prices.get(ticker)
+            else:
+                price = None if np.isnan(px) else px
+            trade = {
+                "symbol": ticker,
+                "side": sides[action],
+                "date": trade_date,
+                "price": round(float(price), 2) if price is not None else None
+            }
+            trades_by_date.setdefault(trade_date, []).append(trade)
     return trades_by_date
 
 def list_all_trades_by_date():
@@ -259,36 +310,8 @@ if __name__ == "__main__":
     list_all_trades_by_date()
 
 def assign_short_signals_extended(support, resistance, data, trade_window, interval="1d", price_col="Close"):
-    # Ensure we get a proper DataFrame from assign_short_signals
     try:
-        base_signals = assign_short_signals(support, resistance, data, trade_window, interval)
-        
-        # Check if the result is a DataFrame
-        if not isinstance(base_signals, pd.DataFrame):
-            print(f"Warning: assign_short_signals returned {type(base_signals)} instead of DataFrame")
-            # Return empty DataFrame with expected columns
-            return pd.DataFrame(columns=["Date high/low", "Level high/low", "Supp/Resist", "Short Action",
-                                       "Short Date detected", "Level Close", "Short Trade Day", "Level trade"])
-        
-        if base_signals.empty:
-            # Return empty DataFrame with expected columns
-            return pd.DataFrame(columns=["Date high/low", "Level high/low", "Supp/Resist", "Short Action",
-                                       "Short Date detected", "Level Close", "Short Trade Day", "Level trade"])
-        
-        df = base_signals.copy()
-        df["Short Action"] = df["Short"]
-        df.rename(columns={"Date": "Date high/low", "Level": "Level high/low", "Type": "Supp/Resist"}, inplace=True)
-        df["Short Date detected"] = df["Date high/low"].apply(lambda d: get_trade_day_offset(d, trade_window, data))
-        df["Level Close"] = np.nan
-        df["Short Trade Day"] = df["Short Date detected"].apply(
-            lambda dt: dt.replace(hour=15, minute=50, second=0, microsecond=0) if pd.notna(dt) else pd.NaT
-        )
-        df["Level trade"] = np.nan
-        return df[["Date high/low", "Level high/low", "Supp/Resist", "Short Action",
-                   "Short Date detected", "Level Close", "Short Trade Day", "Level trade"]]
-        
+        return _extended_signals(support, resistance, data, trade_window, interval, "Short")
     except Exception as e:
         print(f"Error in assign_short_signals_extended: {e}")
-        # Return empty DataFrame with expected columns
-        return pd.DataFrame(columns=["Date high/low", "Level high/low", "Supp/Resist", "Short Action",
-                                   "Short Date detected", "Level Close", "Short Trade Day", "Level trade"])
+        return pd.DataFrame(columns=SHORT_EXT_COLUMNS)
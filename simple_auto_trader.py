@@ -14,7 +14,7 @@ import sys
 from datetime import datetime, time, timedelta
 import signal
 import logging
-from config import *
+import trading_calendar
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
@@ -36,30 +36,23 @@ class SimpleAutoTrader:
             self.open_time = (now + timedelta(minutes=1)).time()
             self.close_time = (now + timedelta(minutes=3)).time()
         else:
-            # Real times: 5 minutes after open, 5 minutes before close
-            market_open = datetime.strptime(MARKET_OPEN_TIME, "%H:%M")
-            market_close = datetime.strptime(MARKET_CLOSE_TIME, "%H:%M")
-            
-            open_plus_5 = market_open + timedelta(minutes=5)
-            close_minus_5 = market_close - timedelta(minutes=5)
-            
-            self.open_time = open_plus_5.time()
-            self.close_time = close_minus_5.time()
+            self.calculate_trading_times()
         
         logger.info(f"🕐 OPEN trades at: {self.open_time.strftime('%H:%M')}")
         logger.info(f"🕐 CLOSE trades at: {self.close_time.strftime('%H:%M')}")
 
+    def calculate_trading_times(self, day=None):
+        """Real times: 5 minutes after open, 5 minutes before close (earlier on half days)"""
+        self.open_time, self.close_time, _ = trading_calendar.session_times(day or datetime.now())
+
     def signal_handler(self, signum, frame):
         """Handle CTRL+C"""
         logger.info("🛑 Stopping trader...")
         self.running = False
 
     def is_trading_day(self):
-        """Check if today is a trading day"""
-        today = datetime.now()
-        if today.weekday() in [5, 6]:  # Weekend
-            return False
-        return True
+        """Check if today is a trading day (weekends and NYSE holidays)"""
+        return trading_calendar.is_trading_day(datetime.now())
 
     async def run_backtest_and_check_signals(self, session_type):
         """Run backtest and check for signals"""
@@ -154,6 +147,10 @@ class SimpleAutoTrader:
                     daily_open_done = False
                     daily_close_done = False
                     self.last_date = current_date
+                    if not self.test_mode:
+                        # Schließzeit des neuen Tages (Halbtag: HALF_DAY_CLOSE_TIME)
+                        self.calculate_trading_times(current_date)
+                        logger.info(f"🕐 OPEN {self.open_time.strftime('%H:%M')} / CLOSE {self.close_time.strftime('%H:%M')}")
                 
                 # Skip weekends
                 if not self.is_trading_day():
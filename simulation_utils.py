@@ -1,8 +1,11 @@
 # simulation_utils.py
 
+import numpy as np
 import pandas as pd
+from price_lookup import at_or_after, price_at_or_after
 from trade_execution import calculate_shares
 from tickers_config import tickers
+from trade_table import TradeTable, as_records, direction_flag
 from datetime import datetime, timedelta
 
 
@@ -27,18 +30,14 @@ def get_trade_price(df, cfg, date):
     Gibt den Preis für einen Tag laut trade_on-Vorgabe zurück ('open' oder 'close').
     '''
     col = "Open" if cfg.get("trade_on", "close").lower() == "open" else "Close"
-    if date in df.index:
-        return float(df.at[date, col])
-    idx = df.index.searchsorted(date)
-    if idx < len(df.index):
-        return float(df.iloc[idx][col])
-    return None
+    return price_at_or_after(df, date, col)
 
 def compute_equity_curve(df, trades, start_capital, long=True):
     '''
     Berechnet die Equity-Kurve exakt entlang df.index.
     Nutzt reale Entry/Exit und täglich aktuelle Close-Preise.
     '''
+    trades = as_records(trades)
     equity = []
     cap = start_capital
     pos = 0
@@ -82,6 +81,7 @@ def compute_equity_curve_execution(df, trades, start_capital, trade_on="open", l
     than the pure close-marked equity when trade_on == 'open'.
     """
     trade_on = (trade_on or "close").lower()
+    trades = as_records(trades)
     equity = []
     cap = start_capital
     pos = 0
@@ -161,27 +161,29 @@ def simulate_trades_compound_extended(
     extended_df, market_df, config,
     commission_rate=0.0018, min_commission=1.0,
     round_factor=1, artificial_close_price=None,
-    artificial_close_date=None, direction="long"
+    artificial_close_date=None, direction="long", as_table=False
 ):
+    """Compounding simulation of extended signals. Returns (final capital, matched trades).
+
+    as_table: return the trades as a compact TradeTable instead of a list of dicts.
+    """
     sort_col = "Long Date detected" if direction == "long" else "Short Date detected"
     action_col = "Long Action" if direction == "long" else "Short Action"
 
     extended_df = extended_df.sort_values(by=sort_col)
     capital = config["initialCapitalLong"] if direction == "long" else config["initialCapitalShort"]
 
-    trades = []
+    rows = []
     position_active = False
     entry_price = entry_date = prev_cap = shares = None
 
     price_col_used = "Open" if config.get("trade_on", "close").lower() == "open" else "Close"
-    for _, row in extended_df.iterrows():
-        action = row.get(action_col)
-        exec_date = row.get(sort_col)
-        if pd.isna(exec_date):
-            continue
-
-        price = get_trade_price(market_df, config, exec_date)
-        if price is None:
+    flag, on_open = direction_flag(direction), price_col_used == "Open"
+    # Ausführungspreise aller Signale mit einem Lookup (wie get_trade_price)
+    prices = at_or_after(market_df, extended_df[sort_col], price_col_used)
+    actions = extended_df[action_col].tolist() if action_col in extended_df else [None] * len(extended_df)
+    for action, exec_date, price in zip(actions, extended_df[sort_col].tolist(), prices.tolist()):
+        if pd.isna(exec_date) or np.isnan(price):
             continue
 
         if action in ["buy", "short"] and not position_active:
@@ -198,17 +200,8 @@ def simulate_trades_compound_extended(
             turnover = shares * (entry_price + price)
             fee = max(min_commission, turnover * commission_rate)
             capital += profit - fee
-            trades.append({
-                ("buy_date" if direction == "long" else "short_date"): entry_date,
-                ("sell_date" if direction == "long" else "cover_date"): exec_date,
-                ("buy_price" if direction == "long" else "short_price"): round(entry_price, 2),
-                ("sell_price" if direction == "long" else "cover_price"): round(price, 2),
-                "shares": shares,
-                "fee": round(fee, 2),
-                "pnl": round(capital - prev_cap, 3),
-                "entry_price_col": price_col_used,
-                "exit_price_col": price_col_used
-            })
+            rows.append((pd.Timestamp(entry_date), pd.Timestamp(exec_date), round(entry_price, 2), round(price, 2),
+                         shares, round(fee, 2), round(capital - prev_cap, 3), flag, on_open))
             position_active = False
 
     if position_active and artificial_close_price is not None and artificial_close_date is not None:
@@ -216,19 +209,12 @@ def simulate_trades_compound_extended(
         turnover = shares * (entry_price + artificial_close_price)
         fee = max(min_commission, turnover * commission_rate)
         capital += profit - fee
-        trades.append({
-            ("buy_date" if direction == "long" else "short_date"): entry_date,
-            ("sell_date" if direction == "long" else "cover_date"): artificial_close_date,
-            ("buy_price" if direction == "long" else "short_price"): round(entry_price, 2),
-            ("sell_price" if direction == "long" else "cover_price"): round(artificial_close_price, 2),
-            "shares": shares,
-            "fee": round(fee, 2),
-            "pnl": round(capital - prev_cap, 3),
-            "entry_price_col": price_col_used,
-            "exit_price_col": price_col_used
-        })
-
-    return capital, trades
+        rows.append((pd.Timestamp(entry_date), pd.Timestamp(artificial_close_date), round(entry_price, 2),
+                     round(artificial_close_price, 2), shares, round(fee, 2), round(capital - prev_cap, 3),
+                     flag, on_open))
+
+    trades = TradeTable.from_rows(rows)
+    return capital, (trades if as_table else trades.to_records())
 
 
 def calculate_shares_from_df(cfg, df, date, direction="long"):
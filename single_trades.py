@@ -5,22 +5,20 @@ Command line usage: python single_trades.py START_DATE END_DATE [STRATEGY]
 Example: python single_trades.py 2025-07-01 2025-08-01 long
 """
 
-import json
 import sys
 import argparse
 import os
 from datetime import datetime
 import pandas as pd
 from tickers_config import tickers
+from results_store import load_results, store_of
 
 def load_trade_data():
-    """Load trade data from the comprehensive backtest results"""
-    try:
-        with open('complete_comprehensive_backtest_results.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
+    """Load trade data from the comprehensive backtest results (cached per file change, see results_store)"""
+    data = load_results()
+    if data is None:
         print("❌ Results file not found. Please run the comprehensive backtest first.")
-        return None
+    return data
 
 def _parse_date_flexible(val: str) -> datetime:
     """Try multiple date formats (with or without time)"""
@@ -40,82 +38,32 @@ def _parse_date_flexible(val: str) -> datetime:
 
 def extract_single_trades(data, start_date, end_date, strategy_filter=None):
     """Extract individual trade entries (JSON structure or fallback CSV)"""
-    single_trades = []
-
-    # Map possible key variants: 'long' or 'long_strategy'
-    key_variants = {
-        'long': ['long', 'long_strategy'],
-        'short': ['short', 'short_strategy']
-    }
-
-    for ticker, ticker_data in data.items():
-        ticker_config = tickers.get(ticker, {})
-        trade_on = ticker_config.get('trade_on', 'close').upper()
-
-        strategies = ['long', 'short']
-        if strategy_filter:
-            strategies = [strategy_filter]
-
-        for strategy in strategies:
-            # Find existing key variant
-            strat_dict = None
-            for k in key_variants[strategy]:
-                if k in ticker_data and isinstance(ticker_data[k], dict):
-                    strat_dict = ticker_data[k]
-                    break
-            if not strat_dict:
-                continue
-
-            trades = strat_dict.get('trades', [])
-            params = strat_dict.get('parameters', {})
-            p_param = params.get('p', 'N/A')
-            tw_param = params.get('tw', 'N/A')
-
-            for tr in trades:
-                is_long = 'buy_date' in tr
-                if is_long:
-                    entry_date = _parse_date_flexible(tr.get('buy_date'))
-                    exit_date = _parse_date_flexible(tr.get('sell_date'))
-                    entry_price = tr.get('buy_price')
-                    exit_price = tr.get('sell_price')
-                    entry_action, exit_action = 'BUY', 'SELL'
-                else:
-                    entry_date = _parse_date_flexible(tr.get('short_date'))
-                    exit_date = _parse_date_flexible(tr.get('cover_date'))
-                    entry_price = tr.get('short_price')
-                    exit_price = tr.get('cover_price')
-                    entry_action, exit_action = 'SHORT', 'COVER'
-
-                # Entry
-                if entry_date and start_date <= entry_date <= end_date:
-                    single_trades.append({
-                        'ticker': ticker,
-                        'strategy': strategy.upper(),
-                        'trade_date': entry_date.strftime('%Y-%m-%d'),
-                        'action': entry_action,
-                        'order_type': 'LIMIT',
-                        'price': entry_price,
-                        'shares': tr.get('shares'),
-                        'trade_on': trade_on,
-                        'signal_type': 'ENTRY',
-                        'p_param': p_param,
-                        'tw_param': tw_param
-                    })
-                # Exit
-                if exit_date and start_date <= exit_date <= end_date:
-                    single_trades.append({
-                        'ticker': ticker,
-                        'strategy': strategy.upper(),
-                        'trade_date': exit_date.strftime('%Y-%m-%d'),
-                        'action': exit_action,
-                        'order_type': 'LIMIT',
-                        'price': exit_price,
-                        'shares': tr.get('shares'),
-                        'trade_on': trade_on,
-                        'signal_type': 'EXIT',
-                        'p_param': p_param,
-                        'tw_param': tw_param
-                    })
+    # Trade table of the results (both 'long' and 'long_strategy' layouts), dates already parsed
+    store = store_of(data)
+    sides = [strategy_filter] if strategy_filter else ['long', 'short']
+    actions = {'long': ('BUY', 'SELL'), 'short': ('SHORT', 'COVER')}
+    order = {t: i for i, t in enumerate(data)}
+    found = []
+    for on, signal_type in (('entry_date', 'ENTRY'), ('exit_date', 'EXIT')):
+        rows = store.trades_for(side=sides, start=start_date, end=end_date, on=on)
+        for r in rows.itertuples(index=False):
+            trade_on = tickers.get(r.ticker, {}).get('trade_on', 'close').upper()
+            is_entry = signal_type == 'ENTRY'
+            found.append(((order[r.ticker], sides.index(r.side), r.n, not is_entry), {
+                'ticker': r.ticker,
+                'strategy': r.side.upper(),
+                'trade_date': getattr(r, on).strftime('%Y-%m-%d'),
+                'action': actions[r.side][0 if is_entry else 1],
+                'order_type': 'LIMIT',
+                'price': r.entry_price if is_entry else r.exit_price,
+                'shares': r.shares,
+                'trade_on': trade_on,
+                'signal_type': signal_type,
+                'p_param': 'N/A' if r.p is None else r.p,
+                'tw_param': 'N/A' if r.tw is None else r.tw
+            }))
+    # Reihenfolge wie in der JSON-Datei: Ticker, Seite, Trade, Einstieg vor Ausstieg
+    single_trades = [t for _, t in sorted(found, key=lambda x: x[0])]
 
     # Fallback: if JSON produced no trades, read per-ticker CSVs
     if not single_trades:
@@ -1,23 +1,19 @@
+import numpy as np
 import pandas as pd
 
+from performance_analytics import max_drawdown
+from trade_table import trade_pnls
+
 def _max_drawdown(equity_list):
-    if not equity_list:
+    if equity_list is None or len(equity_list) == 0:
         return 0.0
-    peak = equity_list[0]
-    max_dd = 0.0
-    for v in equity_list:
-        if v > peak:
-            peak = v
-        dd = (peak - v) / peak if peak else 0.0
-        if dd > max_dd:
-            max_dd = dd
-    return round(max_dd * 100, 2)  # percentage
+    return round(float(max_drawdown(np.asarray(equity_list, dtype=float))) * 100, 2)  # percentage
 
 def stats(trades, name="Trades", initial_capital=None, final_capital=None, equity_curve=None):
     """Print trade statistics plus capital & max drawdown.
 
     Parameters:
-        trades (list[dict]): matched trades
+        trades (list[dict] | TradeTable): matched trades
         name (str): label
         initial_capital (float|None): starting capital (optional)
         final_capital (float|None): final capital (optional)
@@ -33,7 +29,7 @@ def stats(trades, name="Trades", initial_capital=None, final_capital=None, equit
             "max_drawdown_pct": _max_drawdown(equity_curve or [])
         }
 
-    pnl_values = [t.get("pnl", 0.0) or 0.0 for t in trades]
+    pnl_values = trade_pnls(trades).tolist()
     pnl_sum = round(sum(pnl_values), 2)
     pnl_avg = round(pnl_sum / len(trades), 2)
     pnl_max = round(max(pnl_values), 2)
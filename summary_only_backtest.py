@@ -4,55 +4,27 @@ Quick Summary-Only Backtest for All Tickers
 Shows comprehensive results without detailed output
 """
 
-import sys
-import asyncio
-from pathlib import Path
-import pandas as pd
 import json
 
 # Import our modules
-from runner import connect_ib, disconnect_ib, download_and_save_data
-from signal_utils import assign_long_signals_extended, assign_short_signals_extended, update_level_close_long, update_level_close_short
-from simulation_utils import simulate_trades_compound_extended, compute_equity_curve
+from backtest_engine import load_stage, signal_stage, simulate_stage, price_column, run_ticker
 from tickers_config import tickers
-from config import BACKTEST_CONFIG
-
-# Configuration
-COMMISSION_RATE = 0.0018
-MIN_COMMISSION = 1.0
 
 def optimize_parameters(df, ticker_config, direction="long"):
-    """Quick parameter optimization"""
+    """Quick parameter optimization (small p grid, tw=1)"""
     best_result = {"p": 3, "tw": 1, "final_cap": 1000}
+    last_price = df[price_column(ticker_config)].iloc[-1]
+    last_date = df.index[-1]
     
     for p in [3, 4, 5, 6, 7]:
         for tw in [1]:
             try:
-                if direction == "long":
-                    ext_df = assign_long_signals_extended(df, p, tw)
-                    ext_df = update_level_close_long(ext_df, df)
-                else:
-                    ext_df = assign_short_signals_extended(df, p, tw)
-                    ext_df = update_level_close_short(ext_df, df)
-                
+                _, _, ext_df = signal_stage(df, ticker_config, p, tw, direction)
                 if ext_df.empty:
                     continue
-                
-                last_price = df.iloc[-1]['Close']
-                last_date = df.index[-1].strftime('%Y-%m-%d')
-                
-                cap, trades = simulate_trades_compound_extended(
-                    ext_df, df, ticker_config,
-                    COMMISSION_RATE, MIN_COMMISSION,
-                    ticker_config.get("order_round_factor", 1),
-                    artificial_close_price=last_price,
-                    artificial_close_date=last_date,
-                    direction=direction
-                )
-                
+                cap, _ = simulate_stage(ext_df, df, ticker_config, direction, last_price, last_date)
                 if cap > best_result["final_cap"]:
                     best_result = {"p": p, "tw": tw, "final_cap": cap}
-                    
             except Exception:
                 continue
     
@@ -64,12 +36,8 @@ def process_ticker_summary(ticker):
         ticker_config = tickers[ticker]
         
         # Load data
-        csv_path = f"{ticker}_data.csv"
-        if not Path(csv_path).exists():
-            return None
-        
-        df = pd.read_csv(csv_path, index_col=0, parse_dates=True)
-        if df.empty:
+        df = load_stage(ticker)
+        if df is None or df.empty:
             return None
         
         results = {
@@ -79,68 +47,22 @@ def process_ticker_summary(ticker):
             "data_days": len(df)
         }
         
-        # Process Long Strategy if enabled
-        if ticker_config.get("long", False):
-            best_long = optimize_parameters(df, ticker_config, "long")
-            
-            # Generate final results with best parameters
-            ext_long = assign_long_signals_extended(df, best_long["p"], best_long["tw"])
-            ext_long = update_level_close_long(ext_long, df)
-            
-            last_price = df.iloc[-1]['Close']
-            last_date = df.index[-1].strftime('%Y-%m-%d')
-            
-            cap_long, trades_long = simulate_trades_compound_extended(
-                ext_long, df, ticker_config,
-                COMMISSION_RATE, MIN_COMMISSION,
-                ticker_config.get("order_round_factor", 1),
-                artificial_close_price=last_price,
-                artificial_close_date=last_date,
-                direction="long"
-            )
-            
-            initial_cap_long = ticker_config.get("initialCapitalLong", 1000)
-            return_pct_long = ((cap_long - initial_cap_long) / initial_cap_long) * 100
-            
-            results["long"] = {
-                "parameters": f"p={best_long['p']}, tw={best_long['tw']}",
-                "extended_signals": len(ext_long),
-                "matched_trades": len(trades_long),
-                "initial_capital": initial_cap_long,
-                "final_capital": cap_long,
-                "return_pct": return_pct_long
-            }
+        params = {}
+        for side in ("long", "short"):
+            if ticker_config.get(side, False):
+                best = optimize_parameters(df, ticker_config, side)
+                params[side] = (best["p"], best["tw"])
         
-        # Process Short Strategy if enabled
-        if ticker_config.get("short", False):
-            best_short = optimize_parameters(df, ticker_config, "short")
-            
-            # Generate final results with best parameters
-            ext_short = assign_short_signals_extended(df, best_short["p"], best_short["tw"])
-            ext_short = update_level_close_short(ext_short, df)
-            
-            last_price = df.iloc[-1]['Close']
-            last_date = df.index[-1].strftime('%Y-%m-%d')
-            
-            cap_short, trades_short = simulate_trades_compound_extended(
-                ext_short, df, ticker_config,
-                COMMISSION_RATE, MIN_COMMISSION,
-                ticker_config.get("order_round_factor", 1),
-                artificial_close_price=last_price,
-                artificial_close_date=last_date,
-                direction="short"
-            )
-            
-            initial_cap_short = ticker_config.get("initialCapitalShort", 1000)
-            return_pct_short = ((cap_short - initial_cap_short) / initial_cap_short) * 100
-            
-            results["short"] = {
-                "parameters": f"p={best_short['p']}, tw={best_short['tw']}",
-                "extended_signals": len(ext_short),
-                "matched_trades": len(trades_short),
-                "initial_capital": initial_cap_short,
-                "final_capital": cap_short,
-                "return_pct": return_pct_short
+        # Final results with the best parameters (same engine as the full backtest)
+        bt = run_ticker(ticker, ticker_config, df=df, params=params, verbose=False)
+        for side, res in bt.sides.items():
+            results[side] = {
+                "parameters": f"p={res.p}, tw={res.tw}",
+                "extended_signals": len(res.extended),
+                "matched_trades": len(res.trades),
+                "initial_capital": res.initial_capital,
+                "final_capital": res.final_capital,
+                "return_pct": res.return_pct
             }
         
         return results
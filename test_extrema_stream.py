@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Check the streaming support/resistance detector against argrelextrema
+"""
+import numpy as np
+import pandas as pd
+from scipy.signal import argrelextrema
+
+from extrema_stream import StreamingExtremaDetector, detect_levels
+
+rng = np.random.default_rng(34)
+
+print("Testing interior levels vs argrelextrema...")
+for n, order in ((50, 1), (300, 3), (300, 7), (1000, 12)):
+    # gerundete Preise erzeugen Gleichstände (strikter Vergleich!)
+    prices = pd.Series(np.round(100 + np.cumsum(rng.normal(0, 1, n)), 0),
+                       index=pd.bdate_range("2020-01-01", periods=n))
+    events = StreamingExtremaDetector(order).run(prices)
+    for kind, comparator in (("support", np.less), ("resistance", np.greater)):
+        expected = argrelextrema(prices.values, comparator, order=order)[0]
+        expected = expected[expected < n - order]  # die letzten `order` Bars sind noch unbestätigt
+        got = events[events["type"] == kind]
+        assert list(got["bar"]) == list(expected), (n, order, kind)
+        assert (got["confirmed_bar"] == got["bar"] + order).all()
+        assert list(got["confirmed_at"]) == list(prices.index[got["confirmed_bar"]])
+        assert np.allclose(got["level"], prices.values[expected])
+print("✓ streaming levels match argrelextrema")
+
+print("\nTesting causality...")
+prices = pd.Series(100 + np.cumsum(rng.normal(0, 1, 400)), index=pd.bdate_range("2021-01-01", periods=400))
+full = StreamingExtremaDetector(5).run(prices)
+prefix = StreamingExtremaDetector(5).run(prices.iloc[:250])
+assert full[full["confirmed_bar"] < 250].reset_index(drop=True).equals(prefix)
+print("✓ a prefix yields exactly the levels confirmed within it")
+
+print("\nTesting detect_levels / NaN bars...")
+df = pd.DataFrame({"Close": [3.0, 2.0, 1.0, 2.0, 3.0, np.nan, 4.0, 5.0, 4.0, 3.0]},
+                  index=pd.bdate_range("2024-01-01", periods=10))
+ev = detect_levels(df, past_window=1, trade_window=1, price_col="Open")  # fehlende Spalte -> Close
+assert list(ev["type"]) == ["support", "resistance"]
+assert list(ev["level"]) == [1.0, 5.0]
+assert ev["confirmed_at"].iloc[0] == df.index[4]
+print("✓ detect_levels works correctly")
+
+print("\nAll tests completed!")
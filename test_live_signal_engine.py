@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Check the live signal engine against the batch backtest signals
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from live_signal_engine import LiveSignalEngine, load_live_signals
+from signal_utils import calculate_support_resistance, assign_long_signals, assign_short_signals
+from trading_calendar import sessions_between
+
+def batch_signals(daily, p, tw, price_col):
+    """{(strategy, ACTION)} the backtest trades on the last bar of daily."""
+    session = daily.index[-1]
+    support, resistance = calculate_support_resistance(daily, p, tw, price_col=price_col)
+    out = set()
+    for strategy, fn, col in (("LONG", assign_long_signals, "Long"), ("SHORT", assign_short_signals, "Short")):
+        rows = fn(support, resistance, daily.copy(), tw)
+        rows = rows[(rows[f"{col} Date"] == session) & rows[col].notna()]
+        out |= {(strategy, a.upper()) for a in rows[col]}
+    return out
+
+rng = np.random.default_rng(35)
+days = sessions_between("2024-01-02", "2024-09-30")
+close = 100 + np.cumsum(rng.normal(0, 1, len(days)))
+opens = close + rng.normal(0, 0.5, len(days))
+daily = pd.DataFrame({"Open": opens, "High": np.maximum(opens, close) + 0.5,
+                      "Low": np.minimum(opens, close) - 0.5, "Close": close, "Volume": 1000}, index=days)
+tickers = {"OPN": {"trade_on": "open", "long": True, "short": True},
+           "CLS": {"trade_on": "close", "long": True, "short": True}}
+params = {"OPN": {"LONG": (3, 1), "SHORT": (4, 2)}, "CLS": {"LONG": (5, 2), "SHORT": (3, 1)}}
+warm = 60
+
+print("Testing minute-bar replay vs batch signals...")
+with tempfile.TemporaryDirectory() as tmp:
+    signals_file = os.path.join(tmp, "live_signals.json")
+    engine = LiveSignalEngine(tickers, params, signals_file=signals_file)
+    engine.warm_up(now=days[warm], daily={t: daily.iloc[:warm] for t in tickers})
+    checked = signals = 0
+    for k in range(warm, len(days)):
+        day, bar = days[k], daily.iloc[k]
+        # Eröffnungsminute, eine Zwischenminute, Schlussminute (= Tagesbar)
+        minutes = [(day + pd.Timedelta(hours=9, minutes=30), bar.Open, bar.Open, bar.Open, bar.Open),
+                   (day + pd.Timedelta(hours=12), bar.Open, bar.High, bar.Low, (bar.Open + bar.Close) / 2),
+                   (day + pd.Timedelta(hours=15, minutes=59), bar.Close, bar.High, bar.Low, bar.Close)]
+        for ts, o, h, l, c in minutes:
+            for ticker in tickers:
+                engine.on_minute_bar(ticker, ts, o, h, l, c, 10, publish=False)
+        engine.refresh()
+        for ticker, cfg in tickers.items():
+            session = cfg["trade_on"].upper()
+            live = {(s["strategy"], s["action"]) for s in engine.get_signals(session) if s["ticker"] == ticker}
+            expected = set()
+            for strategy, (p, tw) in params[ticker].items():
+                expected |= {x for x in batch_signals(daily.iloc[:k + 1], p, tw, cfg["trade_on"].capitalize())
+                             if x[0] == strategy}
+            assert live == expected, (ticker, day, live, expected)
+            checked += 1
+            signals += len(expected)
+    assert signals > 0
+    engine.save()
+    published = load_live_signals("CLOSE", signals_file, max_age_min=10 ** 9, now=days[-1] + pd.Timedelta(hours=15))
+    assert published == engine.get_signals("CLOSE")
+    assert load_live_signals("CLOSE", signals_file, max_age_min=10 ** 9, now=days[-2]) is None  # anderer Tag
+print(f"✓ {checked} ticker sessions, {signals} signals match the batch backtest")
+
+print("\nAll tests completed!")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Check the stability-aware (p, tw) selection on full and sparse (coarse-to-fine) grids
+"""
+import numpy as np
+
+from grid_search import full_grid, grid_axes, search
+from param_selection import select_params, select_all
+
+p_axis, tw_axis = list(range(3, 101)), list(range(1, 31))   # 98 x 30
+grid = full_grid(p_axis, tw_axis)
+rng = np.random.default_rng(44)
+surface = {(p, tw): 1000 + 400 * np.exp(-((p - 57) / 12.0) ** 2 - ((tw - 17) / 6.0) ** 2) + rng.normal(0, 25)
+           for p, tw in grid}
+
+def evaluate(cells):
+    return [{"past_window": p, "trade_window": tw, "final_cap": surface[(p, tw)], "trades": 10} for p, tw in cells]
+
+def lattice_mean(rows, p, tw, radius=1):
+    """Reference smoothing: mean over evaluated cells within `radius` lattice steps."""
+    i, j = p_axis.index(p), tw_axis.index(tw)
+    vals = [r["final_cap"] for r in rows
+            if abs(p_axis.index(r["past_window"]) - i) <= radius and abs(tw_axis.index(r["trade_window"]) - j) <= radius]
+    return np.mean(vals)
+
+print("Testing sparse coarse-to-fine results...")
+rows = search(evaluate, grid)
+assert len(rows) < len(grid) // 4, len(rows)   # wirklich coarse-to-fine
+axes = grid_axes(grid)
+(p, tw), ranked = select_params(rows, p_axis=axes[0], tw_axis=axes[1])
+assert (p, tw) == select_all({"X": rows}, p_axis=axes[0], tw_axis=axes[1])["X"]
+for r in ranked.head(20).itertuples(index=False):
+    assert abs(r.smoothed - lattice_mean(rows, r.past_window, r.trade_window)) < 1e-9
+print(f"✓ {len(rows)}/{len(grid)} cells, smoothing uses true lattice neighbours, pick p={p}, tw={tw}")
+
+print("\nTesting visited cells do not shift the pick...")
+extra = evaluate([c for c in grid[::97] if c not in {(r["past_window"], r["trade_window"]) for r in rows}])
+far = [r for r in extra if abs(r["past_window"] - p) > 3 or abs(r["trade_window"] - tw) > 3]
+assert select_params(rows + far, p_axis=axes[0], tw_axis=axes[1])[0] == (p, tw)
+print("✓ cells far from the pick leave it unchanged")
+
+print("\nTesting full grid...")
+full = evaluate(grid)
+assert select_params(full)[0] == select_params(full, p_axis=axes[0], tw_axis=axes[1])[0]
+print("✓ axes from the rows equal the grid axes on a complete grid")
+
+print("\nAll tests completed!")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Check vectorized performance analytics against the reference loop implementation
+"""
+import numpy as np
+
+from performance_analytics import max_drawdown, max_drawdown_duration, performance_table, rolling_metrics, ROLLING_COLUMNS
+
+def loop_max_drawdown(equity):
+    peak = equity[0]
+    max_dd = 0.0
+    for v in equity:
+        peak = max(peak, v)
+        max_dd = max(max_dd, (peak - v) / peak if peak else 0.0)
+    return max_dd
+
+rng = np.random.default_rng(42)
+curves = [1000 + np.cumsum(rng.normal(0, 10, n)) for n in (5, 250, 1000)]
+
+print("Testing max_drawdown...")
+for eq in curves:
+    assert abs(max_drawdown(eq) - loop_max_drawdown(eq)) < 1e-12
+print("✓ max_drawdown matches loop")
+
+print("\nTesting max_drawdown_duration...")
+assert max_drawdown_duration([1, 2, 1, 1, 3, 2, 2, 2, 2]) == 4
+assert max_drawdown_duration([1, 2, 3]) == 0
+print("✓ max_drawdown_duration works correctly")
+
+print("\nTesting batched performance_table...")
+results = {
+    "AAA": {
+        "data_info": {"start_date": "2024-01-01", "end_date": "2024-12-31"},
+        "long": {"equity_curve": list(curves[2]), "initial_capital": 1000,
+                 "trades": [{"buy_date": "2024-02-01", "sell_date": "2024-03-01", "pnl": 30.0},
+                            {"buy_date": "2024-04-01", "sell_date": "2024-05-01", "pnl": -10.0}]},
+        "short": {"equity_curve": list(curves[1]), "initial_capital": 1000, "trades": []},
+    }
+}
+table = performance_table(results)
+assert list(table["side"]) == ["long", "short"]
+long_row = table.iloc[0]
+assert long_row["trades"] == 2 and long_row["profit_factor"] == 3.0
+assert abs(long_row["max_drawdown_pct"] - loop_max_drawdown(curves[2]) * 100) < 1e-9
+assert 0 < long_row["exposure_pct"] < 100
+print(table.to_string(index=False))
+print("✓ performance_table works correctly")
+
+print("\nTesting batched rolling columns...")
+for row, eq in zip(table.itertuples(index=False), (curves[2], curves[1])):
+    last = rolling_metrics(eq).iloc[-1]
+    for col in ROLLING_COLUMNS:
+        assert abs(getattr(row, col) - last[col]) < 1e-9, col
+short = performance_table({"S": {"long": {"equity_curve": list(curves[0]), "trades": []}}})
+assert short[ROLLING_COLUMNS].isna().all(axis=None)  # Kurve kürzer als das Fenster
+print("✓ rolling columns equal the last value of rolling_metrics")
+
+print("\nAll tests completed!")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Check the NDJSON results export (round trip, offset index, index rebuild)
+"""
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from results_export import (
+    ResultsWriter, write_results, load_results_file, read_ticker, read_index, iter_records, ndjson_path,
+    results_path,
+)
+
+results = {
+    "AAPL": {"data_info": {"start_date": pd.Timestamp("2024-01-02"), "rows": np.int64(250)},
+             "long": {"parameters": {"p": 3, "tw": 2}, "equity_curve": np.array([1000.0, 1010.5, np.nan]),
+                      "trades": [{"buy_date": pd.Timestamp("2024-02-01"), "sell_date": pd.Timestamp("2024-03-01 15:50"),
+                                  "buy_price": np.float64(180.25), "pnl": 12.5, "shares": 3.5}]}},
+    "BRK.B": {"short": {"parameters": {"p": 5, "tw": 1}, "trades": [], "note": "say \"hi\""}},
+}
+expected = json.loads(json.dumps(results, default=str))
+# numpy-Werte bleiben Zahlen (json default=str hätte sie zu Strings gemacht)
+expected["AAPL"]["data_info"]["rows"] = 250
+expected["AAPL"]["long"]["equity_curve"] = [1000.0, 1010.5, None]
+
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, "results.json")
+
+    print("Testing round trip...")
+    out = write_results(results, path, "ndjson")
+    assert out == [ndjson_path(path)] and not os.path.exists(path)
+    assert load_results_file(path) == expected
+    assert dict(iter_records(path)) == expected
+    assert read_ticker(path, "BRK.B") == expected["BRK.B"] and read_ticker(path, "MSFT") is None
+    print("✓ NDJSON round trip equals the legacy JSON dump")
+
+    print("\nTesting offset index...")
+    idx = read_index(path)
+    with open(ndjson_path(path), "rb") as f:
+        data = f.read()
+    for ticker, (offset, length) in idx.items():
+        assert json.loads(data[offset:offset + length])["ticker"] == ticker
+    print("✓ index points at the ticker lines")
+
+    print("\nTesting index rebuild after an aborted run...")
+    w = ResultsWriter(path)
+    w.write("AAPL", results["AAPL"])
+    w._f.write(b'{"ticker":"MSFT","long":{"tra')  # abgebrochene Zeile, kein close()
+    w._f.close()
+    os.remove(ndjson_path(path) + ".idx")
+    assert list(read_index(path)) == ["AAPL"]
+    assert os.path.exists(ndjson_path(path) + ".idx")
+    assert read_ticker(path, "AAPL") == expected["AAPL"]
+    assert list(dict(iter_records(path))) == ["AAPL"]
+    print("✓ stale index is rebuilt from the line prefixes")
+
+    print("\nTesting stale .json next to a newer .ndjson...")
+    with open(path, "w") as f:
+        json.dump({"OLD": {}}, f)
+    os.utime(path, ns=(1, 1))
+    write_results(results, path, "ndjson")
+    assert results_path(path) == ndjson_path(path)
+    assert list(load_results_file(path)) == ["AAPL", "BRK.B"]
+    from results_store import load_store
+    assert load_store(path, use_cache=False).tickers == ["AAPL", "BRK.B"]
+    write_results({"NEW": {}}, path, "json")
+    assert results_path(path) == path and list(load_results_file(path)) == ["NEW"]
+    print("✓ the newer export wins")
+
+print("\nAll tests completed!")
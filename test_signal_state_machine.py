@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Check the vectorized long/short signal state machine against the reference loop
+"""
+import numpy as np
+import pandas as pd
+
+from signal_utils import (
+    calculate_support_resistance, assign_long_signals, assign_short_signals,
+    assign_long_signals_extended, assign_short_signals_extended,
+    assign_signals_extended_both, get_trade_day_offset, trade_time, level_events,
+)
+
+def loop_signals(support, resistance, data, trade_window, entry_type, entry, exit_):
+    """Reference: the former iterrows state machine (action, trade date per level)."""
+    data = data.sort_index()
+    sup_df = pd.DataFrame({'Date': support.index, 'Level': support.values, 'Type': 'support'})
+    res_df = pd.DataFrame({'Date': resistance.index, 'Level': resistance.values, 'Type': 'resistance'})
+    parts = [sup_df, res_df] if entry_type == 'support' else [res_df, sup_df]
+    df = pd.concat(parts).sort_values(by='Date', kind='stable').reset_index(drop=True)
+    actions, dates, active = [], [], False
+    for _, row in df.iterrows():
+        trade_date = get_trade_day_offset(row['Date'], trade_window, data)
+        if row['Type'] == entry_type and not active:
+            actions.append(entry); dates.append(trade_date); active = True
+        elif row['Type'] != entry_type and active:
+            actions.append(exit_); dates.append(trade_date); active = False
+        else:
+            actions.append(None); dates.append(pd.NaT)
+    return df, actions, dates
+
+def make_data(n, freq, seed):
+    rng = np.random.default_rng(seed)
+    close = np.round(100 + np.cumsum(rng.normal(0, 1, n)), 1)
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close},
+                        index=pd.date_range("2024-01-02", periods=n, freq=freq))
+
+cases = [(make_data(400, "B", 1), "1d", 3, 2), (make_data(400, "B", 2), "1d", 6, 1),
+         (make_data(600, "h", 3), "1h", 4, 3)]
+
+print("Testing assign_long/short_signals...")
+for data, interval, p, tw in cases:
+    support, resistance = calculate_support_resistance(data, p, tw)
+    for fn, col, entry_type, entry, exit_ in ((assign_long_signals, "Long", "support", "buy", "sell"),
+                                              (assign_short_signals, "Short", "resistance", "short", "cover")):
+        out = fn(support, resistance, data.copy(), tw, interval)
+        ref, actions, dates = loop_signals(support, resistance, data, tw, entry_type, entry, exit_)
+        assert list(out["Date"]) == list(ref["Date"]) and list(out["Type"]) == list(ref["Type"])
+        assert [a if isinstance(a, str) else None for a in out[col]] == actions
+        assert pd.DatetimeIndex(out[f"{col} Date"]).equals(pd.DatetimeIndex(dates).as_unit("ns"))
+print("✓ actions and trade dates match the loop")
+
+print("\nTesting extended signals...")
+for data, interval, p, tw in cases:
+    support, resistance = calculate_support_resistance(data, p, tw)
+    both = assign_signals_extended_both(support, resistance, data, tw, interval)
+    for ext, col, entry_type, entry, exit_ in (
+            (assign_long_signals_extended(support, resistance, data.copy(), tw, interval), "Long", "support", "buy", "sell"),
+            (assign_short_signals_extended(support, resistance, data.copy(), tw, interval), "Short", "resistance", "short", "cover")):
+        ref, actions, _ = loop_signals(support, resistance, data, tw, entry_type, entry, exit_)
+        assert [a if isinstance(a, str) else None for a in ext[f"{col} Action"]] == actions
+        expected_days = [trade_time(get_trade_day_offset(d, tw, data), interval) for d in ref["Date"]]
+        assert list(ext[f"{col} Trade Day"]) == expected_days
+        shared = both[0] if col == "Long" else both[1]
+        assert list(shared[f"{col} Action"]) == list(ext[f"{col} Action"])
+        assert list(shared[f"{col} Trade Day"]) == list(ext[f"{col} Trade Day"])
+print("✓ extended long/short signals match the loop")
+
+print("\nTesting same-date support/resistance...")
+d = pd.bdate_range("2024-03-01", periods=6)
+data = pd.DataFrame({"Close": np.arange(6.0)}, index=d)
+support = pd.Series([1.0, 2.0], index=[d[0], d[2]])
+resistance = pd.Series([3.0, 4.0], index=[d[0], d[3]])
+assert list(assign_long_signals(support, resistance, data, 1)["Long"]) == ["buy", "sell", "buy", "sell"]
+assert list(assign_short_signals(support, resistance, data, 1)["Short"]) == ["short", "cover", None, "short"]
+print("✓ entry type wins on equal dates")
+
+print("\nTesting daily interval spellings...")
+ts = pd.Timestamp("2024-03-05")
+for interval in ("1d", "1D", "D", "daily"):
+    assert trade_time(ts, interval) == pd.Timestamp("2024-03-05 15:50")
+assert trade_time(pd.Timestamp("2024-03-05 10:00"), "1h") == pd.Timestamp("2024-03-05 10:00")
+data, _, p, tw = cases[0]
+support, resistance = calculate_support_resistance(data, p, tw)
+upper = assign_long_signals_extended(support, resistance, data.copy(), tw, "1D")["Long Trade Day"].dropna()
+assert len(upper) and (upper.dt.hour == 15).all() and (upper.dt.minute == 50).all()
+assert level_events(support, resistance, data, tw, "1D")["Trade Time"].equals(
+    level_events(support, resistance, data, tw, "1d")["Trade Time"])
+print("✓ '1D' executes at 15:50 like '1d'")
+
+print("\nAll tests completed!")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Check the NYSE trading calendar (holidays, half days, session arithmetic)
+"""
+from datetime import date
+
+import pandas as pd
+
+from trading_calendar import (
+    holidays, half_days, is_trading_day, is_half_day, next_trading_day, previous_trading_day,
+    session_offset, sessions_between, recent_sessions, close_time, session_times,
+)
+
+print("Testing holidays...")
+assert holidays(2024) == [date(2024, 1, 1), date(2024, 1, 15), date(2024, 2, 19), date(2024, 3, 29),
+                          date(2024, 5, 27), date(2024, 6, 19), date(2024, 7, 4), date(2024, 9, 2),
+                          date(2024, 11, 28), date(2024, 12, 25)]
+assert holidays(2025) == [date(2025, 1, 1), date(2025, 1, 9), date(2025, 1, 20), date(2025, 2, 17),
+                          date(2025, 4, 18), date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4),
+                          date(2025, 9, 1), date(2025, 11, 27), date(2025, 12, 25)]
+assert date(2022, 12, 31) not in holidays(2022) and date(2021, 12, 31) not in holidays(2021)  # Neujahr Samstag
+assert date(2021, 7, 5) in holidays(2021) and date(2026, 7, 3) in holidays(2026)              # Ersatztage
+assert date(2021, 6, 18) not in holidays(2021)                                               # Juneteenth ab 2022
+print("✓ holidays match the NYSE schedule")
+
+print("\nTesting half days...")
+assert half_days(2024) == [date(2024, 7, 3), date(2024, 11, 29), date(2024, 12, 24)]
+assert half_days(2025) == [date(2025, 7, 3), date(2025, 11, 28), date(2025, 12, 24)]
+assert half_days(2026) == [date(2026, 11, 27), date(2026, 12, 24)]  # 3. Juli ist Feiertag
+assert is_half_day("2025-11-28") and not is_half_day("2025-11-26")
+assert close_time("2025-12-24") == "13:00" and close_time("2025-12-23") == "16:00"
+assert session_times("2025-12-24")[1:] == (pd.Timestamp("12:55").time(), pd.Timestamp("13:00").time())
+print("✓ half days and close times work correctly")
+
+print("\nTesting session arithmetic...")
+assert len(sessions_between("2024-01-01", "2024-12-31")) == 252
+assert len(sessions_between("2023-01-01", "2023-12-31")) == 250
+assert not is_trading_day("2025-07-04") and not is_trading_day("2025-07-05") and is_trading_day("2025-07-03")
+assert next_trading_day("2025-07-03") == pd.Timestamp("2025-07-07")
+assert previous_trading_day("2025-07-07") == pd.Timestamp("2025-07-03")
+assert next_trading_day("2024-12-20", n=3) == pd.Timestamp("2024-12-26")
+assert session_offset("2025-04-18", 0) == pd.Timestamp("2025-04-21")
+assert session_offset("2025-04-17", 0) == pd.Timestamp("2025-04-17")
+assert list(recent_sessions(3, "2025-01-02")) == list(pd.to_datetime(["2024-12-30", "2024-12-31", "2025-01-02"]))
+assert next_trading_day("2041-12-31") == pd.Timestamp("2042-01-02")  # Kalender wird erweitert
+print("✓ session arithmetic works correctly")
+
+print("\nAll tests completed!")
@@ -1,6 +1,11 @@
-from ib_insync import Stock
+"""Ticker settings.
 
-tickers = {
+The universe lives in UNIVERSE_FILE (CSV/SQLite, see universe.py); the list
+below is only used while that file does not exist.
+"""
+from universe import Universe
+
+DEFAULT_TICKERS = {
     "AAPL": {"symbol": "AAPL", "conID": 265598, "long": True,  "short": True,  "initialCapitalLong": 1000, "initialCapitalShort": 1000, "order_round_factor": 1, "trade_on": "Open"},
     "GOOGL": {"symbol": "GOOGL", "conID": 208813720, "long": True,  "short": True,  "initialCapitalLong": 1200, "initialCapitalShort": 1200, "order_round_factor": 1, "trade_on": "Close"},
     "NVDA": {"symbol": "NVDA", "conID": 4815747, "long": True,  "short": False, "initialCapitalLong": 1800, "initialCapitalShort": 0, "order_round_factor": 1, "trade_on": "Open"},
@@ -16,3 +21,5 @@ tickers = {
     "BRRR": {"symbol": "BRRR", "conID": 582852809, "long": True,  "short": True, "initialCapitalLong": 1000, "initialCapitalShort": 1000, "order_round_factor": 1, "trade_on": "Close"},
     "QUBT": {"symbol": "QUBT", "conID": 380357230, "long": True,  "short": False, "initialCapitalLong": 2000, "initialCapitalShort": 0, "order_round_factor": 10, "trade_on": "Open"}
 }
+
+tickers = Universe(default=DEFAULT_TICKERS)
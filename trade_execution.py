@@ -9,6 +9,7 @@ import yfinance as yf
 from datetime import datetime
 from ib_insync import IB, Stock, MarketOrder, LimitOrder
 from tickers_config import tickers
+from contract_registry import get_contract
 import json
 from datetime import date, timedelta
 
@@ -23,7 +24,7 @@ def get_price(ib, symbol: str, fallback: bool = True) -> float | None:
     - fallback: True = Yahoo-Fallback aktiv
     """
     try:
-        contract = Stock(symbol, "SMART", "USD")
+        contract = get_contract(ib, symbol)
         ticker   = ib.reqMktData(contract, "", False, False)
         ib.sleep(1.5)  # IB braucht kurz Zeit für Preisdaten
 
@@ -45,8 +46,12 @@ def get_price(ib, symbol: str, fallback: bool = True) -> float | None:
     return None
                                                                                        
 # ─── 2. Live-Preis-Getter (unverändert) ────────────────────────────────────────
-def get_realtime_price(ib: IB, contract: Stock) -> float:
-    ib.qualifyContracts(contract)
+def get_realtime_price(ib: IB, contract: Stock | str) -> float:
+    # Symbols resolve via the contract registry; only unknown contracts still need qualifying
+    if isinstance(contract, str):
+        contract = get_contract(ib, contract)
+    elif not contract.conId:
+        ib.qualifyContracts(contract)
     ticker = ib.reqMktData(contract, snapshot=True)
     ib.sleep(2)
     price = ticker.last or ticker.close
@@ -224,7 +229,7 @@ def execute_trades(ib: IB):
                 continue
             action   = "BUY" if side in ("BUY","COVER") else "SELL"
             order    = MarketOrder(action, qty)
-            contract = ib.qualifyContracts(Stock(symbol,'SMART','USD'))[0]
+            contract = get_contract(ib, symbol)
             ib.placeOrder(contract, order)
             print(f"{action} {qty}×{symbol} @ {price:.2f} (Ziel={target_qty(symbol,side,price,cfg)})")
 
@@ -294,7 +299,7 @@ def execute_merged_trades(ib: IB):
         qty = o['qty']
         symbol = o['symbol']
         price = o.get('price')
-        contract = ib.qualifyContracts(Stock(symbol,'SMART','USD'))[0]
+        contract = get_contract(ib, symbol)
         order = MarketOrder(action, qty)
         ib.placeOrder(contract, order)
         tag = " (merged)" if o.get('merged') else ""
@@ -364,7 +369,7 @@ def test_merged_trades_for_date(date_str: str, execute: bool = False, paper: boo
         return
     for m in merged_plan:
         action = 'BUY' if m['side'] == 'BUY' else 'SELL'
-        contract = ib.qualifyContracts(Stock(m['symbol'],'SMART','USD'))[0]
+        contract = get_contract(ib, m['symbol'])
         order = MarketOrder(action, m['qty'])
         ib.placeOrder(contract, order)
         print(f"Submitted {action} {m['qty']} {m['symbol']} (merged test)")
@@ -723,7 +728,7 @@ def schedule_trades_for_date(date_str: str, execute: bool = False, merged: bool
                 print(f"  DRY {action} {qty} {sym} ref={o.get('price')} trade_on={o.get('trade_on')}")
             else:
                 try:
-                    contract = ib.qualifyContracts(Stock(sym,'SMART','USD'))[0]
+                    contract = get_contract(ib, sym)
                     order = None
                     if limit:
                         # Determine limit price based on trade_on field (Open/Close)
@@ -839,7 +844,7 @@ def transmit_orders_api(date_str: str, *, phase: str = 'both', execute: bool = F
             print(f"DRY {action} {qty} {sym} trade_on={to_col}")
             continue
         try:
-            contract = ib.qualifyContracts(Stock(sym,'SMART','USD'))[0]
+            contract = get_contract(ib, sym)
             use_limit = False
             limit_price = None
             if limit:
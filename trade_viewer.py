@@ -4,19 +4,17 @@ Trade List Viewer with Date Range Filtering
 Shows detailed trade information for specified date ranges and tickers
 """
 
-import json
 import pandas as pd
 from datetime import datetime, timedelta
 from tickers_config import tickers
+from results_store import load_results, parse_dates
 
 def load_trade_data():
-    """Load trade data from the comprehensive backtest results"""
-    try:
-        with open('complete_comprehensive_backtest_results.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
+    """Load trade data from the comprehensive backtest results (cached per file change, see results_store)"""
+    data = load_results()
+    if data is None:
         print("❌ Results file not found. Please run the comprehensive backtest first.")
-        return None
+    return data
 
 def parse_date(date_str):
     """Parse date string to datetime object"""
@@ -33,13 +31,10 @@ def filter_trades_by_date_range(trades, start_date, end_date, date_field='buy_da
     start_dt = parse_date(start_date)
     end_dt = parse_date(end_date)
     
-    filtered_trades = []
-    for trade in trades:
-        trade_date = parse_date(trade[date_field])
-        if start_dt <= trade_date <= end_dt:
-            filtered_trades.append(trade)
-    
-    return filtered_trades
+    # Kalendertag vergleichen (Uhrzeit wie bei parse_date ignoriert), alle Trades in einem Durchlauf
+    days = pd.DatetimeIndex(parse_dates([t[date_field] for t in trades])).normalize()
+    keep = (days >= start_dt) & (days <= end_dt)
+    return [trade for trade, k in zip(trades, keep) if k]
 
 def display_trades(ticker, strategy_type, trades, start_date=None, end_date=None):
     """Display trades in a formatted table"""
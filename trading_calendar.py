@@ -0,0 +1,241 @@
+"""NYSE trading calendar (sessions, holidays, half days).
+
+Holidays used to be hardcoded per script and year (US_HOLIDAYS_2025 in
+generate_last14_trades, the is_trading_day methods of the traders), and
+signal_utils.get_next_trading_day ignored them. Here the sessions of
+TRADING_CALENDAR_YEARS are generated once from the exchange rules as a sorted
+datetime64[D] array; every query is a binary search on it:
+
+    is_trading_day(d)            session on d's date?
+    next_trading_day(d, n=1)     n-th session after d
+    previous_trading_day(d, n=1) n-th session before d
+    session_offset(d, n)         n-th session after (n > 0) / before (n < 0); n = 0: d or the next session
+    recent_sessions(n, end)      last n sessions up to end (inclusive)
+    sessions_between(a, b)       sessions in [a, b]
+    is_half_day(d), close_time(d), session_times(d)
+
+Rules: New Year (Sunday -> Monday; Saturday -> not observed), MLK day (from
+1998), Presidents day, Good Friday, Memorial day, Juneteenth (from 2022),
+Independence day and Christmas (Saturday -> Friday, Sunday -> Monday), Labor
+day, Thanksgiving, plus SPECIAL_CLOSURES. Half days (HALF_DAY_CLOSE_TIME):
+July 3 when July 4 is Tuesday-Friday, the day after Thanksgiving and
+December 24 on Monday-Thursday. Dates outside the configured years extend
+the calendar on first use.
+
+    python trading_calendar.py 2026          # holidays and half days of a year
+"""
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from config import TRADING_CALENDAR_YEARS, MARKET_OPEN_TIME, MARKET_CLOSE_TIME, HALF_DAY_CLOSE_TIME
+
+# Außerplanmäßige Schließungen (Trauertage, Unwetter, 9/11)
+SPECIAL_CLOSURES = {
+    date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14),
+    date(2004, 6, 11), date(2007, 1, 2), date(2012, 10, 29), date(2012, 10, 30),
+    date(2018, 12, 5), date(2025, 1, 9),
+}
+
+
+def _easter(year):
+    """Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    return date(year, month, (h + l - 7 * m + 114) % 31 + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th weekday (Mon=0) of a month; n = -1 is the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(d):
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+def holidays(year):
+    """NYSE full-day closures of a year (sorted dates)."""
+    out = set()
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:  # Samstag: kein Ersatztag am 31.12.
+        out.add(_observed(new_year))
+    if year >= 1998:
+        out.add(_nth_weekday(year, 1, 0, 3))
+    out.add(_nth_weekday(year, 2, 0, 3))
+    out.add(_easter(year) - timedelta(days=2))
+    out.add(_nth_weekday(year, 5, 0, -1))
+    if year >= 2022:
+        out.add(_observed(date(year, 6, 19)))
+    out.add(_observed(date(year, 7, 4)))
+    out.add(_nth_weekday(year, 9, 0, 1))
+    out.add(_nth_weekday(year, 11, 3, 4))
+    out.add(_observed(date(year, 12, 25)))
+    out.update(d for d in SPECIAL_CLOSURES if d.year == year)
+    return sorted(out)
+
+
+def half_days(year):
+    """Early closes (HALF_DAY_CLOSE_TIME) of a year (sorted dates)."""
+    out = [_nth_weekday(year, 11, 3, 4) + timedelta(days=1)]
+    july3, dec24 = date(year, 7, 3), date(year, 12, 24)
+    if july3.weekday() <= 3:
+        out.append(july3)
+    if dec24.weekday() <= 3:
+        out.append(dec24)
+    closed = set(holidays(year))
+    return sorted(d for d in out if d not in closed)
+
+
+def _day(d):
+    return np.datetime64(pd.Timestamp(d).date(), "D")
+
+
+class TradingCalendar:
+    """Sessions of a year range as sorted datetime64[D] arrays (sessions, half_days)."""
+
+    def __init__(self, first_year, last_year):
+        self.first_year, self.last_year = first_year, last_year
+        days = pd.bdate_range(date(first_year, 1, 1), date(last_year, 12, 31)).values.astype("datetime64[D]")
+        closed = np.array([np.datetime64(d, "D") for y in range(first_year, last_year + 1) for d in holidays(y)])
+        self.sessions = days[~np.isin(days, closed)]
+        self.half_days = np.array([np.datetime64(d, "D") for y in range(first_year, last_year + 1)
+                                   for d in half_days(y)], dtype="datetime64[D]")
+
+    def covers(self, d):
+        return self.first_year <= pd.Timestamp(d).year <= self.last_year
+
+    def is_session(self, d):
+        d = _day(d)
+        i = np.searchsorted(self.sessions, d)
+        return bool(i < len(self.sessions) and self.sessions[i] == d)
+
+    def is_half_day(self, d):
+        d = _day(d)
+        i = np.searchsorted(self.half_days, d)
+        return bool(i < len(self.half_days) and self.half_days[i] == d)
+
+    def offset(self, d, n):
+        """n-th session after (n > 0) or before (n < 0) d; n = 0: d itself or the next session. None past the range."""
+        d = _day(d)
+        if n > 0:
+            i = np.searchsorted(self.sessions, d, side="right") + n - 1
+        elif n < 0:
+            i = np.searchsorted(self.sessions, d, side="left") + n
+        else:
+            i = np.searchsorted(self.sessions, d, side="left")
+        if 0 <= i < len(self.sessions):
+            return pd.Timestamp(self.sessions[i])
+        return None
+
+    def offsets(self, dates, n=1):
+        """offset() for an array of dates (NaT past the range)."""
+        days = pd.DatetimeIndex(pd.to_datetime(pd.Series(np.asarray(dates)), errors="coerce")).values.astype("datetime64[D]")
+        side = "right" if n > 0 else "left"
+        pos = np.searchsorted(self.sessions, days, side=side) + (n - 1 if n > 0 else n)
+        ok = (pos >= 0) & (pos < len(self.sessions)) & ~np.isnat(days)
+        out = np.full(len(days), np.datetime64("NaT"), dtype="datetime64[D]")
+        out[ok] = self.sessions[pos[ok]]
+        return pd.DatetimeIndex(out).as_unit("ns")
+
+    def between(self, start, end):
+        lo = np.searchsorted(self.sessions, _day(start), side="left")
+        hi = np.searchsorted(self.sessions, _day(end), side="right")
+        return pd.DatetimeIndex(self.sessions[lo:hi]).as_unit("ns")
+
+    def recent(self, n, end):
+        hi = np.searchsorted(self.sessions, _day(end), side="right")
+        return pd.DatetimeIndex(self.sessions[max(0, hi - n):hi]).as_unit("ns")
+
+
+_calendar = None
+
+
+def calendar(*dates):
+    """Shared TradingCalendar covering TRADING_CALENDAR_YEARS and the given dates."""
+    global _calendar
+    years = [pd.Timestamp(d).year for d in dates if d is not None and not pd.isna(d)]
+    first, last = TRADING_CALENDAR_YEARS
+    if _calendar is not None:
+        first, last = _calendar.first_year, _calendar.last_year
+    # Puffer von einem Jahr für Abfragen über den Jahreswechsel
+    want_first, want_last = min([first] + [y - 1 for y in years]), max([last] + [y + 1 for y in years])
+    if _calendar is None or want_first < first or want_last > last:
+        _calendar = TradingCalendar(want_first, want_last)
+    return _calendar
+
+
+def is_trading_day(d=None):
+    d = d if d is not None else datetime.now()
+    return calendar(d).is_session(d)
+
+
+def is_half_day(d=None):
+    d = d if d is not None else datetime.now()
+    return calendar(d).is_half_day(d)
+
+
+def next_trading_day(d=None, n=1):
+    d = d if d is not None else datetime.now()
+    return calendar(d).offset(d, n)
+
+
+def previous_trading_day(d=None, n=1):
+    d = d if d is not None else datetime.now()
+    return calendar(d).offset(d, -n)
+
+
+def session_offset(d, n):
+    return calendar(d).offset(d, n)
+
+
+def sessions_between(start, end):
+    return calendar(start, end).between(start, end)
+
+
+def recent_sessions(n, end=None):
+    """Last n sessions up to end (default today), oldest first."""
+    end = end if end is not None else datetime.now()
+    start = pd.Timestamp(end) - pd.Timedelta(days=2 * n + 10)
+    return calendar(start, end).recent(n, end)
+
+
+def close_time(d=None):
+    """Market close of d's session ("HH:MM"): HALF_DAY_CLOSE_TIME on half days."""
+    return HALF_DAY_CLOSE_TIME if is_half_day(d) else MARKET_CLOSE_TIME
+
+
+def session_times(d=None, open_delay_min=5, close_advance_min=5):
+    """(OPEN trade time, CLOSE trade time, market close) of d's session as datetime.time."""
+    market_open = datetime.strptime(MARKET_OPEN_TIME, "%H:%M")
+    market_close = datetime.strptime(close_time(d), "%H:%M")
+    return ((market_open + timedelta(minutes=open_delay_min)).time(),
+            (market_close - timedelta(minutes=close_advance_min)).time(),
+            market_close.time())
+
+
+if __name__ == "__main__":
+    import sys
+
+    year = int(sys.argv[1]) if len(sys.argv) > 1 else datetime.now().year
+    print(f"NYSE {year}: {len(sessions_between(date(year, 1, 1), date(year, 12, 31)))} sessions")
+    for d in holidays(year):
+        print(f"  closed    {d} {d:%a}")
+    for d in half_days(year):
+        print(f"  half day  {d} {d:%a} (close {HALF_DAY_CLOSE_TIME})")
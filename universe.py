@@ -0,0 +1,235 @@
+"""Ticker universe registry backed by a CSV or SQLite file.
+
+One row per symbol with the settings that used to live in the hardcoded
+tickers dict:
+
+    symbol,conID,long,short,initialCapitalLong,initialCapitalShort,order_round_factor,trade_on,tags,enabled
+    AAPL,265598,true,true,1000,1000,1,Open,tech;mega,true
+
+UNIVERSE_FILE may be a .csv or a .db/.sqlite file (table "universe", same
+columns). The file is read lazily on first access and re-read when its mtime
+changes. Universe behaves like the old dict (symbol -> settings), so
+`for t, cfg in tickers.items()` keeps working everywhere, and adds filtered
+iteration and stable sharding (crc32 of the symbol) so 500+ symbols can be
+split across worker processes or machines:
+
+    UNIVERSE_SHARD=1/4 python complete_comprehensive_backtest.py
+    python universe.py list --tag tech --side short --shard 0/4
+    python universe.py export universe.csv        # write the built-in list
+"""
+import csv
+import os
+import sqlite3
+import zlib
+from collections.abc import Mapping
+
+from config import UNIVERSE_FILE, UNIVERSE_SHARD
+
+COLUMNS = ["symbol", "conID", "long", "short", "initialCapitalLong", "initialCapitalShort",
+           "order_round_factor", "trade_on", "tags", "enabled"]
+
+_TRUE = {"1", "true", "yes", "y", "t", "x"}
+
+
+def _as_bool(value, default=False):
+    if value is None or value == "":
+        return default
+    if isinstance(value, (bool, int, float)):
+        return bool(value)
+    return str(value).strip().lower() in _TRUE
+
+
+def _as_number(value, default=0):
+    if value is None or value == "":
+        return default
+    f = float(value)
+    return int(f) if f.is_integer() else f
+
+
+def _parse_row(row):
+    """File row (strings or SQLite values) -> ticker settings dict like the old tickers_config."""
+    symbol = str(row["symbol"]).strip().upper()
+    tags = row.get("tags") or ""
+    con_id = row.get("conID")
+    return symbol, {
+        "symbol": symbol,
+        "conID": int(float(con_id)) if con_id not in (None, "") else None,
+        "long": _as_bool(row.get("long")),
+        "short": _as_bool(row.get("short")),
+        "initialCapitalLong": _as_number(row.get("initialCapitalLong")),
+        "initialCapitalShort": _as_number(row.get("initialCapitalShort")),
+        "order_round_factor": _as_number(row.get("order_round_factor"), 1),
+        "trade_on": (row.get("trade_on") or "Close").strip().capitalize(),
+        "tags": [t.strip() for t in str(tags).replace(",", ";").split(";") if t.strip()],
+        "enabled": _as_bool(row.get("enabled"), default=True),
+    }
+
+
+def _is_sqlite(path):
+    return os.path.splitext(path)[1].lower() in (".db", ".sqlite", ".sqlite3")
+
+
+def read_universe_file(path):
+    """{symbol: settings} for the enabled rows of a CSV/SQLite universe file (file order)."""
+    if _is_sqlite(path):
+        con = sqlite3.connect(path)
+        try:
+            con.row_factory = sqlite3.Row
+            rows = [dict(r) for r in con.execute("SELECT * FROM universe")]
+        finally:
+            con.close()
+    else:
+        with open(path, "r", newline="") as f:
+            rows = list(csv.DictReader(f))
+    out = {}
+    for row in rows:
+        if not row.get("symbol"):
+            continue
+        symbol, cfg = _parse_row(row)
+        if cfg["enabled"]:
+            out[symbol] = cfg
+    return out
+
+
+def write_universe_file(tickers, path):
+    """Write {symbol: settings} as a CSV or SQLite universe file."""
+    rows = []
+    for symbol, cfg in tickers.items():
+        row = {c: cfg.get(c) for c in COLUMNS}
+        row["symbol"] = symbol
+        row["tags"] = ";".join(cfg.get("tags", []) or [])
+        row["enabled"] = cfg.get("enabled", True)
+        rows.append(row)
+    if _is_sqlite(path):
+        con = sqlite3.connect(path)
+        try:
+            con.execute("DROP TABLE IF EXISTS universe")
+            con.execute("CREATE TABLE universe (symbol TEXT PRIMARY KEY, conID INTEGER, long INTEGER, short INTEGER, "
+                        "initialCapitalLong REAL, initialCapitalShort REAL, order_round_factor REAL, "
+                        "trade_on TEXT, tags TEXT, enabled INTEGER)")
+            con.executemany(f"INSERT INTO universe VALUES ({','.join('?' * len(COLUMNS))})",
+                            [tuple(r[c] for c in COLUMNS) for r in rows])
+            con.commit()
+        finally:
+            con.close()
+    else:
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            for r in rows:
+                writer.writerow({c: str(r[c]).lower() if isinstance(r[c], bool) else r[c] for c in COLUMNS})
+
+
+def shard_of(symbol, count):
+    """Stable shard number of a symbol (same on every machine and Python run)."""
+    return zlib.crc32(symbol.upper().encode()) % count
+
+
+def parse_shard(spec):
+    """"1/4" -> (1, 4); empty -> None."""
+    if not spec:
+        return None
+    index, count = (int(x) for x in str(spec).split("/"))
+    if not 0 <= index < count:
+        raise ValueError(f"Shard {spec!r}: index must be in 0..{count - 1}")
+    return index, count
+
+
+def split_shards(symbols, count):
+    """Distribute symbols into `count` lists by shard_of (e.g. for worker processes)."""
+    shards = [[] for _ in range(count)]
+    for s in symbols:
+        shards[shard_of(s, count)].append(s)
+    return shards
+
+
+class Universe(Mapping):
+    """Lazy, filterable symbol -> settings mapping.
+
+    path: CSV/SQLite file (default UNIVERSE_FILE); default: dict used while
+    the file does not exist; shard: "i/n" spec (default $UNIVERSE_SHARD or
+    UNIVERSE_SHARD) restricting the mapping to one shard.
+    """
+
+    def __init__(self, path=None, default=None, shard=None):
+        self.path = path or UNIVERSE_FILE
+        self.default = default or {}
+        self.shard_spec = parse_shard(shard if shard is not None else os.environ.get("UNIVERSE_SHARD", UNIVERSE_SHARD))
+        self._data = None
+        self._mtime = None
+
+    def _load(self):
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        if self._data is not None and mtime == self._mtime:
+            return self._data
+        if mtime is None:
+            data = dict(self.default)
+        else:
+            data = read_universe_file(self.path)
+        if self.shard_spec:
+            index, count = self.shard_spec
+            data = {s: cfg for s, cfg in data.items() if shard_of(s, count) == index}
+        self._data, self._mtime = data, mtime
+        return data
+
+    def __getitem__(self, symbol):
+        return self._load()[symbol]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __repr__(self):
+        return f"Universe({self.path!r}, {len(self)} symbols)"
+
+    def reload(self):
+        self._data = None
+        return self._load()
+
+    def filter(self, tag=None, side=None, trade_on=None):
+        """Settings of the symbols matching all given criteria (side: "long"/"short")."""
+        out = {}
+        for symbol, cfg in self._load().items():
+            if tag and tag not in cfg.get("tags", []):
+                continue
+            if side and not cfg.get(side.lower(), False):
+                continue
+            if trade_on and cfg.get("trade_on", "").lower() != trade_on.lower():
+                continue
+            out[symbol] = cfg
+        return out
+
+    def shard(self, index, count):
+        """Settings of the symbols in shard index of count."""
+        return {s: cfg for s, cfg in self._load().items() if shard_of(s, count) == index}
+
+
+if __name__ == "__main__":
+    import argparse
+    from tickers_config import DEFAULT_TICKERS, tickers
+
+    parser = argparse.ArgumentParser(description="Ticker universe registry")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_list = sub.add_parser("list", help="List (filtered) symbols")
+    p_list.add_argument("--tag")
+    p_list.add_argument("--side", choices=["long", "short"])
+    p_list.add_argument("--trade-on", choices=["open", "close"])
+    p_list.add_argument("--shard", help="i/n")
+    p_export = sub.add_parser("export", help="Write the current universe (or the built-in list) to a file")
+    p_export.add_argument("path", nargs="?", default=UNIVERSE_FILE)
+    p_export.add_argument("--builtin", action="store_true", help="Export the built-in default list")
+    args = parser.parse_args()
+
+    if args.cmd == "export":
+        src = DEFAULT_TICKERS if args.builtin else dict(tickers)
+        write_universe_file(src, args.path)
+        print(f"[DONE] {len(src)} symbols written to {args.path}")
+    else:
+        uni = Universe(tickers.path, DEFAULT_TICKERS, shard=args.shard or "")
+        sel = uni.filter(tag=args.tag, side=args.side, trade_on=args.trade_on)
+        for symbol, cfg in sel.items():
+            sides = "/".join(s for s in ("long", "short") if cfg.get(s))
+            print(f"{symbol:8} {cfg['trade_on']:5} {sides:10} {','.join(cfg.get('tags', []))}")
+        print(f"{len(sel)} symbols")